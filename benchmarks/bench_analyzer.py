@@ -0,0 +1,61 @@
+"""
+Compares the JSON-based analyzer functions with the native `Analyzer` API.
+
+Requires the Rust module to be built (`cd rust_analyzer && maturin develop -r`).
+"""
+
+import argparse
+import json
+import random
+import time
+
+from notia_analyzer import Analyzer, analyze_notes_content, extract_keywords
+
+WORDS = (
+    "refactor authentication module jwt token database migration cache latency "
+    "endpoint deploy kubernetes pipeline release bug ticket review python rust "
+    "index query vector embedding search rerank project sprint backlog"
+).split()
+
+
+def make_notes(count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": str(i),
+            "content": " ".join(rng.choices(WORDS, k=rng.randint(10, 200))),
+            "project": f"project-{rng.randint(0, 50)}",
+        }
+        for i in range(count)
+    ]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def run(sizes: list[int], top_n: int):
+    analyzer = Analyzer()
+    for size in sizes:
+        notes = make_notes(size)
+        contents = [note["content"] for note in notes]
+        projects = [note["project"] for note in notes]
+
+        json_analyze = timed(lambda: analyze_notes_content(json.dumps(notes)))
+        native_analyze = timed(lambda: analyzer.analyze(contents, projects))
+        json_keywords = timed(lambda: extract_keywords(json.dumps(notes), top_n))
+        native_keywords = timed(lambda: analyzer.top_keywords(contents, top_n))
+
+        print(f"{size} notes")
+        print(f"  analyze   json={json_analyze:9.1f} ms  native={native_analyze:9.1f} ms")
+        print(f"  keywords  json={json_keywords:9.1f} ms  native={native_keywords:9.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--top-n", type=int, default=10)
+    args = parser.parse_args()
+    run(args.sizes, args.top_n)
@@ -0,0 +1,84 @@
+"""
+Per-search rerank latency with a fresh client per call versus the pooled client.
+
+By default the benchmark runs against the local stub server. Pass `--base-url`
+to measure a real rerank endpoint, where TLS handshakes make the difference larger.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from stub_server import start_stub_server
+
+DOCUMENTS = [f"note {i} about the authentication module and JWT tokens" for i in range(20)]
+
+
+async def rerank_fresh_client(base_url: str, api_key: str, model: str, query: str):
+    """Reranks like the original implementation, with one client per search."""
+    async with httpx.AsyncClient() as client:
+        response = await client.post(
+            f"{base_url.rstrip('/')}/rerank",
+            headers={"Authorization": f"Bearer {api_key}"},
+            json={"model": model, "query": query, "documents": DOCUMENTS},
+            timeout=30.0,
+        )
+        response.raise_for_status()
+        return response.json().get("results", [])
+
+
+def summarize(name: str, samples: list[float]):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(
+        f"{name:<14} p50={statistics.median(samples):7.2f} ms  "
+        f"p95={p95:7.2f} ms  mean={statistics.mean(samples):7.2f} ms"
+    )
+
+
+async def run(base_url: str, iterations: int):
+    os.environ["OPENAI_API_BASE"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.chdir(tempfile.mkdtemp(prefix="notia-bench-"))
+    from vector_store import VectorStore
+
+    store = VectorStore()
+    query = "authentication tokens"
+
+    fresh = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await rerank_fresh_client(base_url, store.openai_api_key, store.openai_rerank_model, query)
+        fresh.append((time.perf_counter() - start) * 1000)
+
+    pooled = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await store.rerank_documents(query, DOCUMENTS)
+        pooled.append((time.perf_counter() - start) * 1000)
+    await store.aclose()
+
+    summarize("fresh client", fresh)
+    summarize("pooled client", pooled)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", help="Rerank endpoint base URL (defaults to the local stub)")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    base_url = args.base_url
+    if base_url is None:
+        server = start_stub_server()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+    asyncio.run(run(base_url, args.iterations))
@@ -0,0 +1,187 @@
+"""
+Recall and latency of project-scoped semantic search against global search.
+
+For each corpus size, a fresh store is filled from `benchmarks/corpus.py` against
+the local stub server, then queries restricted to one project are answered two ways:
+
+- global: the current behaviour, `search_notes` over the whole collection with
+  `--candidates` results, keeping those of the project;
+- scoped: `search_notes` with a `where` filter on the project, pushed down to ChromaDB.
+
+Both are compared with the exact nearest notes of the project, computed by brute
+force over the stored note and chunk embeddings. Projects are sampled from the
+largest to the smallest, as the corpus spreads notes with a skewed distribution.
+
+    python benchmarks/bench_scoped_search.py --sizes 1000,10000,50000 -o dist/scoped.json
+
+Requires the Rust module to be built (`cd rust_analyzer && maturin develop -r`).
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(BENCH_DIR, "..", "src")
+sys.path.insert(0, SRC)
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import generate_notes, project_names, sample_queries
+from stub_server import start_stub_server
+
+
+def summarize(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "mean": statistics.mean(samples),
+        "p50": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def exact_neighbours(store, project: str) -> tuple[list[str], np.ndarray]:
+    """
+    Returns the note of each stored vector of a project, notes and chunks alike,
+    and the vectors, for a brute-force search scored like `search_notes`.
+    """
+    notes = store.collection.get(where={"project": project}, include=["embeddings"])
+    chunks = store.chunk_collection.get(
+        where={"project": project}, include=["embeddings", "metadatas"]
+    )
+    owners = list(notes["ids"]) + [metadata["note_id"] for metadata in chunks["metadatas"]]
+    vectors = [np.asarray(notes["embeddings"]).reshape(len(notes["ids"]), -1)]
+    if chunks["ids"]:
+        vectors.append(np.asarray(chunks["embeddings"]))
+    return owners, np.concatenate(vectors).astype(np.float32)
+
+
+def exact_top_k(owners: list[str], vectors: np.ndarray, query: np.ndarray, k: int) -> list[str]:
+    """Returns the `k` notes of the project closest to the query, by squared L2 distance."""
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    best = {}
+    for owner, distance in zip(owners, distances):
+        best[owner] = min(best.get(owner, distance), distance)
+    return sorted(best, key=best.get)[:k]
+
+
+def run_size(size: int, projects: int, queries: int, k: int, candidates: int) -> dict:
+    """Fills a fresh store with `size` notes and measures both kinds of search."""
+    from models import Note
+    from vector_store import VectorStore
+
+    store = VectorStore(path=tempfile.mkdtemp(prefix=f"notia-scoped-{size}-"))
+    start = time.perf_counter()
+    store.add_notes(
+        Note(
+            content=note["content"],
+            project=note["project"],
+            timestamp=datetime.datetime.fromisoformat(note["timestamp"]),
+            id=note["id"],
+        )
+        for note in generate_notes(size, projects)
+    )
+    print(f"  stored in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+    # From the largest to the smallest project, skipping projects without notes
+    names = [name for name in project_names(projects) if store.count_notes(name)]
+    texts = sample_queries(queries)
+    embeddings = store.embedding_function(texts)
+    exact = {}
+
+    results = {
+        "global": {"latency_ms": [], "recall": [], "in_project": []},
+        "scoped": {"latency_ms": [], "recall": []},
+    }
+    for i, (text, embedding) in enumerate(zip(texts, embeddings)):
+        project = names[i % len(names)]
+        if project not in exact:
+            exact[project] = exact_neighbours(store, project)
+        truth = set(exact_top_k(*exact[project], np.asarray(embedding, dtype=np.float32), k))
+
+        begin = time.perf_counter()
+        hits = store.search_notes(text, n_results=candidates, query_embedding=embedding)
+        kept = [
+            note_id
+            for note_id, metadata in zip(hits["ids"][0], hits["metadatas"][0])
+            if metadata.get("project") == project
+        ][:k]
+        results["global"]["latency_ms"].append((time.perf_counter() - begin) * 1000)
+        results["global"]["recall"].append(len(truth & set(kept)) / len(truth))
+        results["global"]["in_project"].append(len(kept) / max(1, len(hits["ids"][0])))
+
+        begin = time.perf_counter()
+        hits = store.search_notes(
+            text, n_results=k, query_embedding=embedding, where={"project": project}
+        )
+        results["scoped"]["latency_ms"].append((time.perf_counter() - begin) * 1000)
+        results["scoped"]["recall"].append(len(truth & set(hits["ids"][0])) / len(truth))
+
+    store.close()
+    report = {
+        mode: {name: summarize(samples) for name, samples in values.items()}
+        for mode, values in results.items()
+    }
+    for mode, values in report.items():
+        print(
+            f"  {mode:<7} recall@{k}={values['recall']['mean']:.3f}  "
+            f"p50={values['latency_ms']['p50']:.2f} ms  p95={values['latency_ms']['p95']:.2f} ms",
+            file=sys.stderr,
+        )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", default="1000,10000", help="Comma-separated corpus sizes, e.g. 1000,10000,50000."
+    )
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=100, help="Queries per corpus size.")
+    parser.add_argument("-k", type=int, default=5, help="Number of notes wanted per query.")
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=10,
+        help="Results of the global search, like the initial_n_results of the search tool.",
+    )
+    parser.add_argument("-o", "--output", default="dist/scoped_search.json")
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    os.environ["OPENAI_API_BASE"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "projects": args.projects,
+            "queries": args.queries,
+            "k": args.k,
+            "candidates": args.candidates,
+        },
+        "results": {},
+    }
+    for size in [int(size) for size in args.sizes.split(",")]:
+        print(f"{size} notes:", file=sys.stderr)
+        report["results"][str(size)] = run_size(
+            size, args.projects, args.queries, args.k, args.candidates
+        )
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Scaling of the single-collection and sharded store layouts.
+
+For each corpus size and layout, a fresh store is filled from `benchmarks/corpus.py`
+against the local stub server, then the ingestion throughput and the latency of
+global searches (fanned out to every shard), project-scoped searches (one shard),
+lookups by ID and project listings are measured. Layouts are `single`, `project`
+(one shard per project) and `hash:N` (projects hashed into N shards):
+
+    python benchmarks/bench_sharding.py --sizes 10000,100000 --layouts single,project,hash:16
+
+Requires the Rust module to be built (`cd rust_analyzer && maturin develop -r`).
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(BENCH_DIR, "..", "src")
+sys.path.insert(0, SRC)
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import generate_notes, project_names, sample_queries
+from stub_server import start_stub_server
+
+
+def summarize(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "mean_ms": statistics.mean(samples),
+        "p50_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def timed(results: dict, name: str, function, repeat: int):
+    """Calls `function` `repeat` times and records its latency under `name`."""
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    results[name] = summarize(samples)
+    print(f"    {name:<22} p50={results[name]['p50_ms']:9.2f} ms", file=sys.stderr)
+
+
+def run_layout(layout: str, size: int, projects: int, repeat: int) -> dict:
+    """Fills a fresh store with `size` notes in `layout` and times its operations."""
+    mode, _, shard_count = layout.partition(":")
+    os.environ["NOTIA_SHARDING"] = "" if mode == "single" else mode
+    os.environ["NOTIA_SHARD_COUNT"] = shard_count or "16"
+
+    from models import Note
+    from vector_store import VectorStore
+
+    store = VectorStore(path=tempfile.mkdtemp(prefix=f"notia-shards-{size}-"))
+    notes = [
+        Note(
+            content=note["content"],
+            project=note["project"],
+            timestamp=datetime.datetime.fromisoformat(note["timestamp"]),
+            id=note["id"],
+        )
+        for note in generate_notes(size, projects)
+    ]
+
+    results = {}
+    start = time.perf_counter()
+    store.add_notes(notes)
+    elapsed = time.perf_counter() - start
+    results["ingest"] = {"seconds": elapsed, "notes_per_second": size / elapsed}
+    print(f"    {'ingest':<22} {size / elapsed:9.0f} notes/s", file=sys.stderr)
+    shards = getattr(store.collection, "shards", None)
+    results["shards"] = len(shards) if shards is not None else 1
+
+    queries = sample_queries(repeat)
+    embeddings = store.embedding_function(queries)
+    names = [name for name in project_names(projects) if store.count_notes(name)]
+    timed(
+        results,
+        "search.global",
+        lambda i: store.search_notes(queries[i], 10, query_embedding=embeddings[i]),
+        repeat,
+    )
+    timed(
+        results,
+        "search.project",
+        lambda i: store.search_notes(
+            queries[i],
+            10,
+            query_embedding=embeddings[i],
+            where={"project": names[i % len(names)]},
+        ),
+        repeat,
+    )
+    timed(results, "get_note", lambda i: store.get_note(notes[i * 7 % size].id), repeat)
+    timed(
+        results,
+        "notes_by_project",
+        lambda i: store.get_notes_by_project(names[-1 - i % len(names)]),
+        repeat,
+    )
+    store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000", help="Comma-separated corpus sizes.")
+    parser.add_argument(
+        "--layouts",
+        default="single,project,hash:16",
+        help="Comma-separated layouts: single, project or hash:N.",
+    )
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50, help="Samples per timed operation.")
+    parser.add_argument("-o", "--output", default="dist/sharding.json")
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    os.environ["OPENAI_API_BASE"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "projects": args.projects,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    for size in [int(size) for size in args.sizes.split(",")]:
+        print(f"{size} notes:", file=sys.stderr)
+        report["results"][str(size)] = {}
+        for layout in args.layouts.split(","):
+            print(f"  {layout}:", file=sys.stderr)
+            report["results"][str(size)][layout] = run_layout(
+                layout, size, args.projects, args.repeat
+            )
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
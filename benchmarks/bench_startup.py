@@ -0,0 +1,82 @@
+"""
+Measures Notia's CLI startup: module import time and time until the prompt is shown.
+
+Each measurement runs in a fresh interpreter. Use `--max-prompt-ms` to fail
+(exit code 1) when the time-to-prompt regresses past a threshold.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import main
+print((time.perf_counter() - start) * 1000)
+"""
+
+PROMPT_SNIPPET = """
+import asyncio, os, time
+import main
+
+class FirstPrompt:
+    async def prompt_async(self, *args, **kwargs):
+        print((time.time() - float(os.environ["NOTIA_BENCH_START"])) * 1000)
+        raise EOFError
+
+main.PromptSession = FirstPrompt
+main.console.quiet = True
+asyncio.run(main.main())
+"""
+
+
+def run_snippet(snippet: str, workdir: str) -> float:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.path.abspath(SRC),
+        "NOTIA_BENCH_START": repr(time.time()),
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "bench"),
+        "OPENAI_API_BASE": os.environ.get("OPENAI_API_BASE", "http://127.0.0.1:9"),
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-prompt-ms", type=float, help="Fail if the median time-to-prompt exceeds this")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="notia-bench-")
+    import_ms = [run_snippet(IMPORT_SNIPPET, workdir) for _ in range(args.runs)]
+    prompt_ms = [run_snippet(PROMPT_SNIPPET, workdir) for _ in range(args.runs)]
+
+    results = {
+        "import_main_ms": statistics.median(import_ms),
+        "time_to_prompt_ms": statistics.median(prompt_ms),
+    }
+    print(json.dumps(results, indent=2))
+
+    if args.max_prompt_ms is not None and results["time_to_prompt_ms"] > args.max_prompt_ms:
+        print(f"Time-to-prompt regressed past {args.max_prompt_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+End-to-end benchmark of the vector store and the agent tools on synthetic corpora.
+
+For each corpus size, a fresh store is filled in its own process against the
+local stub server (deterministic embeddings, injected latency), then the
+`VectorStore` methods and the tool functions are timed. Results are written as
+JSON so runs can be compared:
+
+    python benchmarks/bench_suite.py --sizes 1000,10000 --latency-ms 5 -o dist/bench.json
+
+Requires the Rust module to be built (`cd rust_analyzer && maturin develop -r`).
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC = os.path.join(BENCH_DIR, "..", "src")
+sys.path.insert(0, SRC)
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import generate_notes, sample_queries, write_csv
+from stub_server import start_stub_server
+
+
+def summarize(samples: list[float]) -> dict:
+    samples = sorted(samples)
+    return {
+        "n": len(samples),
+        "mean_ms": statistics.mean(samples),
+        "p50_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "min_ms": samples[0],
+        "max_ms": samples[-1],
+    }
+
+
+def timed(results: dict, name: str, function, repeat: int = 1):
+    """Calls `function` `repeat` times and records its latency under `name`."""
+    samples = []
+    value = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        value = function(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    results[name] = summarize(samples)
+    print(f"  {name:<40} p50={results[name]['p50_ms']:10.2f} ms  n={repeat}", file=sys.stderr)
+    return value
+
+
+async def invoke_tool(tool, **arguments):
+    """Calls an agent tool the way the agent runner does, with JSON arguments."""
+    from agents.tool_context import ToolContext
+
+    payload = json.dumps(arguments)
+    context = ToolContext(
+        context=None, tool_name=tool.name, tool_call_id="bench", tool_arguments=payload
+    )
+    return await tool.on_invoke_tool(context, payload)
+
+
+def run_size(size: int, projects: int, repeat: int) -> dict:
+    """Fills a fresh store with `size` notes and times its operations, in this process."""
+    os.chdir(tempfile.mkdtemp(prefix=f"notia-bench-{size}-"))
+    from models import Note
+
+    import console
+    import tools
+    from store import get_vector_store
+
+    console.console.quiet = True
+    loop = asyncio.new_event_loop()
+
+    def tool(name: str, **arguments):
+        return lambda i: loop.run_until_complete(invoke_tool(getattr(tools, name), **arguments))
+
+    results = {}
+    corpus_path = write_csv("corpus.csv", size, projects)
+    store = timed(results, "vector_store.open", lambda i: get_vector_store())
+    timed(
+        results,
+        "tool.import_notes_from_csv",
+        tool("import_notes_from_csv", filepath=corpus_path),
+    )
+
+    extra = [
+        Note(content=note["content"], project=note["project"])
+        for note in generate_notes(500, projects, seed=size + 1)
+    ]
+    timed(results, "vector_store.add_notes[500]", lambda i: store.add_notes(extra))
+    timed(
+        results,
+        "vector_store.add_note",
+        lambda i: store.add_note(Note(content=f"benchmark note {i} about cache latency")),
+        repeat,
+    )
+    timed(
+        results,
+        "tool.add_note",
+        tool("add_note", content="benchmark note about shard replicas", check_duplicates=False),
+        repeat,
+    )
+
+    queries = sample_queries(repeat)
+    for method in ("search_notes", "lexical_search", "hybrid_search"):
+        search = getattr(store, method)
+        timed(results, f"vector_store.{method}", lambda i: search(queries[i], 10), repeat)
+    timed(
+        results,
+        "tool.search_notes",
+        lambda i: loop.run_until_complete(invoke_tool(tools.search_notes, query=queries[i])),
+        repeat,
+    )
+
+    note_id = extra[0].id
+    timed(results, "vector_store.get_note", lambda i: store.get_note(note_id), repeat)
+    timed(results, "vector_store.count_notes", lambda i: store.count_notes(), repeat)
+    timed(results, "vector_store.get_all_projects", lambda i: store.get_all_projects(), repeat)
+    timed(results, "vector_store.iter_notes[all]", lambda i: sum(1 for _ in store.iter_notes()))
+    timed(results, "vector_store.get_top_keywords", lambda i: store.get_top_keywords(10), repeat)
+    timed(results, "tool.list_all_projects", tool("list_all_projects"), repeat)
+    timed(results, "tool.extract_top_keywords", tool("extract_top_keywords", top_n=10), repeat)
+    timed(results, "tool.analyze_all_notes", tool("analyze_all_notes"))
+
+    loop.run_until_complete(store.aclose())
+    loop.close()
+    store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", default="1000", help="Comma-separated corpus sizes, e.g. 1000,10000,100000."
+    )
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20, help="Samples per timed operation.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency of the stub server.")
+    parser.add_argument("--base-url", help="Use this provider instead of the local stub server.")
+    parser.add_argument("-o", "--output", default="dist/bench.json")
+    parser.add_argument("--run-size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_size:
+        # Child process: measure one size and print the results
+        print(json.dumps(run_size(args.run_size, args.projects, args.repeat)))
+        return
+
+    base_url = args.base_url
+    if base_url is None:
+        server = start_stub_server(latency_ms=args.latency_ms)
+        base_url = f"http://127.0.0.1:{server.server_port}"
+    env = {
+        **os.environ,
+        "OPENAI_API_BASE": base_url,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "bench"),
+    }
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "base_url": base_url if args.base_url else "stub",
+            "latency_ms": args.latency_ms,
+            "projects": args.projects,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    for size in [int(size) for size in args.sizes.split(",")]:
+        print(f"{size} notes:", file=sys.stderr)
+        output = subprocess.run(
+            [
+                sys.executable,
+                os.path.abspath(__file__),
+                "--run-size",
+                str(size),
+                "--projects",
+                str(args.projects),
+                "--repeat",
+                str(args.repeat),
+            ],
+            env=env,
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        ).stdout
+        report["results"][str(size)] = json.loads(output.strip().splitlines()[-1])
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
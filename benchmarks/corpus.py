@@ -0,0 +1,116 @@
+"""
+Synthetic note corpora for the benchmarks.
+
+Notes are spread over many projects with a skewed distribution, and mix short
+notes, medium notes and long notes that are embedded by chunks. The same seed
+always produces the same corpus.
+
+Run `python benchmarks/corpus.py --notes 10000 -o dist/corpus.csv` to write a CSV
+that `import_notes_from_csv` can load.
+"""
+
+import argparse
+import csv
+import datetime
+import os
+import random
+import uuid
+from typing import Iterator
+
+WORDS = (
+    "refactor authentication module jwt token database migration cache latency "
+    "deploy kubernetes cluster pipeline release bug fix regression test coverage "
+    "api endpoint schema validation logging metrics alert dashboard queue worker "
+    "retry timeout backoff index query vector embedding search rerank prompt agent "
+    "session memory streaming parser tokenizer benchmark profile allocation thread "
+    "async await lock contention shard replica backup restore snapshot export csv"
+).split()
+
+IDENTIFIERS = ("ERR_TIMEOUT", "PROJ-1234", "OAuth2", "HTTP 503", "v2.4.1", "user_id", "SIGTERM")
+
+# Share of short, medium and long notes, and their length range in words
+LENGTHS = ((0.6, 8, 50), (0.3, 50, 250), (0.1, 400, 1500))
+
+START = datetime.datetime(2024, 1, 1)
+
+
+def project_names(count: int) -> list[str]:
+    """Returns `count` distinct project names."""
+    return [f"project-{i:03d}" for i in range(count)]
+
+
+def generate_notes(count: int, projects: int = 50, seed: int = 0) -> Iterator[dict]:
+    """
+    Lazily generates synthetic notes.
+
+    Args:
+        count (int): The number of notes.
+        projects (int): The number of projects the notes are spread over.
+        seed (int): The random seed.
+
+    Yields:
+        dict: A note with `id`, `content`, `project` and `timestamp` keys.
+    """
+    rng = random.Random(seed)
+    names = project_names(projects)
+    # Zipf-like weights, a few projects hold most notes
+    weights = [1 / (rank + 1) for rank in range(projects)]
+    for i in range(count):
+        share = rng.random()
+        for probability, low, high in LENGTHS:
+            if share < probability:
+                break
+            share -= probability
+        words = [rng.choice(WORDS) for _ in range(rng.randint(low, high))]
+        if rng.random() < 0.2:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(IDENTIFIERS))
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "content": " ".join(words),
+            "project": rng.choices(names, weights)[0] if rng.random() > 0.05 else "",
+            "timestamp": (START + datetime.timedelta(minutes=37 * i)).isoformat(),
+        }
+
+
+def write_csv(path: str, count: int, projects: int = 50, seed: int = 0) -> str:
+    """
+    Writes a synthetic corpus as a CSV file readable by `import_notes_from_csv`.
+
+    Args:
+        path (str): The file to write.
+        count (int): The number of notes.
+        projects (int): The number of projects.
+        seed (int): The random seed.
+
+    Returns:
+        str: The path written.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ID", "Content", "Project", "Timestamp"])
+        for note in generate_notes(count, projects, seed):
+            writer.writerow([note["id"], note["content"], note["project"], note["timestamp"]])
+    return path
+
+
+def sample_queries(count: int, seed: int = 1) -> list[str]:
+    """Returns search queries mixing topic words and exact identifiers."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        if rng.random() < 0.2:
+            queries.append(rng.choice(IDENTIFIERS))
+        else:
+            queries.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))))
+    return queries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--notes", type=int, default=1000)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="dist/corpus.csv")
+    args = parser.parse_args()
+    print(write_csv(args.output, args.notes, args.projects, args.seed))
@@ -0,0 +1,97 @@
+"""
+Load test of the Notia API server with many concurrent clients.
+
+Start the server with `notia serve`, then run
+`python benchmarks/load_test_server.py --clients 50 --requests 1000`.
+Each client adds notes and searches them in a loop; the script reports the
+throughput and latency percentiles of each endpoint, and the number of errors.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+
+TOPICS = ["authentication", "database", "deployment", "caching", "logging", "testing"]
+
+
+def percentile(samples: list[float], share: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * share))]
+
+
+async def client_loop(
+    client: httpx.AsyncClient,
+    client_id: int,
+    requests: int,
+    write_ratio: float,
+    latencies: dict[str, list[float]],
+    errors: dict[str, int],
+):
+    rng = random.Random(client_id)
+    for i in range(requests):
+        topic = rng.choice(TOPICS)
+        if rng.random() < write_ratio:
+            name = "POST /notes"
+            call = client.post(
+                "/notes",
+                json={
+                    "content": f"Load test note {client_id}-{i} about {topic}, {rng.random()}",
+                    "project": f"load-test-{topic}",
+                    "check_duplicates": False,
+                },
+            )
+        else:
+            name = "POST /search"
+            call = client.post("/search", json={"query": f"notes about {topic}", "n_results": 5})
+
+        start = time.perf_counter()
+        try:
+            response = await call
+            response.raise_for_status()
+        except httpx.HTTPError:
+            errors[name] += 1
+            continue
+        latencies[name].append((time.perf_counter() - start) * 1000)
+
+
+async def run(url: str, clients: int, requests: int, write_ratio: float):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        (await client.get("/health")).raise_for_status()
+        per_client = max(1, requests // clients)
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                client_loop(client, i, per_client, write_ratio, latencies, errors)
+                for i in range(clients)
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"{total} requests in {elapsed:.2f} s, {total / elapsed:.1f} req/s with {clients} clients")
+    for name, samples in sorted(latencies.items()):
+        print(
+            f"{name:<14} n={len(samples):<6} p50={statistics.median(samples):8.1f} ms  "
+            f"p95={percentile(samples, 0.95):8.1f} ms  p99={percentile(samples, 0.99):8.1f} ms  "
+            f"errors={errors[name]}"
+        )
+    for name in errors.keys() - latencies.keys():
+        print(f"{name:<14} all {errors[name]} requests failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:8642")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500, help="Total number of requests.")
+    parser.add_argument("--write-ratio", type=float, default=0.3, help="Share of additions.")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.clients, args.requests, args.write_ratio))
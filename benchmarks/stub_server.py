@@ -0,0 +1,149 @@
+"""
+Local stand-in for the OpenAI-compatible endpoints used by Notia.
+
+It serves `/embeddings` with deterministic vectors, and `/rerank` by term overlap.
+Run it with `python benchmarks/stub_server.py --port 8765 --latency-ms 20` and point
+`OPENAI_API_BASE` to `http://127.0.0.1:8765`.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def _tokens(text: str) -> set[str]:
+    return {token for token in text.lower().split() if token}
+
+
+def stub_embedding(text: str, dimension: int = 256) -> np.ndarray:
+    """
+    Returns a deterministic unit vector for a text.
+
+    Each word adds a signed unit to a dimension picked by its hash, so texts
+    sharing words get close vectors, like a (very) crude embedding model.
+
+    Args:
+        text (str): The text to embed.
+        dimension (int): The size of the vector.
+
+    Returns:
+        np.ndarray: The float32 vector.
+    """
+    vector = np.zeros(dimension, dtype=np.float32)
+    for token in text.lower().split():
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        vector[value % dimension] += 1.0 if value >> 63 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        vector[0] = 1.0
+        return vector
+    return vector / norm
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves deterministic responses after an injected latency."""
+
+    protocol_version = "HTTP/1.1"
+    latency_ms = 0.0
+    dimension = 256
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        if self.path.rstrip("/").endswith("/embeddings"):
+            texts = payload.get("input", [])
+            if isinstance(texts, str):
+                texts = [texts]
+            data = []
+            for index, text in enumerate(texts):
+                vector = stub_embedding(str(text), self.dimension)
+                if payload.get("encoding_format") == "base64":
+                    embedding = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+                else:
+                    embedding = vector.tolist()
+                data.append({"object": "embedding", "index": index, "embedding": embedding})
+            tokens = sum(len(str(text).split()) for text in texts)
+            self._send_json(
+                200,
+                {
+                    "object": "list",
+                    "data": data,
+                    "model": payload.get("model", "stub"),
+                    "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+                },
+            )
+        elif self.path.rstrip("/").endswith("/rerank"):
+            query = _tokens(payload.get("query", ""))
+            results = []
+            for index, document in enumerate(payload.get("documents", [])):
+                overlap = len(query & _tokens(document))
+                results.append(
+                    {"index": index, "relevance_score": overlap / (len(query) or 1)}
+                )
+            results.sort(key=lambda r: r["relevance_score"], reverse=True)
+            self._send_json(200, {"results": results})
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+
+def start_stub_server(
+    host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0, dimension: int = 256
+) -> ThreadingHTTPServer:
+    """
+    Starts the stub server in a daemon thread.
+
+    Args:
+        host (str): The interface to bind.
+        port (int): The port to bind, 0 picks a free one.
+        latency_ms (float): Latency injected before every response.
+        dimension (int): The size of the embedding vectors.
+
+    Returns:
+        ThreadingHTTPServer: The running server; its base URL is `http://host:server_port`.
+    """
+    handler = type(
+        "ConfiguredStubHandler",
+        (StubHandler,),
+        {"latency_ms": latency_ms, "dimension": dimension},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--dimension", type=int, default=256)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.host, args.port, args.latency_ms, args.dimension)
+    print(f"Stub server listening on http://{args.host}:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,7 +1,13 @@
 use pyo3::prelude::*;
+use pyo3::types::PyDict;
+use rayon::prelude::*;
 use regex::Regex;
-use serde::Deserialize;
-use std::collections::{HashMap, HashSet};
+use serde::{Deserialize, Serialize};
+use std::cmp::Reverse;
+use std::collections::{BTreeSet, BinaryHeap, HashMap, HashSet};
+use std::sync::{PoisonError, RwLock, RwLockReadGuard, RwLockWriteGuard};
+use std::fs::File;
+use std::io::{BufReader, BufWriter};
 
 mod stop_words;
 
@@ -12,11 +18,854 @@ struct Note {
     project: String,
 }
 
+fn value_error(message: String) -> PyErr {
+    PyErr::new::<pyo3::exceptions::PyValueError, _>(message)
+}
+
+fn io_error(message: String) -> PyErr {
+    PyErr::new::<pyo3::exceptions::PyIOError, _>(message)
+}
+
+fn parse_notes(notes_json: &str) -> PyResult<Vec<Note>> {
+    serde_json::from_str(notes_json).map_err(|e| value_error(format!("Failed to parse JSON: {}", e)))
+}
+
+/// Splits note content into lowercase keywords, without contractions,
+/// punctuation, stop words and single-character words.
+struct Tokenizer {
+    cleanup_re: Regex,
+    contraction_re: Regex,
+    stop_words: HashSet<&'static str>,
+}
+
+impl Tokenizer {
+    fn new() -> PyResult<Self> {
+        let compile = |pattern: &str| {
+            Regex::new(pattern).map_err(|e| value_error(format!("Failed to compile regex: {}", e)))
+        };
+        Ok(Tokenizer {
+            cleanup_re: compile(r"[^a-zA-ZÀ-ÿ\s]")?,
+            contraction_re: compile(r"\b[dlcjntsqu]'")?,
+            stop_words: stop_words::STOP_WORDS.iter().cloned().collect(),
+        })
+    }
+
+    fn tokenize(&self, content: &str) -> Vec<String> {
+        let lowercased_content = content.to_lowercase();
+        let without_contractions = self.contraction_re.replace_all(&lowercased_content, "");
+        let cleaned_content = self.cleanup_re.replace_all(&without_contractions, "");
+        cleaned_content
+            .split_whitespace()
+            // Ignore single-character words
+            .filter(|word| !self.stop_words.contains(word) && word.len() > 1)
+            .map(str::to_string)
+            .collect()
+    }
+
+    /// Counts keywords over all contents, in parallel.
+    fn count_keywords<S: AsRef<str> + Sync>(&self, contents: &[S]) -> HashMap<String, usize> {
+        contents
+            .par_iter()
+            .fold(HashMap::new, |mut counts: HashMap<String, usize>, content| {
+                for word in self.tokenize(content.as_ref()) {
+                    *counts.entry(word).or_insert(0) += 1;
+                }
+                counts
+            })
+            .reduce(HashMap::new, |mut left, right| {
+                for (word, count) in right {
+                    *left.entry(word).or_insert(0) += count;
+                }
+                left
+            })
+    }
+}
+
+/// Returns the `top_n` most frequent keywords, by descending count then word.
+fn top_keywords_of(word_counts: HashMap<String, usize>, top_n: usize) -> Vec<(String, usize)> {
+    let mut sorted_keywords: Vec<(String, usize)> = word_counts.into_iter().collect();
+    sorted_keywords.sort_unstable_by(|a, b| b.1.cmp(&a.1).then_with(|| a.0.cmp(&b.0)));
+    sorted_keywords.truncate(top_n);
+    sorted_keywords
+}
+
+/// Reusable analyzer holding the compiled regexes and the stop-word set.
+///
+/// Methods take Python lists of strings directly, release the GIL and
+/// process the notes in parallel.
+#[pyclass(frozen)]
+struct Analyzer {
+    tokenizer: Tokenizer,
+}
+
+#[pymethods]
+impl Analyzer {
+    #[new]
+    fn new() -> PyResult<Self> {
+        Ok(Analyzer {
+            tokenizer: Tokenizer::new()?,
+        })
+    }
+
+    /// Returns a dict with the number of notes, the total word count and the
+    /// sorted list of unique non-empty projects.
+    fn analyze<'py>(
+        &self,
+        py: Python<'py>,
+        contents: Vec<String>,
+        projects: Vec<String>,
+    ) -> PyResult<Bound<'py, PyDict>> {
+        let (total_words, unique_projects) = py.allow_threads(|| {
+            let total_words: usize = contents
+                .par_iter()
+                .map(|content| content.split_whitespace().count())
+                .sum();
+            let unique_projects: BTreeSet<&String> =
+                projects.iter().filter(|project| !project.is_empty()).collect();
+            let unique_projects: Vec<String> = unique_projects.into_iter().cloned().collect();
+            (total_words, unique_projects)
+        });
+
+        let result = PyDict::new(py);
+        result.set_item("notes", contents.len())?;
+        result.set_item("words", total_words)?;
+        result.set_item("projects", unique_projects)?;
+        Ok(result)
+    }
+
+    /// Returns the keywords of a single text, in order.
+    fn tokenize(&self, content: &str) -> Vec<String> {
+        self.tokenizer.tokenize(content)
+    }
+
+    /// Returns the count of every keyword over all contents.
+    fn keyword_counts(&self, py: Python<'_>, contents: Vec<String>) -> HashMap<String, usize> {
+        py.allow_threads(|| self.tokenizer.count_keywords(&contents))
+    }
+
+    /// Returns the `top_n` most frequent keywords as (keyword, count) tuples.
+    fn top_keywords(
+        &self,
+        py: Python<'_>,
+        contents: Vec<String>,
+        top_n: usize,
+    ) -> Vec<(String, usize)> {
+        py.allow_threads(|| top_keywords_of(self.tokenizer.count_keywords(&contents), top_n))
+    }
+}
+
+/// Keywords of a single note, as stored by the keyword index.
+#[derive(Serialize, Deserialize, Debug)]
+struct IndexedNote {
+    project: String,
+    timestamp: f64,
+    terms: HashMap<String, u32>,
+}
+
+impl IndexedNote {
+    fn new(tokenizer: &Tokenizer, project: String, timestamp: f64, content: &str) -> Self {
+        let mut terms = HashMap::new();
+        for word in tokenizer.tokenize(content) {
+            *terms.entry(word).or_insert(0) += 1;
+        }
+        IndexedNote {
+            project,
+            timestamp,
+            terms,
+        }
+    }
+}
+
+/// Term counts and document frequencies of a set of notes, with the terms
+/// kept ordered by descending count so that top-N queries are O(N).
+#[derive(Default)]
+struct TermStats {
+    counts: HashMap<String, u64>,
+    doc_freqs: HashMap<String, u64>,
+    ranked: BTreeSet<(Reverse<u64>, String)>,
+}
+
+impl TermStats {
+    fn apply(&mut self, terms: &HashMap<String, u32>, removing: bool) {
+        for (term, &count) in terms {
+            let old = self.counts.get(term).copied().unwrap_or(0);
+            let new = if removing {
+                old.saturating_sub(count as u64)
+            } else {
+                old + count as u64
+            };
+            if old > 0 {
+                self.ranked.remove(&(Reverse(old), term.clone()));
+            }
+            if new > 0 {
+                self.counts.insert(term.clone(), new);
+                self.ranked.insert((Reverse(new), term.clone()));
+            } else {
+                self.counts.remove(term);
+            }
+
+            let doc_freq = self.doc_freqs.entry(term.clone()).or_insert(0);
+            if removing {
+                *doc_freq = doc_freq.saturating_sub(1);
+            } else {
+                *doc_freq += 1;
+            }
+            if *doc_freq == 0 {
+                self.doc_freqs.remove(term);
+            }
+        }
+    }
+
+    fn top(&self, top_n: usize) -> Vec<(String, u64, u64)> {
+        self.ranked
+            .iter()
+            .take(top_n)
+            .map(|(Reverse(count), term)| (term.clone(), *count, self.doc_freqs[term]))
+            .collect()
+    }
+
+    fn is_empty(&self) -> bool {
+        self.counts.is_empty()
+    }
+}
+
+/// Keywords of all notes with their global and per-project statistics.
+#[derive(Default)]
+struct KeywordState {
+    notes: HashMap<String, IndexedNote>,
+    global: TermStats,
+    projects: HashMap<String, TermStats>,
+}
+
+impl KeywordState {
+    fn insert(&mut self, note_id: String, note: IndexedNote) {
+        self.remove_note(&note_id);
+        self.global.apply(&note.terms, false);
+        self.projects
+            .entry(note.project.clone())
+            .or_default()
+            .apply(&note.terms, false);
+        self.notes.insert(note_id, note);
+    }
+
+    fn remove_note(&mut self, note_id: &str) -> bool {
+        let Some(note) = self.notes.remove(note_id) else {
+            return false;
+        };
+        self.global.apply(&note.terms, true);
+        if let Some(stats) = self.projects.get_mut(&note.project) {
+            stats.apply(&note.terms, true);
+            if stats.is_empty() {
+                self.projects.remove(&note.project);
+            }
+        }
+        true
+    }
+}
+
+/// Persistent keyword statistics over all notes, maintained incrementally.
+///
+/// Every note's keywords are kept, so an edit or a deletion removes exactly
+/// the old keywords before adding the new ones, without a rebuild.
+///
+/// The index can be shared between threads: queries run concurrently and
+/// updates are exclusive. The lock is only taken with the GIL released.
+#[pyclass(frozen)]
+struct KeywordIndex {
+    tokenizer: Tokenizer,
+    state: RwLock<KeywordState>,
+}
+
+impl KeywordIndex {
+    fn empty() -> PyResult<Self> {
+        Ok(KeywordIndex {
+            tokenizer: Tokenizer::new()?,
+            state: RwLock::default(),
+        })
+    }
+
+    fn read(&self) -> RwLockReadGuard<'_, KeywordState> {
+        self.state.read().unwrap_or_else(PoisonError::into_inner)
+    }
+
+    fn write(&self) -> RwLockWriteGuard<'_, KeywordState> {
+        self.state.write().unwrap_or_else(PoisonError::into_inner)
+    }
+}
+
+#[pymethods]
+impl KeywordIndex {
+    #[new]
+    fn new() -> PyResult<Self> {
+        KeywordIndex::empty()
+    }
+
+    /// Adds or replaces a note. `timestamp` is in seconds since the epoch.
+    fn upsert(
+        &self,
+        py: Python<'_>,
+        note_id: String,
+        project: String,
+        timestamp: f64,
+        content: &str,
+    ) {
+        let note = IndexedNote::new(&self.tokenizer, project, timestamp, content);
+        py.allow_threads(|| self.write().insert(note_id, note));
+    }
+
+    /// Adds or replaces many notes, tokenizing them in parallel without the GIL.
+    fn upsert_many(
+        &self,
+        py: Python<'_>,
+        note_ids: Vec<String>,
+        projects: Vec<String>,
+        timestamps: Vec<f64>,
+        contents: Vec<String>,
+    ) -> PyResult<()> {
+        if note_ids.len() != projects.len()
+            || note_ids.len() != timestamps.len()
+            || note_ids.len() != contents.len()
+        {
+            return Err(value_error("All arguments must have the same length".to_string()));
+        }
+        py.allow_threads(|| {
+            let notes: Vec<IndexedNote> = projects
+                .into_par_iter()
+                .zip(timestamps)
+                .zip(contents.par_iter())
+                .map(|((project, timestamp), content)| {
+                    IndexedNote::new(&self.tokenizer, project, timestamp, content)
+                })
+                .collect();
+            let mut state = self.write();
+            for (note_id, note) in note_ids.into_iter().zip(notes) {
+                state.insert(note_id, note);
+            }
+        });
+        Ok(())
+    }
+
+    /// Removes a note. Returns whether it was indexed.
+    fn remove(&self, py: Python<'_>, note_id: &str) -> bool {
+        py.allow_threads(|| self.write().remove_note(note_id))
+    }
+
+    /// Removes every note.
+    fn clear(&self, py: Python<'_>) {
+        py.allow_threads(|| *self.write() = KeywordState::default());
+    }
+
+    fn __len__(&self, py: Python<'_>) -> usize {
+        py.allow_threads(|| self.read().notes.len())
+    }
+
+    /// Returns the `top_n` keywords as (keyword, count, document frequency)
+    /// tuples, optionally restricted to a project and a [since, until] window
+    /// of timestamps.
+    #[pyo3(signature = (top_n, project=None, since=None, until=None))]
+    fn top_keywords(
+        &self,
+        py: Python<'_>,
+        top_n: usize,
+        project: Option<String>,
+        since: Option<f64>,
+        until: Option<f64>,
+    ) -> Vec<(String, u64, u64)> {
+        py.allow_threads(|| {
+            let state = self.read();
+            if since.is_none() && until.is_none() {
+                return match project {
+                    None => state.global.top(top_n),
+                    Some(project) => state
+                        .projects
+                        .get(&project)
+                        .map(|stats| stats.top(top_n))
+                        .unwrap_or_default(),
+                };
+            }
+
+            let since = since.unwrap_or(f64::NEG_INFINITY);
+            let until = until.unwrap_or(f64::INFINITY);
+            let mut window = TermStats::default();
+            for note in state.notes.values() {
+                let in_project = project.as_ref().map_or(true, |p| *p == note.project);
+                if in_project && note.timestamp >= since && note.timestamp <= until {
+                    for (term, &count) in &note.terms {
+                        *window.counts.entry(term.clone()).or_insert(0) += count as u64;
+                        *window.doc_freqs.entry(term.clone()).or_insert(0) += 1;
+                    }
+                }
+            }
+
+            let mut heap = BinaryHeap::with_capacity(top_n + 1);
+            for (term, &count) in &window.counts {
+                heap.push(Reverse((count, Reverse(term))));
+                if heap.len() > top_n {
+                    heap.pop();
+                }
+            }
+            heap.into_sorted_vec()
+                .into_iter()
+                .map(|Reverse((count, Reverse(term)))| {
+                    (term.clone(), count, window.doc_freqs[term])
+                })
+                .collect()
+        })
+    }
+
+    /// Writes the index to a file.
+    fn save(&self, py: Python<'_>, path: &str) -> PyResult<()> {
+        py.allow_threads(|| {
+            let file = File::create(path).map_err(|e| io_error(format!("Failed to create {}: {}", path, e)))?;
+            serde_json::to_writer(BufWriter::new(file), &self.read().notes)
+                .map_err(|e| io_error(format!("Failed to write {}: {}", path, e)))
+        })
+    }
+
+    /// Reads an index written by `save`.
+    #[staticmethod]
+    fn load(path: &str) -> PyResult<Self> {
+        let file = File::open(path).map_err(|e| io_error(format!("Failed to open {}: {}", path, e)))?;
+        let notes: HashMap<String, IndexedNote> = serde_json::from_reader(BufReader::new(file))
+            .map_err(|e| value_error(format!("Failed to parse {}: {}", path, e)))?;
+        let mut index = KeywordIndex::empty()?;
+        let state = index.state.get_mut().unwrap_or_else(PoisonError::into_inner);
+        for (note_id, note) in notes {
+            state.insert(note_id, note);
+        }
+        Ok(index)
+    }
+}
+
+/// Documents of a BM25 index with their postings. Documents are numbered by
+/// slot, and the slots of removed documents are reused.
+#[derive(Default)]
+struct Bm25State {
+    slots: HashMap<String, u32>,
+    ids: Vec<Option<String>>,
+    free_slots: Vec<u32>,
+    doc_terms: Vec<HashMap<String, u32>>,
+    doc_lens: Vec<u32>,
+    total_len: u64,
+    postings: HashMap<String, HashMap<u32, u32>>,
+}
+
+impl Bm25State {
+    fn insert(&mut self, doc_id: String, terms: HashMap<String, u32>) {
+        self.remove_doc(&doc_id);
+        let slot = match self.free_slots.pop() {
+            Some(slot) => slot,
+            None => {
+                self.ids.push(None);
+                self.doc_terms.push(HashMap::new());
+                self.doc_lens.push(0);
+                (self.ids.len() - 1) as u32
+            }
+        };
+        let doc_len: u32 = terms.values().sum();
+        for (term, &tf) in &terms {
+            self.postings.entry(term.clone()).or_default().insert(slot, tf);
+        }
+        self.total_len += doc_len as u64;
+        self.doc_lens[slot as usize] = doc_len;
+        self.doc_terms[slot as usize] = terms;
+        self.ids[slot as usize] = Some(doc_id.clone());
+        self.slots.insert(doc_id, slot);
+    }
+
+    fn remove_doc(&mut self, doc_id: &str) -> bool {
+        let Some(slot) = self.slots.remove(doc_id) else {
+            return false;
+        };
+        let terms = std::mem::take(&mut self.doc_terms[slot as usize]);
+        for term in terms.keys() {
+            if let Some(docs) = self.postings.get_mut(term) {
+                docs.remove(&slot);
+                if docs.is_empty() {
+                    self.postings.remove(term);
+                }
+            }
+        }
+        self.total_len -= self.doc_lens[slot as usize] as u64;
+        self.doc_lens[slot as usize] = 0;
+        self.ids[slot as usize] = None;
+        self.free_slots.push(slot);
+        true
+    }
+}
+
+/// Okapi BM25 inverted index over note content, maintained incrementally.
+///
+/// Tokens keep digits and underscores, and compound identifiers such as
+/// `auth-backend`, `JIRA-1234` or `os.path` are indexed both whole and by part,
+/// so exact identifiers and error strings can be found.
+///
+/// The index can be shared between threads: searches run concurrently and
+/// updates are exclusive. The lock is only taken with the GIL released.
+#[pyclass(frozen)]
+struct Bm25Index {
+    word_re: Regex,
+    compound_re: Regex,
+    k1: f64,
+    b: f64,
+    state: RwLock<Bm25State>,
+}
+
+impl Bm25Index {
+    fn empty(k1: f64, b: f64) -> PyResult<Self> {
+        let compile = |pattern: &str| {
+            Regex::new(pattern).map_err(|e| value_error(format!("Failed to compile regex: {}", e)))
+        };
+        Ok(Bm25Index {
+            word_re: compile(r"[\p{L}\p{N}_]+")?,
+            compound_re: compile(r"[\p{L}\p{N}_]+(?:[-.:/#@][\p{L}\p{N}_]+)+")?,
+            k1,
+            b,
+            state: RwLock::default(),
+        })
+    }
+
+    fn read(&self) -> RwLockReadGuard<'_, Bm25State> {
+        self.state.read().unwrap_or_else(PoisonError::into_inner)
+    }
+
+    fn write(&self) -> RwLockWriteGuard<'_, Bm25State> {
+        self.state.write().unwrap_or_else(PoisonError::into_inner)
+    }
+
+    fn terms(&self, content: &str) -> HashMap<String, u32> {
+        let lowercased_content = content.to_lowercase();
+        let mut terms = HashMap::new();
+        for word in self.word_re.find_iter(&lowercased_content) {
+            *terms.entry(word.as_str().to_string()).or_insert(0) += 1;
+        }
+        for compound in self.compound_re.find_iter(&lowercased_content) {
+            *terms.entry(compound.as_str().to_string()).or_insert(0) += 1;
+        }
+        terms
+    }
+}
+
+#[pymethods]
+impl Bm25Index {
+    #[new]
+    #[pyo3(signature = (k1=1.2, b=0.75))]
+    fn new(k1: f64, b: f64) -> PyResult<Self> {
+        Bm25Index::empty(k1, b)
+    }
+
+    /// Adds or replaces many documents, tokenizing them in parallel without the GIL.
+    fn upsert_many(
+        &self,
+        py: Python<'_>,
+        doc_ids: Vec<String>,
+        contents: Vec<String>,
+    ) -> PyResult<()> {
+        if doc_ids.len() != contents.len() {
+            return Err(value_error("All arguments must have the same length".to_string()));
+        }
+        py.allow_threads(|| {
+            let terms: Vec<HashMap<String, u32>> =
+                contents.par_iter().map(|content| self.terms(content)).collect();
+            let mut state = self.write();
+            for (doc_id, doc_terms) in doc_ids.into_iter().zip(terms) {
+                state.insert(doc_id, doc_terms);
+            }
+        });
+        Ok(())
+    }
+
+    /// Removes a document. Returns whether it was indexed.
+    fn remove(&self, py: Python<'_>, doc_id: &str) -> bool {
+        py.allow_threads(|| self.write().remove_doc(doc_id))
+    }
+
+    /// Removes every document.
+    fn clear(&self, py: Python<'_>) {
+        py.allow_threads(|| *self.write() = Bm25State::default());
+    }
+
+    fn __len__(&self, py: Python<'_>) -> usize {
+        py.allow_threads(|| self.read().slots.len())
+    }
+
+    /// Returns the `top_k` documents matching the query as (id, score)
+    /// tuples, by descending BM25 score.
+    fn search(&self, py: Python<'_>, query: &str, top_k: usize) -> Vec<(String, f64)> {
+        py.allow_threads(|| {
+            let query_terms = self.terms(query);
+            let state = self.read();
+            let doc_count = state.slots.len() as f64;
+            if doc_count == 0.0 {
+                return Vec::new();
+            }
+            let avg_len = (state.total_len as f64 / doc_count).max(1.0);
+
+            let mut scores: HashMap<u32, f64> = HashMap::new();
+            for term in query_terms.keys() {
+                let Some(docs) = state.postings.get(term) else {
+                    continue;
+                };
+                let doc_freq = docs.len() as f64;
+                let idf = (1.0 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5)).ln();
+                for (&slot, &tf) in docs {
+                    let tf = tf as f64;
+                    let norm = 1.0 - self.b + self.b * state.doc_lens[slot as usize] as f64 / avg_len;
+                    *scores.entry(slot).or_insert(0.0) +=
+                        idf * tf * (self.k1 + 1.0) / (tf + self.k1 * norm);
+                }
+            }
+
+            let mut ranked: Vec<(u32, f64)> = scores.into_iter().collect();
+            ranked.sort_unstable_by(|a, b| b.1.total_cmp(&a.1).then_with(|| a.0.cmp(&b.0)));
+            ranked.truncate(top_k);
+            ranked
+                .into_iter()
+                .filter_map(|(slot, score)| {
+                    state.ids[slot as usize].clone().map(|doc_id| (doc_id, score))
+                })
+                .collect()
+        })
+    }
+
+    /// Writes the index to a file.
+    fn save(&self, py: Python<'_>, path: &str) -> PyResult<()> {
+        py.allow_threads(|| {
+            let state = self.read();
+            let docs: HashMap<&String, &HashMap<String, u32>> = state
+                .slots
+                .iter()
+                .map(|(doc_id, &slot)| (doc_id, &state.doc_terms[slot as usize]))
+                .collect();
+            let file = File::create(path).map_err(|e| io_error(format!("Failed to create {}: {}", path, e)))?;
+            serde_json::to_writer(BufWriter::new(file), &(self.k1, self.b, docs))
+                .map_err(|e| io_error(format!("Failed to write {}: {}", path, e)))
+        })
+    }
+
+    /// Reads an index written by `save`.
+    #[staticmethod]
+    fn load(path: &str) -> PyResult<Self> {
+        let file = File::open(path).map_err(|e| io_error(format!("Failed to open {}: {}", path, e)))?;
+        let (k1, b, docs): (f64, f64, HashMap<String, HashMap<String, u32>>) =
+            serde_json::from_reader(BufReader::new(file))
+                .map_err(|e| value_error(format!("Failed to parse {}: {}", path, e)))?;
+        let mut index = Bm25Index::empty(k1, b)?;
+        let state = index.state.get_mut().unwrap_or_else(PoisonError::into_inner);
+        for (doc_id, terms) in docs {
+            state.insert(doc_id, terms);
+        }
+        Ok(index)
+    }
+}
+
+/// Mersenne prime used as modulus of the MinHash permutations.
+const MERSENNE_PRIME: u64 = (1 << 61) - 1;
+
+fn splitmix64(state: &mut u64) -> u64 {
+    *state = state.wrapping_add(0x9E3779B97F4A7C15);
+    let mut z = *state;
+    z = (z ^ (z >> 30)).wrapping_mul(0xBF58476D1CE4E5B9);
+    z = (z ^ (z >> 27)).wrapping_mul(0x94D049BB133111EB);
+    z ^ (z >> 31)
+}
+
+const FNV_OFFSET_BASIS: u64 = 0xCBF29CE484222325;
+const FNV_PRIME: u64 = 0x100000001B3;
+
+/// Hashes a shingle with 64-bit FNV-1a. Unlike the hashers of the standard
+/// library, its output is specified, so it does not change across Rust releases.
+/// Words are separated by 0xFF, a byte that never occurs in UTF-8.
+fn shingle_hash(shingle: &[&str]) -> u64 {
+    let mut hash = FNV_OFFSET_BASIS;
+    for word in shingle {
+        for &byte in word.as_bytes().iter().chain(&[0xFF]) {
+            hash ^= byte as u64;
+            hash = hash.wrapping_mul(FNV_PRIME);
+        }
+    }
+    hash
+}
+
+/// Computes MinHash signatures of word shingles, with fixed permutations and a
+/// fixed shingle hash so signatures are comparable across calls, processes and builds.
+struct MinHasher {
+    word_re: Regex,
+    shingle_size: usize,
+    permutations: Vec<(u64, u64)>,
+}
+
+impl MinHasher {
+    fn new(num_perm: usize, shingle_size: usize) -> PyResult<Self> {
+        if num_perm == 0 || shingle_size == 0 {
+            return Err(value_error("num_perm and shingle_size must be positive".to_string()));
+        }
+        let mut state = 0x5EED_u64;
+        let permutations = (0..num_perm)
+            .map(|_| {
+                let a = splitmix64(&mut state) % (MERSENNE_PRIME - 1) + 1;
+                let b = splitmix64(&mut state) % MERSENNE_PRIME;
+                (a, b)
+            })
+            .collect();
+        Ok(MinHasher {
+            word_re: Regex::new(r"[\p{L}\p{N}_]+")
+                .map_err(|e| value_error(format!("Failed to compile regex: {}", e)))?,
+            shingle_size,
+            permutations,
+        })
+    }
+
+    fn signature(&self, content: &str) -> Vec<u64> {
+        let lowercased_content = content.to_lowercase();
+        let words: Vec<&str> = self
+            .word_re
+            .find_iter(&lowercased_content)
+            .map(|word| word.as_str())
+            .collect();
+
+        let mut shingles = HashSet::new();
+        for shingle in words.windows(self.shingle_size.min(words.len()).max(1)) {
+            shingles.insert(shingle_hash(shingle) % MERSENNE_PRIME);
+        }
+        // Content without words has no signature, rather than one matching all such content
+        if shingles.is_empty() {
+            return Vec::new();
+        }
+
+        self.permutations
+            .iter()
+            .map(|&(a, b)| {
+                shingles
+                    .iter()
+                    .map(|&x| ((a as u128 * x as u128 + b as u128) % MERSENNE_PRIME as u128) as u64)
+                    .min()
+                    .unwrap_or(u64::MAX)
+            })
+            .collect()
+    }
+}
+
+fn signature_similarity_of(a: &[u64], b: &[u64]) -> f64 {
+    if a.is_empty() || a.len() != b.len() {
+        return 0.0;
+    }
+    let equal = a.iter().zip(b).filter(|(x, y)| x == y).count();
+    equal as f64 / a.len() as f64
+}
+
+/// Picks the LSH band count whose collision threshold (1/b)^(1/r) is closest
+/// to the similarity threshold, with b bands of r rows dividing num_perm.
+fn lsh_bands(num_perm: usize, threshold: f64) -> usize {
+    (1..=num_perm)
+        .filter(|bands| num_perm % bands == 0)
+        .min_by(|&x, &y| {
+            let error = |bands: usize| {
+                let rows = (num_perm / bands) as f64;
+                ((1.0 / bands as f64).powf(1.0 / rows) - threshold).abs()
+            };
+            error(x).total_cmp(&error(y))
+        })
+        .unwrap_or(1)
+}
+
+/// Returns the MinHash signature of every content, computed in parallel.
+/// The signature of content without words is empty and matches nothing.
+#[pyfunction]
+#[pyo3(signature = (contents, num_perm=64, shingle_size=3))]
+fn minhash_signatures(
+    py: Python<'_>,
+    contents: Vec<String>,
+    num_perm: usize,
+    shingle_size: usize,
+) -> PyResult<Vec<Vec<u64>>> {
+    let hasher = MinHasher::new(num_perm, shingle_size)?;
+    Ok(py.allow_threads(|| {
+        contents
+            .par_iter()
+            .map(|content| hasher.signature(content))
+            .collect()
+    }))
+}
+
+/// Estimates the Jaccard similarity of two texts from their MinHash signatures.
+#[pyfunction]
+fn signature_similarity(a: Vec<u64>, b: Vec<u64>) -> f64 {
+    signature_similarity_of(&a, &b)
+}
+
+/// Finds pairs of near-duplicate signatures with locality-sensitive hashing.
+///
+/// Only signatures sharing an LSH band are compared, so this runs in roughly
+/// linear time. Empty signatures, of content without words, are skipped.
+/// Returns (id, id, estimated similarity) tuples for the pairs at or above the
+/// threshold.
+#[pyfunction]
+#[pyo3(signature = (ids, signatures, threshold=0.8))]
+fn find_duplicate_pairs(
+    py: Python<'_>,
+    ids: Vec<String>,
+    signatures: Vec<Vec<u64>>,
+    threshold: f64,
+) -> PyResult<Vec<(String, String, f64)>> {
+    if ids.len() != signatures.len() {
+        return Err(value_error("All arguments must have the same length".to_string()));
+    }
+    let Some(num_perm) = signatures.iter().map(Vec::len).find(|&len| len > 0) else {
+        return Ok(Vec::new());
+    };
+    if signatures
+        .iter()
+        .any(|signature| !signature.is_empty() && signature.len() != num_perm)
+    {
+        return Err(value_error("All signatures must have the same length".to_string()));
+    }
+
+    Ok(py.allow_threads(|| {
+        let bands = lsh_bands(num_perm, threshold);
+        let rows = num_perm / bands;
+
+        let candidates: HashSet<(usize, usize)> = (0..bands)
+            .into_par_iter()
+            .flat_map_iter(|band| {
+                let mut buckets: HashMap<&[u64], Vec<usize>> = HashMap::new();
+                for (index, signature) in signatures.iter().enumerate() {
+                    if signature.is_empty() {
+                        continue;
+                    }
+                    buckets
+                        .entry(&signature[band * rows..(band + 1) * rows])
+                        .or_default()
+                        .push(index);
+                }
+                let mut pairs = Vec::new();
+                for members in buckets.values() {
+                    for (i, &left) in members.iter().enumerate() {
+                        for &right in &members[i + 1..] {
+                            pairs.push((left, right));
+                        }
+                    }
+                }
+                pairs
+            })
+            .collect();
+
+        let mut duplicates: Vec<(String, String, f64)> = candidates
+            .into_par_iter()
+            .filter_map(|(left, right)| {
+                let similarity = signature_similarity_of(&signatures[left], &signatures[right]);
+                (similarity >= threshold)
+                    .then(|| (ids[left].clone(), ids[right].clone(), similarity))
+            })
+            .collect();
+        duplicates.sort_unstable_by(|a, b| b.2.total_cmp(&a.2).then_with(|| a.0.cmp(&b.0)));
+        duplicates
+    }))
+}
+
 #[pyfunction]
 fn analyze_notes_content(notes_json: &str) -> PyResult<String> {
-    let notes: Vec<Note> = serde_json::from_str(notes_json).map_err(|e| {
-        PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Failed to parse JSON: {}", e))
-    })?;
+    let notes = parse_notes(notes_json)?;
 
     let mut total_words = 0;
     let mut unique_projects = HashSet::new();
@@ -41,36 +890,12 @@ fn analyze_notes_content(notes_json: &str) -> PyResult<String> {
 
 #[pyfunction]
 fn extract_keywords(notes_json: &str, top_n: usize) -> PyResult<String> {
-    let notes: Vec<Note> = serde_json::from_str(notes_json).map_err(|e| {
-        PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Failed to parse JSON: {}", e))
-    })?;
-
-    let mut word_counts: HashMap<String, usize> = HashMap::new();
-    let re = Regex::new(r"[^a-zA-ZÀ-ÿ\s]").map_err(|e| {
-        PyErr::new::<pyo3::exceptions::PyValueError, _>(format!("Failed to compile regex: {}", e))
-    })?;
-
-    let stop_words_set: HashSet<&str> = stop_words::STOP_WORDS.iter().cloned().collect();
-
-    for note in notes {
-        let lowercased_content = note.content.to_lowercase();
-        let contraction_re = Regex::new(r"\b[dlcjntsqu]'").unwrap();
-        let without_contractions = contraction_re.replace_all(&lowercased_content, "");
-        let cleaned_content = re.replace_all(&without_contractions, "");
-        for word in cleaned_content.split_whitespace() {
-            if !stop_words_set.contains(word) && word.len() > 1 {
-                // Ignore single-character words
-                *word_counts.entry(word.to_string()).or_insert(0) += 1;
-            }
-        }
-    }
-
-    let mut sorted_keywords: Vec<(&String, &usize)> = word_counts.iter().collect();
-    sorted_keywords.sort_by(|a, b| b.1.cmp(a.1)); // Sort by count, descending
+    let notes = parse_notes(notes_json)?;
+    let tokenizer = Tokenizer::new()?;
 
-    let top_keywords: Vec<String> = sorted_keywords
+    let contents: Vec<&str> = notes.iter().map(|note| note.content.as_str()).collect();
+    let top_keywords: Vec<String> = top_keywords_of(tokenizer.count_keywords(&contents), top_n)
         .into_iter()
-        .take(top_n)
         .map(|(word, count)| format!("\"{}\": {}", word, count))
         .collect();
 
@@ -79,6 +904,12 @@ fn extract_keywords(notes_json: &str, top_n: usize) -> PyResult<String> {
 
 #[pymodule]
 fn notia_analyzer(_py: Python, m: &Bound<'_, PyModule>) -> PyResult<()> {
+    m.add_class::<Analyzer>()?;
+    m.add_class::<KeywordIndex>()?;
+    m.add_class::<Bm25Index>()?;
+    m.add_function(wrap_pyfunction!(minhash_signatures, m)?)?;
+    m.add_function(wrap_pyfunction!(signature_similarity, m)?)?;
+    m.add_function(wrap_pyfunction!(find_duplicate_pairs, m)?)?;
     m.add_function(wrap_pyfunction!(analyze_notes_content, m)?)?;
     m.add_function(wrap_pyfunction!(extract_keywords, m)?)?;
     Ok(())
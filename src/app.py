@@ -1,39 +1,119 @@
-import os
 import asyncio
+import atexit
 import logging
-from dotenv import load_dotenv
-from textwrap import dedent
+import threading
+import uuid
+from typing import TYPE_CHECKING
 import streamlit as st
-from constants import SYSTEM_PROMPT
-from core import run_query, load_and_check_env_vars, setup_agent_and_session
-
-from agents import (
-    Agent,
-    Runner,
-    OpenAIChatCompletionsModel,
-    set_tracing_disabled,
-    AsyncOpenAI,
-    SQLiteSession,
+import metrics
+from core import (
+    TEXT_DELTA,
+    TOOL_CALL,
+    load_and_check_env_vars,
+    setup_agent,
+    setup_session,
+    stream_query,
 )
+from store import get_vector_store, vector_store_loaded
+
+if TYPE_CHECKING:
+    from agents import Agent
+    from history import CompactingSession
 
 
 LOG = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-set_tracing_disabled(disabled=True)
 
 
 
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Starts the event loop shared by all sessions, running in a background thread.
+    Keeping one loop alive lets the pooled HTTP clients reuse their connections
+    across queries. The clients are closed on this loop when the server exits.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="notia-event-loop", daemon=True).start()
+
+    def shutdown():
+        if vector_store_loaded():
+            asyncio.run_coroutine_threadsafe(get_vector_store().aclose(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+
+    atexit.register(shutdown)
+    return loop
+
+
+@st.cache_resource
+def get_agent() -> "Agent":
+    """
+    Returns the Notia agent, with its model client, shared by all sessions.
+    The vector store is opened along with it, so the first query does not pay for it.
+    """
+    get_vector_store()
+    return setup_agent()
+
 
-async def process_query(agent: Agent, session: SQLiteSession, query: str):
+def iterate_async(async_iterator):
     """
-    Process a user query using the Notia agent and handles UI-specific errors.
+    Iterates synchronously over an async generator running on the shared event loop.
+    If the iteration is abandoned, as when Streamlit reruns or stops the script
+    mid-stream, the generator is closed on the loop, ending the agent run and its
+    HTTP stream instead of leaving them running.
     """
+    loop = get_event_loop()
+    step = None
     try:
-        return await run_query(agent, session, query)
+        while True:
+            step = asyncio.run_coroutine_threadsafe(async_iterator.__anext__(), loop)
+            try:
+                yield step.result()
+            except StopAsyncIteration:
+                return
+    finally:
+        if step is not None and not step.done():
+            # Cancelling the pending step throws into the generator, which closes it
+            step.cancel()
+        else:
+            asyncio.run_coroutine_threadsafe(async_iterator.aclose(), loop)
+
+
+def stream_response(agent: "Agent", session: "CompactingSession", query: str, status):
+    """
+    Yields the text of the agent's answer as it is generated, showing tool calls
+    in the status placeholder, and handles UI-specific errors.
+    """
+    try:
+        for kind, value in iterate_async(stream_query(agent, session, query)):
+            if kind == TEXT_DELTA:
+                yield value
+            elif kind == TOOL_CALL:
+                status.caption(f"Using tool {value}...")
     except Exception as e:
-        # The error is already logged by run_query
-        return f"An error occurred: {e}"
+        # The error is already logged by stream_query
+        yield f"An error occurred: {e}"
+    finally:
+        status.empty()
+
+
+def show_stats():
+    """
+    Shows the latency of the instrumented operations and the gauges in the sidebar.
+    """
+    stats = metrics.snapshot()
+    with st.sidebar.expander("Stats"):
+        if stats["spans"]:
+            st.dataframe(
+                [{"span": name, **summary} for name, summary in stats["spans"].items()],
+                hide_index=True,
+            )
+        values = dict(stats["counters"])
+        for group, gauges in stats["gauges"].items():
+            values.update({f"{group}.{name}": value for name, value in gauges.items()})
+        if values:
+            st.json(values)
 
 
 def main():
@@ -47,11 +127,13 @@ def main():
 
     st.title("Notia - Your Second Brain for Development Projects")
 
-    # Initialize agent and session in Streamlit's session state
-    if "agent" not in st.session_state:
-        st.session_state.agent, st.session_state.session = setup_agent_and_session()
+    agent = get_agent()
+    metrics.start_prometheus_dump()
+
+    # Each browser session keeps its own conversation
+    if "session" not in st.session_state:
+        st.session_state.session = setup_session(f"notia-{uuid.uuid4()}")
 
-    agent = st.session_state.agent
     session = st.session_state.session
 
     # Initialize chat history
@@ -75,11 +157,12 @@ def main():
 
         # Display assistant response in chat message container
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = asyncio.run(process_query(agent, session, query))
-                st.markdown(response)
-                # Add assistant response to chat history
-                st.session_state.messages.append({"role": "assistant", "content": response})
+            status = st.empty()
+            response = st.write_stream(stream_response(agent, session, query, status))
+            # Add assistant response to chat history
+            st.session_state.messages.append({"role": "assistant", "content": response})
+
+    show_stats()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+import hashlib
+from collections import Counter
+
+
+def split_into_chunks(text: str, chunk_size: int = 1500, overlap: int = 200) -> list[str]:
+    """
+    Splits a text into overlapping chunks of at most `chunk_size` characters.
+
+    Chunks end on a paragraph, line or word boundary when one is found in the
+    second half of the chunk, so code and prose are not cut mid-word.
+
+    Args:
+        text (str): The text to split.
+        chunk_size (int): The maximum length of a chunk.
+        overlap (int): The number of characters shared by consecutive chunks.
+
+    Returns:
+        list[str]: The chunks, in order. A text shorter than `chunk_size` is a single chunk.
+    """
+    if len(text) <= chunk_size:
+        return [text]
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            for separator in ("\n\n", "\n", " "):
+                boundary = text.rfind(separator, start + chunk_size // 2, end)
+                if boundary != -1:
+                    end = boundary + len(separator)
+                    break
+        chunks.append(text[start:end])
+        if end == len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def chunk_ids(note_id: str, chunks: list[str]) -> list[str]:
+    """
+    Returns content-addressed IDs for the chunks of a note.
+
+    A chunk keeps its ID as long as its content is unchanged, even if other chunks
+    were inserted or removed before it, so only changed chunks need to be re-embedded.
+
+    Args:
+        note_id (str): The ID of the parent note.
+        chunks (list[str]): The chunks of the note.
+
+    Returns:
+        list[str]: One ID per chunk.
+    """
+    seen = Counter()
+    ids = []
+    for chunk in chunks:
+        digest = hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:16]
+        ids.append(f"{note_id}:{digest}:{seen[digest]}")
+        seen[digest] += 1
+    return ids
@@ -7,4 +7,6 @@ SYSTEM_PROMPT = dedent("""
     You have access to a set of tools to add, list, delete, and search notes in a vector database.
     Be helpful, concise, and proactive. When a user asks a question, use your search tool to find the most relevant notes to answer it.
     Pay close attention to the 'Rerank Score' provided by the search tool; a higher score indicates greater relevance to the query.
+    Listing tools return short content previews a page at a time. Call them again with 'next_cursor' to see more notes, and use get_note_by_id, with 'next_offset' for long notes, to read a note in full.
+    To find notes of a period or a project, pass 'since', 'until' (ISO dates) and 'project' to the search and listing tools instead of filtering their results yourself.
 """)
@@ -1,18 +1,78 @@
+import asyncio
+import datetime
 import logging
 import os
+import time
+from collections import deque
+from typing import TYPE_CHECKING, AsyncIterator
 from dotenv import load_dotenv
-from agents import Agent, Runner, SQLiteSession, OpenAIChatCompletionsModel, AsyncOpenAI
 from constants import SYSTEM_PROMPT
+import metrics
+
+if TYPE_CHECKING:
+    from agents import Agent
+    from history import CompactingSession
 
 LOG = logging.getLogger(__name__)
 
-async def run_query(agent: Agent, session: SQLiteSession, query: str) -> str:
+# Kinds of events yielded by stream_query
+TEXT_DELTA = "text"
+TOOL_CALL = "tool_call"
+TOOL_OUTPUT = "tool_output"
+
+# Time to first token, in seconds, of the most recent streamed queries
+TIME_TO_FIRST_TOKEN = deque(maxlen=100)
+
+# Input tokens, as reported by the model, of each of the most recent queries
+PROMPT_TOKENS = deque(maxlen=100)
+
+
+def record_prompt_size(result):
+    """
+    Records the input tokens used by a finished run.
+
+    Args:
+        result (RunResult | RunResultStreaming): The result of the run.
+    Returns:
+        None
+    """
+    input_tokens = result.context_wrapper.usage.input_tokens
+    PROMPT_TOKENS.append(input_tokens)
+    LOG.info(f"Prompt size: {input_tokens} input tokens")
+
+
+def conversation_stats() -> dict:
+    """
+    Returns the size of the recent prompts and the time to first token.
+
+    Returns:
+        dict: The last and mean prompt tokens, and the last and mean time to
+            first token in milliseconds, of the most recent queries.
+    """
+    from history import HISTORY_PROMPT_TOKENS
+
+    stats = {}
+    for name, samples, scale in (
+        ("prompt_tokens", PROMPT_TOKENS, 1),
+        ("history_tokens", HISTORY_PROMPT_TOKENS, 1),
+        ("time_to_first_token_ms", TIME_TO_FIRST_TOKEN, 1000),
+    ):
+        if samples:
+            stats[f"{name}_last"] = samples[-1] * scale
+            stats[f"{name}_mean"] = sum(samples) / len(samples) * scale
+    return stats
+
+
+metrics.register_collector("conversation", conversation_stats)
+
+@metrics.timed("core.run_query")
+async def run_query(agent: "Agent", session: "CompactingSession", query: str) -> str:
     """
     Runs the query using the agent and returns the final output.
     
     Args:
         agent (Agent): The Notia agent instance.
-        session (SQLiteSession): The session for database interactions.
+        session (CompactingSession): The conversation session.
         query (str): The user query to process.
 
     Returns:
@@ -21,14 +81,77 @@ async def run_query(agent: Agent, session: SQLiteSession, query: str) -> str:
     Raises:
         Exception: If an error occurs during query processing.
     """
+    from agents import Runner
+
     try:
         response = await Runner.run(agent, query, session=session)
+        record_prompt_size(response)
         return response.final_output
     except Exception as e:
         LOG.exception(f"Error during query processing: {e}")
         # Re-raise the exception to be handled by the caller
         raise
 
+async def stream_query(
+    agent: "Agent", session: "CompactingSession", query: str
+) -> AsyncIterator[tuple[str, str]]:
+    """
+    Runs the query using the agent and yields its output as it is generated.
+
+    Args:
+        agent (Agent): The Notia agent instance.
+        session (CompactingSession): The conversation session.
+        query (str): The user query to process.
+
+    Yields:
+        tuple[str, str]: (kind, value) events: TEXT_DELTA with a piece of the answer,
+            TOOL_CALL with the name of a tool being called, and TOOL_OUTPUT with the
+            output returned by a tool.
+
+    Raises:
+        Exception: If an error occurs during query processing.
+    """
+    from agents import Runner
+    from openai.types.responses import ResponseTextDeltaEvent
+
+    start = time.perf_counter()
+    first_token = None
+    result = None
+    try:
+        result = Runner.run_streamed(agent, query, session=session)
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(
+                event.data, ResponseTextDeltaEvent
+            ):
+                if not event.data.delta:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                    TIME_TO_FIRST_TOKEN.append(first_token)
+                    metrics.observe("core.time_to_first_token", first_token * 1000)
+                    LOG.info(f"Time to first token: {first_token * 1000:.0f} ms")
+                yield TEXT_DELTA, event.data.delta
+            elif event.type == "run_item_stream_event":
+                if event.item.type == "tool_call_item":
+                    yield TOOL_CALL, getattr(event.item.raw_item, "name", "tool")
+                elif event.item.type == "tool_call_output_item":
+                    yield TOOL_OUTPUT, str(event.item.output)
+        record_prompt_size(result)
+        metrics.observe("core.stream_query", (time.perf_counter() - start) * 1000)
+
+        # Some providers do not stream text deltas, fall back to the final output
+        if first_token is None and result.final_output:
+            yield TEXT_DELTA, str(result.final_output)
+    except (GeneratorExit, asyncio.CancelledError):
+        # The caller stopped reading, stop the run and its HTTP stream
+        if result is not None:
+            result.cancel()
+        raise
+    except Exception as e:
+        LOG.exception(f"Error during query processing: {e}")
+        # Re-raise the exception to be handled by the caller
+        raise
+
 def load_and_check_env_vars():
     """Loads environment variables and checks for missing required ones."""
     load_dotenv()
@@ -44,10 +167,15 @@ def load_and_check_env_vars():
     ]
     return missing
 
-def setup_agent_and_session():
-    """Initializes and returns the Agent and SQLiteSession."""
+def setup_agent() -> "Agent":
+    """
+    Initializes and returns the Notia Agent with its model client and tools.
+    The agents SDK is imported here rather than at module level, as it is slow to load.
+    """
+    from agents import Agent, OpenAIChatCompletionsModel, AsyncOpenAI, set_tracing_disabled
     from tools import tools  # Keep this import here as it depends on env vars
 
+    set_tracing_disabled(disabled=True)
     model = OpenAIChatCompletionsModel(
         model=os.getenv("OPENAI_API_MODEL", "qwen3"),
         openai_client=AsyncOpenAI(
@@ -55,6 +183,32 @@ def setup_agent_and_session():
             api_key=os.getenv("OPENAI_API_KEY"),
         ),
     )
-    agent = Agent(name="Notia", model=model, tools=tools, instructions=SYSTEM_PROMPT)
-    session = SQLiteSession("notia")
-    return agent, session
\ No newline at end of file
+    return Agent(name="Notia", model=model, tools=tools, instructions=instructions)
+
+def instructions(context, agent: "Agent") -> str:
+    """
+    Returns the system prompt with today's date, so the model can turn relative
+    dates ("last week") into the date filters of the tools.
+    """
+    return f"{SYSTEM_PROMPT}Today is {datetime.date.today().isoformat()}.\n"
+
+def setup_session(session_id: str = "notia") -> "CompactingSession":
+    """
+    Initializes and returns a conversation session.
+    The history is stored in SQLite and bounded, older turns being summarized by the model.
+    """
+    from agents import AsyncOpenAI, SQLiteSession
+    from history import CompactingSession, model_summarizer
+
+    summarize = model_summarizer(
+        AsyncOpenAI(
+            base_url=os.getenv("OPENAI_API_BASE"),
+            api_key=os.getenv("OPENAI_API_KEY"),
+        ),
+        os.getenv("OPENAI_API_MODEL", "qwen3"),
+    )
+    return CompactingSession(SQLiteSession(session_id), summarize)
+
+def setup_agent_and_session():
+    """Initializes and returns the Agent and its conversation session."""
+    return setup_agent(), setup_session()
@@ -0,0 +1,177 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from chromadb.utils import embedding_functions
+
+import metrics
+
+LOG = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Persistent, size-bounded cache of embedding vectors stored in SQLite.
+
+    Vectors are keyed by (model name, SHA-256 of the text). When the cache grows
+    past `max_entries`, the least recently used entries are evicted.
+    Attributes:
+        path (str): Path of the SQLite database file.
+        max_entries (int): Maximum number of vectors kept in the cache.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that were not in the cache.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, hash)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """
+        Returns the hash used as cache key for a text.
+
+        Args:
+            text (str): The embedded text.
+
+        Returns:
+            str: The hex SHA-256 digest of the text.
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, np.ndarray]:
+        """
+        Looks up cached vectors and marks them as recently used.
+
+        Args:
+            model (str): The embedding model name.
+            hashes (list[str]): The content hashes to look up.
+
+        Returns:
+            dict[str, np.ndarray]: The cached vectors, keyed by content hash.
+        """
+        found = {}
+        now = time.time()
+        with self._lock:
+            for content_hash in set(hashes):
+                row = self._conn.execute(
+                    "SELECT vector FROM embeddings WHERE model = ? AND hash = ?",
+                    (model, content_hash),
+                ).fetchone()
+                if row is not None:
+                    found[content_hash] = np.frombuffer(row[0], dtype=np.float32)
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+                    [(now, model, content_hash) for content_hash in found],
+                )
+                self._conn.commit()
+            self.hits += sum(1 for h in hashes if h in found)
+            self.misses += sum(1 for h in hashes if h not in found)
+        return found
+
+    def put_many(self, model: str, vectors: dict[str, np.ndarray]):
+        """
+        Stores vectors in the cache, evicting the least recently used entries if needed.
+
+        Args:
+            model (str): The embedding model name.
+            vectors (dict[str, np.ndarray]): The vectors to store, keyed by content hash.
+        Returns:
+            None
+        """
+        now = time.time()
+        with self._lock:
+            for content_hash, vector in vectors.items():
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO embeddings (model, hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                    (
+                        model,
+                        content_hash,
+                        np.asarray(vector, dtype=np.float32).tobytes(),
+                        now,
+                    ),
+                )
+                self._size += cursor.rowcount
+            if self._size > self.max_entries:
+                excess = self._size - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self._size -= excess
+                LOG.info(f"Evicted {excess} embeddings from cache.")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: The number of entries, hits and misses.
+        """
+        return {"entries": self._size, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        """Closes the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class CachedOpenAIEmbeddingFunction(embedding_functions.OpenAIEmbeddingFunction):
+    """
+    OpenAI-compatible embedding function that only sends uncached texts to the endpoint.
+
+    It keeps the name and configuration of `OpenAIEmbeddingFunction`, so existing
+    collections can be opened with it unchanged.
+    Attributes:
+        cache (EmbeddingCache): The cache in front of the embedding endpoint.
+    """
+
+    def __init__(self, cache: EmbeddingCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def __call__(self, input):
+        hashes = [EmbeddingCache.content_hash(text) for text in input]
+        cached = self.cache.get_many(self.model_name, hashes)
+
+        missing = {}
+        for text, content_hash in zip(input, hashes):
+            if content_hash not in cached:
+                missing.setdefault(content_hash, text)
+
+        if missing:
+            LOG.info(f"Embedding {len(missing)} texts ({len(input) - len(missing)} cached).")
+            metrics.increment("embedding.texts", len(missing))
+            with metrics.span("embedding.request"):
+                computed = super().__call__(list(missing.values()))
+            fresh = dict(zip(missing.keys(), computed))
+            self.cache.put_many(self.model_name, fresh)
+            cached.update(fresh)
+
+        return [np.asarray(cached[content_hash], dtype=np.float32) for content_hash in hashes]
@@ -0,0 +1,183 @@
+import io
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Callable, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from vector_store import VectorStore
+
+LOG = logging.getLogger(__name__)
+
+JSONL = "jsonl"
+PARQUET = "parquet"
+FORMATS = (JSONL, PARQUET)
+
+# Number of notes read from the store and written at a time
+EXPORT_PAGE_SIZE = 2000
+
+
+def default_export_path(format: str, compress: bool = False) -> str:
+    """
+    Returns the default path of an export file in the dist/ folder.
+
+    Args:
+        format (str): The export format, "jsonl" or "parquet".
+        compress (bool): Whether the export is compressed with zstd.
+
+    Returns:
+        str: The file path.
+    """
+    if format == JSONL:
+        return "dist/notes.jsonl.zst" if compress else "dist/notes.jsonl"
+    return "dist/notes.parquet"
+
+
+def _project_filter(projects: Optional[Sequence[str]]) -> Optional[dict]:
+    if not projects:
+        return None
+    if len(projects) == 1:
+        return {"project": projects[0]}
+    return {"project": {"$in": list(projects)}}
+
+
+def _open_jsonl(path: str, compress: bool) -> io.TextIOBase:
+    if not compress:
+        return open(path, "w", encoding="utf-8")
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstd compression needs the zstandard package: pip install 'notia[export]'"
+        )
+    raw = open(path, "wb")
+    stream = zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+def export_notes(
+    store: "VectorStore",
+    path: str,
+    format: str = JSONL,
+    projects: Optional[Sequence[str]] = None,
+    include_embeddings: bool = False,
+    compress: bool = False,
+    page_size: int = EXPORT_PAGE_SIZE,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Streams notes from the vector store to a JSONL or Parquet file.
+
+    Notes are read and written one page at a time, so memory use does not depend
+    on the size of the collection. Each record holds the note's id, content,
+    project and timestamp, and optionally its embedding as an array of float32
+    of the collection's dimension.
+
+    Args:
+        store (VectorStore): The vector store to export from.
+        path (str): The file to write.
+        format (str): "jsonl" for JSON lines, or "parquet", which needs pyarrow.
+        projects (Sequence[str], optional): Only export the notes of these projects.
+        include_embeddings (bool): Whether to include the embedding of each note.
+        compress (bool): Whether to compress with zstd. JSONL files are compressed
+            as a whole, which needs the zstandard package; Parquet files use zstd
+            column compression instead of snappy.
+        page_size (int): The number of notes read and written at a time.
+        progress (Callable[[int], None], optional): Called with the number of notes
+            exported after each page.
+
+    Returns:
+        int: The number of notes exported.
+
+    Raises:
+        ValueError: If the format is unknown.
+        ImportError: If an optional package needed by the format is missing.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format '{format}', expected one of {FORMATS}.")
+
+    include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+    pages = store.iter_notes(where=_project_filter(projects), include=include, page_size=page_size)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    LOG.info(f"Exporting notes to {path} as {format}.")
+
+    if format == JSONL:
+        exported = _export_jsonl(pages, path, include_embeddings, compress, progress)
+    else:
+        exported = _export_parquet(pages, path, include_embeddings, compress, progress)
+    LOG.info(f"Exported {exported} notes to {path}.")
+    return exported
+
+
+def _export_jsonl(pages, path: str, include_embeddings: bool, compress: bool, progress) -> int:
+    exported = 0
+    with _open_jsonl(path, compress) as f:
+        for page in pages:
+            embeddings = (
+                np.asarray(page["embeddings"], dtype=np.float32) if include_embeddings else None
+            )
+            for i, note_id in enumerate(page["ids"]):
+                metadata = page["metadatas"][i]
+                record = {
+                    "id": note_id,
+                    "content": page["documents"][i],
+                    "project": metadata.get("project", ""),
+                    "timestamp": metadata.get("timestamp", ""),
+                }
+                if embeddings is not None:
+                    record["embedding"] = embeddings[i].tolist()
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write("\n")
+            exported += len(page["ids"])
+            if progress:
+                progress(exported)
+    return exported
+
+
+def _export_parquet(pages, path: str, include_embeddings: bool, compress: bool, progress) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs the pyarrow package: pip install 'notia[export]'")
+
+    exported = 0
+    writer = None
+    try:
+        for page in pages:
+            columns = {
+                "id": pa.array(page["ids"], pa.string()),
+                "content": pa.array(page["documents"], pa.string()),
+                "project": pa.array([m.get("project", "") for m in page["metadatas"]], pa.string()),
+                "timestamp": pa.array(
+                    [m.get("timestamp", "") for m in page["metadatas"]], pa.string()
+                ),
+            }
+            if include_embeddings:
+                embeddings = np.asarray(page["embeddings"], dtype=np.float32)
+                dimension = embeddings.shape[1]
+                columns["embedding"] = pa.FixedSizeListArray.from_arrays(
+                    pa.array(embeddings.reshape(-1), pa.float32()), dimension
+                )
+            table = pa.table(columns)
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    path, table.schema, compression="zstd" if compress else "snappy"
+                )
+            writer.write_table(table)
+            exported += len(page["ids"])
+            if progress:
+                progress(exported)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        # Nothing to export, still write a valid, empty file
+        schema = pa.schema(
+            [(name, pa.string()) for name in ("id", "content", "project", "timestamp")]
+        )
+        pq.write_table(schema.empty_table(), path)
+    return exported
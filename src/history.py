@@ -0,0 +1,314 @@
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+from agents.memory import SessionABC
+
+if TYPE_CHECKING:
+    from agents import TResponseInputItem
+    from agents.memory import Session
+
+LOG = logging.getLogger(__name__)
+
+# Estimated tokens of conversation history kept verbatim before older turns are summarized
+HISTORY_TOKENS = int(os.getenv("NOTIA_HISTORY_TOKENS", "4000"))
+
+# Maximum characters kept of a tool output from an earlier turn
+HISTORY_TOOL_OUTPUT_CHARS = int(os.getenv("NOTIA_HISTORY_TOOL_OUTPUT_CHARS", "1000"))
+
+# Rough number of characters per token, used to estimate prompt sizes without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Estimated tokens of history sent with each of the most recent queries
+HISTORY_PROMPT_TOKENS = deque(maxlen=100)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain the running summary of a conversation between a user and Notia, "
+    "a note-taking assistant. Update the summary with the new turns. Keep the facts, "
+    "decisions, note IDs and project names the user may refer to later, drop small talk. "
+    "Answer with the updated summary only, in at most 200 words."
+)
+
+Summarizer = Callable[[str, str], Awaitable[str]]
+
+
+def estimate_tokens(items: list["TResponseInputItem"]) -> int:
+    """
+    Estimates the number of tokens the given items take in a prompt.
+
+    Args:
+        items (list[TResponseInputItem]): The conversation items.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    chars = sum(len(json.dumps(item, ensure_ascii=False, default=str)) for item in items)
+    return chars // CHARS_PER_TOKEN
+
+
+def split_turns(items: list["TResponseInputItem"]) -> list[list["TResponseInputItem"]]:
+    """
+    Groups conversation items into turns, each starting with a user message.
+
+    Tool calls stay in the same turn as their outputs, so a turn can be dropped
+    without leaving an unmatched call behind.
+
+    Args:
+        items (list[TResponseInputItem]): The conversation items, in order.
+
+    Returns:
+        list[list[TResponseInputItem]]: The turns, in order.
+    """
+    turns = []
+    for item in items:
+        if not turns or item.get("role") == "user":
+            turns.append([])
+        turns[-1].append(item)
+    return turns
+
+
+def render_items(items: list["TResponseInputItem"]) -> str:
+    """
+    Renders conversation items as plain text for the summarizer.
+
+    Args:
+        items (list[TResponseInputItem]): The conversation items.
+
+    Returns:
+        str: One line per item.
+    """
+    lines = []
+    for item in items:
+        item_type = item.get("type")
+        if item_type == "function_call":
+            lines.append(f"Tool call: {item.get('name')}({item.get('arguments', '')})")
+        elif item_type == "function_call_output":
+            output = str(item.get("output", ""))
+            lines.append(f"Tool output: {output[:HISTORY_TOOL_OUTPUT_CHARS]}")
+        elif "role" in item:
+            content = item.get("content", "")
+            if isinstance(content, list):
+                content = " ".join(
+                    part.get("text", "") for part in content if isinstance(part, dict)
+                )
+            lines.append(f"{item['role'].capitalize()}: {content}")
+    return "\n".join(lines)
+
+
+def prune_tool_output(item: "TResponseInputItem", max_chars: int) -> "TResponseInputItem":
+    """
+    Truncates the output of a tool call item if it is longer than `max_chars`.
+
+    Args:
+        item (TResponseInputItem): A conversation item.
+        max_chars (int): The maximum number of characters of output kept.
+
+    Returns:
+        TResponseInputItem: The item, or a copy with its output truncated.
+    """
+    if item.get("type") != "function_call_output":
+        return item
+    output = item.get("output")
+    if not isinstance(output, str) or len(output) <= max_chars:
+        return item
+    return {
+        **item,
+        "output": f"{output[:max_chars]}\n[truncated, {len(output)} characters in total]",
+    }
+
+
+def is_summary(item: "TResponseInputItem") -> bool:
+    """Returns whether the item is the running summary of the conversation."""
+    content = item.get("content")
+    return (
+        item.get("role") == "system"
+        and isinstance(content, str)
+        and content.startswith(SUMMARY_PREFIX)
+    )
+
+
+class CompactingSession(SessionABC):
+    """
+    Session that bounds the conversation history replayed to the model.
+
+    The most recent turns are kept verbatim. When the history grows past the token
+    window, older turns are folded into a running summary stored as the first item
+    of the session, so the prompt size stays bounded however long the conversation
+    runs. Large tool outputs of earlier turns are truncated.
+    Attributes:
+        session (Session): The wrapped session storing the items.
+        session_id (str): The ID of the wrapped session.
+        max_tokens (int): Estimated tokens of history above which older turns are summarized.
+        tool_output_chars (int): Maximum characters kept of a tool output from an earlier turn.
+    """
+
+    def __init__(
+        self,
+        session: "Session",
+        summarize: Summarizer,
+        max_tokens: int = HISTORY_TOKENS,
+        tool_output_chars: int = HISTORY_TOOL_OUTPUT_CHARS,
+    ):
+        self.session = session
+        self.session_id = session.session_id
+        self.summarize = summarize
+        self.max_tokens = max_tokens
+        self.tool_output_chars = tool_output_chars
+
+    def __getattr__(self, name: str):
+        # Settings and helpers of the wrapped session are used as is
+        if name == "session":
+            raise AttributeError(name)
+        return getattr(self.session, name)
+
+    async def get_items(self, limit: Optional[int] = None) -> list["TResponseInputItem"]:
+        """
+        Returns the bounded history, compacting the stored session first if needed.
+
+        Args:
+            limit (int, optional): The maximum number of most recent items to return,
+                not counting the running summary, which is always returned.
+
+        Returns:
+            list[TResponseInputItem]: The running summary, if any, and the recent turns.
+        """
+        items = await self.session.get_items()
+        if estimate_tokens(items) > self.max_tokens:
+            items = await self._compact(items)
+
+        summary = []
+        if items and is_summary(items[0]):
+            summary, items = items[:1], items[1:]
+        turns = split_turns(items)
+        # Only the last turn keeps its tool outputs in full
+        items = [
+            prune_tool_output(item, self.tool_output_chars)
+            for turn in turns[:-1]
+            for item in turn
+        ] + (turns[-1] if turns else [])
+        if limit is not None:
+            items = items[-limit:] if limit > 0 else []
+        items = summary + items
+
+        tokens = estimate_tokens(items)
+        HISTORY_PROMPT_TOKENS.append(tokens)
+        LOG.info(f"Session {self.session_id}: {len(items)} history items, ~{tokens} tokens")
+        return items
+
+    async def _compact(self, items: list["TResponseInputItem"]) -> list["TResponseInputItem"]:
+        """
+        Folds the older turns into the running summary and rewrites the stored session.
+
+        Recent turns are kept until they fill half of the token window, so that
+        the summary is not rewritten on every query.
+
+        Args:
+            items (list[TResponseInputItem]): All stored items.
+
+        Returns:
+            list[TResponseInputItem]: The items to send to the model.
+        """
+        stored = items
+        summary = ""
+        previous_summary = []
+        if items and is_summary(items[0]):
+            summary = items[0]["content"][len(SUMMARY_PREFIX) :]
+            previous_summary, items = items[:1], items[1:]
+
+        turns = split_turns(items)
+        kept = 0
+        used = 0
+        for turn in reversed(turns):
+            used += estimate_tokens(turn)
+            if kept and used > self.max_tokens // 2:
+                break
+            kept += 1
+        old_turns, recent_turns = turns[: len(turns) - kept], turns[len(turns) - kept :]
+        if not old_turns:
+            # A single turn fills the window, there is nothing older to summarize
+            return stored
+
+        recent_items = [item for turn in recent_turns for item in turn]
+        old_items = [item for turn in old_turns for item in turn]
+        try:
+            summary = await self.summarize(summary, render_items(old_items))
+        except Exception as e:
+            # Send the previous summary with the recent turns only, the stored
+            # history is kept as is and summarized on the next query
+            LOG.warning(f"Could not summarize the conversation history: {e}")
+            return previous_summary + recent_items
+
+        compacted = [{"role": "system", "content": SUMMARY_PREFIX + summary}] + recent_items
+        try:
+            # Shielded, so a cancelled query does not leave the session cleared
+            await asyncio.shield(self._rewrite(stored, compacted))
+        except Exception as e:
+            LOG.warning(f"Could not rewrite the conversation history: {e}")
+            return compacted
+        LOG.info(
+            f"Session {self.session_id}: summarized {len(old_items)} items, "
+            f"kept {len(compacted) - 1}"
+        )
+        return compacted
+
+    async def _rewrite(
+        self, stored: list["TResponseInputItem"], compacted: list["TResponseInputItem"]
+    ):
+        """
+        Replaces the stored items with the compacted ones, and puts the stored items
+        back if the compacted ones cannot be written.
+        """
+        await self.session.clear_session()
+        try:
+            await self.session.add_items(compacted)
+        except BaseException:
+            # Some of the compacted items may have been written
+            await self.session.clear_session()
+            await self.session.add_items(stored)
+            raise
+
+    async def add_items(self, items: list["TResponseInputItem"]) -> None:
+        """Adds new items to the wrapped session."""
+        await self.session.add_items(items)
+
+    async def pop_item(self) -> Optional["TResponseInputItem"]:
+        """Removes and returns the most recent item of the wrapped session."""
+        return await self.session.pop_item()
+
+    async def clear_session(self) -> None:
+        """Clears the wrapped session, including the running summary."""
+        await self.session.clear_session()
+
+
+def model_summarizer(client, model: str) -> Summarizer:
+    """
+    Returns a summarizer backed by a chat completions model.
+
+    Args:
+        client (AsyncOpenAI): The OpenAI compatible client.
+        model (str): The model used to write summaries.
+
+    Returns:
+        Summarizer: An async function taking the current summary and the rendered
+            turns to fold in, and returning the updated summary.
+    """
+
+    async def summarize(summary: str, turns: str) -> str:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                {
+                    "role": "user",
+                    "content": f"Current summary:\n{summary or '(none)'}\n\nNew turns:\n{turns}",
+                },
+            ],
+        )
+        return (response.choices[0].message.content or "").strip()
+
+    return summarize
@@ -0,0 +1,283 @@
+import datetime
+import logging
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+from models import Note
+from notia_analyzer import Bm25Index  # ty: ignore[unresolved-import]
+
+if TYPE_CHECKING:
+    from vector_store import VectorStore
+
+LOG = logging.getLogger(__name__)
+
+# Delay before retrying to store the pending notes after a failure, in seconds
+RETRY_DELAY = 5.0
+
+
+class IngestQueue:
+    """
+    Write-behind queue of notes waiting to be embedded and stored.
+
+    Queued notes are first written to an on-disk SQLite journal, so they are
+    durable as soon as `enqueue` returns. A background worker stores them in
+    batches, with one embedding request and one collection write per batch,
+    and removes them from the journal once stored. Notes left in the journal by
+    a crash are stored again when the queue is next opened; storing is an
+    upsert, so a note stored just before the crash is not duplicated.
+
+    Until they are stored, pending notes can be read by ID and searched by
+    terms through an in-memory BM25 index.
+
+    A batch is stored through `write`, the writer of the other writes of the
+    store, so the worker never writes concurrently with them.
+    Attributes:
+        store (VectorStore): The vector store the notes are written to.
+        path (str): Path of the SQLite journal file.
+        batch_size (int): Maximum number of notes stored per batch.
+        flush_interval (float): Time in seconds the worker waits for more notes
+            before storing a batch.
+        write (Callable): Called with a function and its arguments, it runs the
+            function as a write of the store and returns its result.
+    """
+
+    def __init__(
+        self,
+        store: "VectorStore",
+        path: str,
+        batch_size: int = 32,
+        flush_interval: float = 0.2,
+        write: Optional[Callable] = None,
+    ):
+        self.store = store
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write = write or (lambda function, *args, **kwargs: function(*args, **kwargs))
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pending (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                content TEXT NOT NULL,
+                project TEXT NOT NULL,
+                timestamp TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        # Guards the journal and the pending notes
+        self._lock = threading.Lock()
+        # Held while a batch is being stored, so pending notes are not discarded meanwhile
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._stopping = False
+        self._pending: dict[str, Note] = {}
+        self._index = Bm25Index()
+        self._worker: Optional[threading.Thread] = None
+
+        for _, note in self._read_journal():
+            self._track(note)
+        if self._pending:
+            LOG.info(f"Replaying {len(self._pending)} notes left in the ingest journal.")
+            self._start_worker()
+
+    def _read_journal(self, limit: int = -1) -> list[tuple[int, Note]]:
+        rows = self._conn.execute(
+            "SELECT seq, id, content, project, timestamp FROM pending ORDER BY seq LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [
+            (
+                seq,
+                Note(
+                    content=content,
+                    project=project,
+                    timestamp=datetime.datetime.fromisoformat(timestamp),
+                    id=note_id,
+                ),
+            )
+            for seq, note_id, content, project, timestamp in rows
+        ]
+
+    def _track(self, note: Note):
+        self._pending[note.id] = note
+        self._index.upsert_many([note.id], [note.content])
+
+    def _untrack(self, note_ids: list[str]):
+        for note_id in note_ids:
+            if self._pending.pop(note_id, None) is not None:
+                self._index.remove(note_id)
+
+    def _start_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="notia-ingest-worker", daemon=True
+            )
+            self._worker.start()
+
+    def enqueue(self, note: Note) -> str:
+        """
+        Durably queues a note to be stored in the background.
+
+        Args:
+            note (Note): The note to store.
+
+        Returns:
+            str: The ID of the note.
+        """
+        with self._lock:
+            # A queued note replaced by a newer version gets a new sequence number,
+            # so a batch being stored with the older version does not remove it
+            self._conn.execute("DELETE FROM pending WHERE id = ?", (note.id,))
+            self._conn.execute(
+                "INSERT INTO pending (id, content, project, timestamp) VALUES (?, ?, ?, ?)",
+                (note.id, note.content, note.project or "", note.timestamp.isoformat()),
+            )
+            self._conn.commit()
+            self._track(note)
+            self._wake.notify()
+        self._start_worker()
+        LOG.info(f"Queued note with ID {note.id}, {len(self._pending)} notes pending.")
+        return note.id
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._stopping:
+                    self._wake.wait()
+                if self._stopping:
+                    return
+                # Give concurrent notes a chance to join the batch
+                if len(self._pending) < self.batch_size:
+                    self._wake.wait(self.flush_interval)
+            try:
+                self.flush_batch()
+            except Exception as e:
+                LOG.exception(f"Could not store pending notes, retrying in {RETRY_DELAY} s: {e}")
+                with self._lock:
+                    self._wake.wait(RETRY_DELAY)
+
+    def flush_batch(self) -> int:
+        """
+        Stores the oldest pending notes, up to `batch_size`, and removes them from the journal.
+
+        Returns:
+            int: The number of notes stored.
+        """
+        # The flush lock is taken within the write, as the store's writes take it
+        # themselves when they discard pending notes
+        return self.write(self._store_batch)
+
+    def _store_batch(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                entries = self._read_journal(self.batch_size)
+            if not entries:
+                return 0
+            notes = [note for _, note in entries]
+            self.store.add_notes(notes, batch_size=len(notes), max_concurrency=1)
+            with self._lock:
+                removed = [
+                    note.id
+                    for seq, note in entries
+                    if self._conn.execute("DELETE FROM pending WHERE seq = ?", (seq,)).rowcount
+                ]
+                self._conn.commit()
+                self._untrack(removed)
+            LOG.info(f"Stored {len(notes)} pending notes.")
+            return len(notes)
+
+    def drain(self):
+        """
+        Stores all pending notes before returning.
+
+        Returns:
+            None
+        """
+        while self.flush_batch():
+            pass
+
+    def discard(self, note_ids: list[str]) -> list[str]:
+        """
+        Removes notes from the queue before they are stored.
+
+        Args:
+            note_ids (list[str]): The IDs of the notes to remove.
+
+        Returns:
+            list[str]: The IDs that were pending.
+        """
+        with self._flush_lock, self._lock:
+            found = [note_id for note_id in note_ids if note_id in self._pending]
+            if found:
+                self._conn.executemany("DELETE FROM pending WHERE id = ?", [(i,) for i in found])
+                self._conn.commit()
+                self._untrack(found)
+        return found
+
+    def get(self, note_ids: list[str]) -> list[Note]:
+        """
+        Returns the pending notes among the given IDs.
+
+        Args:
+            note_ids (list[str]): The IDs to look up.
+
+        Returns:
+            list[Note]: The pending notes, in the order of the IDs.
+        """
+        with self._lock:
+            return [self._pending[i] for i in note_ids if i in self._pending]
+
+    def search(self, query: str, n_results: int = 5) -> list[tuple[Note, float]]:
+        """
+        Searches the pending notes by terms.
+
+        Args:
+            query (str): The search query.
+            n_results (int): The maximum number of notes returned.
+
+        Returns:
+            list[tuple[Note, float]]: (note, BM25 score) tuples, by descending score.
+        """
+        with self._lock:
+            if not self._pending:
+                return []
+            hits = self._index.search(query, n_results)
+            return [(self._pending[i], score) for i, score in hits if i in self._pending]
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def close(self, timeout: float = 30.0):
+        """
+        Stops the worker and stores the remaining notes.
+
+        Notes that cannot be stored within `timeout` stay in the journal and are
+        stored the next time the queue is opened.
+
+        Args:
+            timeout (float): Maximum time in seconds spent storing the remaining notes.
+        Returns:
+            None
+        """
+        with self._lock:
+            self._stopping = True
+            self._wake.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+        deadline = time.monotonic() + timeout
+        try:
+            while self._pending and time.monotonic() < deadline and self.flush_batch():
+                pass
+        except Exception as e:
+            LOG.warning(f"Could not store pending notes on shutdown, they will be replayed: {e}")
+        if self._pending:
+            LOG.warning(f"{len(self._pending)} notes left in the ingest journal.")
+        with self._flush_lock, self._lock:
+            self._conn.close()
@@ -1,83 +1,231 @@
-import os
+import argparse
 import asyncio
 import logging
-from dotenv import load_dotenv
-from textwrap import dedent
-from constants import SYSTEM_PROMPT
-from core import run_query, load_and_check_env_vars, setup_agent_and_session
+from typing import TYPE_CHECKING
+from core import (
+    TEXT_DELTA,
+    TOOL_CALL,
+    load_and_check_env_vars,
+    setup_agent_and_session,
+    stream_query,
+)
 from prompt_toolkit import PromptSession
 from prompt_toolkit.formatted_text import HTML
+from rich.table import Table
 
-from agents import (
-    Agent,
-    Runner,
-    OpenAIChatCompletionsModel,
-    set_tracing_disabled,
-    AsyncOpenAI,
-    SQLiteSession,
-)
+import metrics
 from console import console
+from store import vector_store_loaded, vs, warm_up_vector_store
+
+if TYPE_CHECKING:
+    from agents import Agent
+    from history import CompactingSession
 
 LOG = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-set_tracing_disabled(disabled=True)
 
 
 
-
-async def process_query(agent: Agent, session: SQLiteSession, query: str):
+async def process_query(agent: "Agent", session: "CompactingSession", query: str):
     """
-    Process a user query using the Notia agent and prints the output to the console.
+    Process a user query using the Notia agent and prints the output to the console
+    as it is generated.
     """
     try:
-        response = await run_query(agent, session, query)
-        console.print(response)
+        async for kind, value in stream_query(agent, session, query):
+            if kind == TEXT_DELTA:
+                console.print(value, end="", markup=False, highlight=False)
+            elif kind == TOOL_CALL:
+                console.print(f"[dim]Using tool {value}...[/dim]")
+        console.print()
     except Exception:
-        # The error is already logged by run_query
-        console.print("[bold red]An error occurred while processing your request.[/bold red]")
+        # The error is already logged by stream_query
+        console.print("\n[bold red]An error occurred while processing your request.[/bold red]")
+
+
+def print_stats():
+    """
+    Prints the latency of the instrumented operations, the counters and the gauges
+    of the current process.
+    """
+    stats = metrics.snapshot()
+    table = Table(title="Latency", show_lines=False)
+    for column in ("Span", "Count", "Errors", "Mean (ms)", "p50 (ms)", "p95 (ms)", "Max (ms)"):
+        table.add_column(column, justify="left" if column == "Span" else "right")
+    for name, summary in stats["spans"].items():
+        table.add_row(
+            name,
+            str(summary["count"]),
+            str(summary["errors"]),
+            *(f"{summary[key]:.1f}" for key in ("mean_ms", "p50_ms", "p95_ms", "max_ms")),
+        )
+    console.print(table)
+
+    values = Table(title="Counters and gauges")
+    values.add_column("Name")
+    values.add_column("Value", justify="right")
+    for name, value in stats["counters"].items():
+        values.add_row(name, str(value))
+    for group, gauges in stats["gauges"].items():
+        for name, value in gauges.items():
+            value = f"{value:.1f}" if isinstance(value, float) else str(value)
+            values.add_row(f"{group}.{name}", value)
+    console.print(values)
 
 
 async def main():
     """
     Main function to initialize the Notia agent and start the interactive loop.
     It sets up the agent with the OpenAI model and tools, and handles user input.
+    The agent and the vector store are loaded in the background while the user
+    types the first query, so the prompt appears immediately.
     """
-    agent, session = setup_agent_and_session()
+    warm_up_vector_store()
+    metrics.start_prometheus_dump()
+    agent_ready = asyncio.get_running_loop().run_in_executor(None, setup_agent_and_session)
 
     session_prompt = PromptSession()
 
     console.print(
         "[bold green]Welcome to Notia! Your second brain for development projects.[/bold green]"
     )
-    console.print("Type 'exit' or 'quit' to end the session.")
+    console.print("Type 'exit' or 'quit' to end the session, '/stats' to show latencies.")
 
-    while True:
-        try:
-            query = await session_prompt.prompt_async(
-                HTML("<ansicyan><b>notia></b></ansicyan> ")
-            )
-
-            if query.lower() in ["exit", "quit"]: # or CTRL+D
-                console.print("[bold red]Goodbye![/bold red]")
+    try:
+        while True:
+            try:
+                query = await session_prompt.prompt_async(
+                    HTML("<ansicyan><b>notia></b></ansicyan> ")
+                )
+
+                if query.lower() in ["exit", "quit"]: # or CTRL+D
+                    console.print("[bold red]Goodbye![/bold red]")
+                    break
+                if query.strip() == "/stats":
+                    print_stats()
+                    continue
+
+                agent, session = await agent_ready
+                await process_query(agent, session, query)
+
+            except (KeyboardInterrupt, EOFError):
+                console.print("\n[bold red]Goodbye![/bold red]")
                 break
-
-            await process_query(agent, session, query)
-
-        except (KeyboardInterrupt, EOFError):
-            console.print("\n[bold red]Goodbye![/bold red]")
-            break
+    finally:
+        if vector_store_loaded():
+            await vs.aclose()
 
 
 def cli():
     """
     Entrypoint to the Notia CLI.
-    Checks for required environment variables and starts the main loop.
+    Checks for required environment variables and starts the interactive loop,
+    or the API server with `notia serve`.
     """
+    parser = argparse.ArgumentParser(
+        prog="notia", description="Your second brain for development projects."
+    )
+    subcommands = parser.add_subparsers(dest="command")
+    serve_parser = subcommands.add_parser("serve", help="Run the local HTTP/JSON API server.")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Interface to bind.")
+    serve_parser.add_argument("--port", type=int, default=8642, help="Port to bind.")
+    export_parser = subcommands.add_parser("export", help="Export notes to JSONL or Parquet.")
+    export_parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    export_parser.add_argument(
+        "--project", action="append", dest="projects", help="Project to export, repeatable."
+    )
+    export_parser.add_argument(
+        "--embeddings", action="store_true", help="Include the embedding of each note."
+    )
+    export_parser.add_argument("--zstd", action="store_true", help="Compress with zstd.")
+    export_parser.add_argument("-o", "--output", help="Output file, in dist/ by default.")
+    snapshot_parser = subcommands.add_parser(
+        "snapshot", help="Save notes and their embeddings to a snapshot file."
+    )
+    snapshot_parser.add_argument("-o", "--output", default="dist/notia.snapshot")
+    restore_parser = subcommands.add_parser(
+        "restore", help="Load a snapshot file without embedding the notes again."
+    )
+    restore_parser.add_argument("path", help="Snapshot file to load.")
+    restore_parser.add_argument(
+        "--force", action="store_true", help="Load a snapshot made with another embedding model."
+    )
+    shard_parser = subcommands.add_parser(
+        "shard", help="Move the notes into one collection per project, or per hash bucket."
+    )
+    shard_parser.add_argument("--mode", choices=["project", "hash"], default="project")
+    shard_parser.add_argument(
+        "--shards", type=int, default=16, help="Number of shards in hash mode."
+    )
+    args = parser.parse_args()
+
     missing = load_and_check_env_vars()
     if missing:
         raise EnvironmentError(
             f"Missing required environment variables: {', '.join(missing)}"
         )
 
+    if args.command == "serve":
+        from server import serve
+
+        try:
+            asyncio.run(serve(args.host, args.port))
+        except KeyboardInterrupt:
+            console.print("[bold red]Server stopped.[/bold red]")
+        return
+
+    if args.command == "export":
+        export(args)
+        return
+    if args.command == "snapshot":
+        counts = vs.snapshot(args.output)
+        console.print(
+            f"[bold green]Saved {counts['notes']} notes and {counts['chunks']} chunks "
+            f"to {args.output}.[/bold green]"
+        )
+        return
+    if args.command == "restore":
+        try:
+            counts = vs.restore(args.path, force=args.force)
+        except ValueError as e:
+            raise SystemExit(f"Restore failed: {e}")
+        console.print(
+            f"[bold green]Restored {counts['notes']} notes and {counts['chunks']} chunks "
+            f"from {args.path}.[/bold green]"
+        )
+        return
+
+    if args.command == "shard":
+        try:
+            counts = vs.shard(
+                args.mode,
+                args.shards,
+                progress=lambda done: console.print(f"[dim]Moved {done} records...[/dim]"),
+            )
+        except ValueError as e:
+            raise SystemExit(f"Sharding failed: {e}")
+        console.print(
+            f"[bold green]Moved the notes into {counts['notes']} shards and their chunks "
+            f"into {counts['chunks']} shards.[/bold green]"
+        )
+        return
+
     asyncio.run(main())
+
+
+def export(args: argparse.Namespace):
+    """Runs the `notia export` subcommand."""
+    from exporter import default_export_path, export_notes
+
+    output = args.output or default_export_path(args.format, args.zstd)
+    exported = export_notes(
+        vs,
+        output,
+        format=args.format,
+        projects=args.projects,
+        include_embeddings=args.embeddings,
+        compress=args.zstd,
+        progress=lambda done: console.print(f"[dim]Exported {done} notes...[/dim]"),
+    )
+    console.print(f"[bold green]Exported {exported} notes to {output}.[/bold green]")
@@ -0,0 +1,318 @@
+import atexit
+import contextlib
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from typing import Callable, Optional
+
+LOG = logging.getLogger(__name__)
+
+# Whether spans are recorded. When disabled, instrumented functions are left unwrapped
+ENABLED = os.getenv("NOTIA_METRICS", "true").lower() in ("1", "true", "yes")
+
+# File the metrics are periodically written to in Prometheus text format, if set
+PROMETHEUS_FILE = os.getenv("NOTIA_METRICS_FILE", "")
+
+# Seconds between two writes of the Prometheus file
+PROMETHEUS_INTERVAL = float(os.getenv("NOTIA_METRICS_INTERVAL", "15"))
+
+# Upper bounds, in milliseconds, of the latency histogram buckets
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# Number of most recent samples kept per span for the percentiles
+WINDOW = 1000
+
+
+class Histogram:
+    """
+    Latency histogram of a span, with cumulative buckets and a rolling window of samples.
+    Attributes:
+        count (int): The number of samples recorded.
+        errors (int): The number of samples whose call raised.
+        total_ms (float): The sum of all samples.
+        buckets (list[int]): The number of samples in each bucket of BUCKETS_MS, and above.
+        recent (deque): The most recent samples, in milliseconds.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=WINDOW)
+
+    def observe(self, elapsed_ms: float, error: bool = False):
+        self.count += 1
+        self.errors += error
+        self.total_ms += elapsed_ms
+        self.recent.append(elapsed_ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def summary(self) -> dict:
+        recent = sorted(self.recent)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": recent[len(recent) // 2] if recent else 0.0,
+            "p95_ms": recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0,
+            "max_ms": recent[-1] if recent else 0.0,
+        }
+
+
+_lock = threading.Lock()
+_histograms: dict[str, Histogram] = {}
+_counters = Counter()
+_collectors: dict[str, Callable[[], dict]] = {}
+
+
+def observe(name: str, elapsed_ms: float, error: bool = False):
+    """
+    Records the duration of a span.
+
+    Args:
+        name (str): The span name, e.g. "tool.search_notes".
+        elapsed_ms (float): The duration in milliseconds.
+        error (bool): Whether the span ended with an exception.
+    Returns:
+        None
+    """
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(elapsed_ms, error)
+
+
+def increment(name: str, value: int = 1):
+    """
+    Increments a counter.
+
+    Args:
+        name (str): The counter name.
+        value (int): The amount to add.
+    Returns:
+        None
+    """
+    if ENABLED:
+        with _lock:
+            _counters[name] += value
+
+
+def register_collector(name: str, collect: Callable[[], dict]):
+    """
+    Registers a function reporting gauges kept by another component.
+
+    Args:
+        name (str): The group name of the gauges, e.g. "embedding_cache".
+        collect (Callable[[], dict]): Returns the current numeric values, by name.
+    Returns:
+        None
+    """
+    _collectors[name] = collect
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.name, (time.perf_counter() - self.start) * 1000, exc_type is not None)
+        return False
+
+
+_DISABLED_SPAN = contextlib.nullcontext()
+
+
+def span(name: str):
+    """
+    Returns a context manager timing the enclosed block under `name`.
+
+    Args:
+        name (str): The span name.
+
+    Returns:
+        A context manager, doing nothing when metrics are disabled.
+    """
+    return _Span(name) if ENABLED else _DISABLED_SPAN
+
+
+def timed(name: str):
+    """
+    Decorator timing every call of a function, sync or async, under `name`.
+    When metrics are disabled the function is returned unchanged.
+
+    Args:
+        name (str): The span name.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(function):
+        if not ENABLED:
+            return function
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with _Span(name):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with _Span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_methods(cls: type, prefix: str) -> type:
+    """
+    Times every public method of a class, as `prefix.method`.
+
+    Args:
+        cls (type): The class to instrument, in place.
+        prefix (str): The prefix of the span names.
+
+    Returns:
+        type: The class.
+    """
+    if not ENABLED:
+        return cls
+    for attribute, value in list(vars(cls).items()):
+        if attribute.startswith("_") or not inspect.isfunction(value):
+            continue
+        if inspect.isgeneratorfunction(value) or inspect.isasyncgenfunction(value):
+            continue
+        setattr(cls, attribute, timed(f"{prefix}.{attribute}")(value))
+    return cls
+
+
+def snapshot() -> dict:
+    """
+    Returns the current metrics.
+
+    Returns:
+        dict: The summary of each span under "spans", the "counters", and the
+            values of each registered collector under "gauges".
+    """
+    with _lock:
+        spans = {name: histogram.summary() for name, histogram in sorted(_histograms.items())}
+        counters = dict(sorted(_counters.items()))
+    gauges = {}
+    for name, collect in _collectors.items():
+        try:
+            gauges[name] = collect()
+        except Exception as e:
+            LOG.debug(f"Metrics collector {name} failed: {e}")
+    return {"spans": spans, "counters": counters, "gauges": gauges}
+
+
+def _metric_name(name: str) -> str:
+    return "notia_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def to_prometheus() -> str:
+    """
+    Renders the metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: The metrics text.
+    """
+    lines = [
+        "# HELP notia_span_duration_ms Duration of instrumented operations.",
+        "# TYPE notia_span_duration_ms histogram",
+    ]
+    with _lock:
+        histograms = [
+            (name, h.count, h.errors, h.total_ms, list(h.buckets))
+            for name, h in sorted(_histograms.items())
+        ]
+        counters = sorted(_counters.items())
+    for name, count, errors, total_ms, buckets in histograms:
+        cumulative = 0
+        for bound, bucket in zip(BUCKETS_MS + ("+Inf",), buckets):
+            cumulative += bucket
+            labels = f'span="{name}",le="{bound}"'
+            lines.append(f"notia_span_duration_ms_bucket{{{labels}}} {cumulative}")
+        lines.append(f'notia_span_duration_ms_sum{{span="{name}"}} {total_ms:.3f}')
+        lines.append(f'notia_span_duration_ms_count{{span="{name}"}} {count}')
+    lines.append("# TYPE notia_span_errors_total counter")
+    for name, _, errors, _, _ in histograms:
+        lines.append(f'notia_span_errors_total{{span="{name}"}} {errors}')
+    for name, value in counters:
+        metric = _metric_name(name) + "_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for group, values in snapshot()["gauges"].items():
+        for key, value in values.items():
+            if isinstance(value, (int, float)):
+                metric = _metric_name(f"{group}_{key}")
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def dump_prometheus(path: str = PROMETHEUS_FILE):
+    """
+    Writes the metrics to a file in Prometheus text format, atomically, so it can
+    be read by the node exporter textfile collector.
+
+    Args:
+        path (str): The file to write.
+    Returns:
+        None
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(to_prometheus())
+    os.replace(tmp_path, path)
+
+
+_dump_thread: Optional[threading.Thread] = None
+
+
+def start_prometheus_dump(path: str = PROMETHEUS_FILE, interval: float = PROMETHEUS_INTERVAL):
+    """
+    Writes the Prometheus file every `interval` seconds and at exit, if a path is set.
+
+    Args:
+        path (str): The file to write, nothing is written if empty.
+        interval (float): Seconds between two writes.
+    Returns:
+        None
+    """
+    global _dump_thread
+    if not ENABLED or not path or _dump_thread is not None:
+        return
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                dump_prometheus(path)
+            except OSError as e:
+                LOG.warning(f"Could not write metrics to {path}: {e}")
+
+    _dump_thread = threading.Thread(target=run, name="notia-metrics-dump", daemon=True)
+    _dump_thread.start()
+    atexit.register(dump_prometheus, path)
@@ -0,0 +1,65 @@
+import datetime
+from typing import Optional
+
+
+def note_filter(
+    project: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+) -> Optional[dict]:
+    """
+    Builds a ChromaDB metadata filter selecting notes by project and date.
+
+    Dates are compared with the numeric `timestamp_epoch` of the notes, so the
+    filter is evaluated by ChromaDB instead of scanning the collection.
+
+    Args:
+        project (str, optional): Only select notes of this project.
+        since (datetime.datetime, optional): Only select notes written at or after this time.
+        until (datetime.datetime, optional): Only select notes written at or before this time.
+
+    Returns:
+        dict: The `where` filter, or None if no condition is given.
+    """
+    conditions = []
+    if project is not None:
+        conditions.append({"project": project})
+    if since is not None:
+        conditions.append({"timestamp_epoch": {"$gte": since.timestamp()}})
+    if until is not None:
+        conditions.append({"timestamp_epoch": {"$lte": until.timestamp()}})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def matches_filter(metadata: dict, where: Optional[dict]) -> bool:
+    """
+    Evaluates a filter built by `note_filter` against the metadata of a note that
+    is not stored in ChromaDB yet.
+
+    Args:
+        metadata (dict): The metadata of the note.
+        where (dict, optional): The filter, None matches every note.
+
+    Returns:
+        bool: Whether the note matches the filter.
+    """
+    if not where:
+        return True
+    if "$and" in where:
+        return all(matches_filter(metadata, condition) for condition in where["$and"])
+    for key, condition in where.items():
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, operand in condition.items():
+            if operator == "$eq" and value != operand:
+                return False
+            if operator == "$in" and value not in operand:
+                return False
+            if operator == "$gte" and (value is None or value < operand):
+                return False
+            if operator == "$lte" and (value is None or value > operand):
+                return False
+    return True
@@ -0,0 +1,228 @@
+import logging
+import sqlite3
+import threading
+from typing import Iterable
+
+LOG = logging.getLogger(__name__)
+
+
+class ProjectCatalog:
+    """
+    Persistent index of projects with their note counts, stored in SQLite.
+
+    The catalog is kept up to date incrementally by the vector store, so listing
+    projects does not require scanning the notes. Notes without a project are
+    counted under the empty name, which keeps the catalog total equal to the
+    number of notes. The project and timestamp of every note are kept as well,
+    so the last update of a project is recomputed exactly when notes are removed.
+
+    The store calls `begin` before writing notes and `apply` after. Writes begun
+    but never applied, as after a crash between the two, make the catalog stale.
+    Attributes:
+        path (str): Path of the SQLite database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS projects (
+                name TEXT PRIMARY KEY,
+                note_count INTEGER NOT NULL,
+                last_updated TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS notes (
+                id TEXT PRIMARY KEY,
+                project TEXT NOT NULL,
+                timestamp TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS notes_by_project ON notes (project, timestamp);
+            CREATE TABLE IF NOT EXISTS state (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO state (key, value) VALUES ('pending_writes', 0);
+            """
+        )
+        self._conn.commit()
+
+    def begin(self):
+        """
+        Records that notes are about to be written, until the matching `apply`.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE state SET value = value + 1 WHERE key = 'pending_writes'"
+            )
+            self._conn.commit()
+
+    def apply(
+        self,
+        removed: Iterable[str] = (),
+        added: Iterable[tuple[str, str, str]] = (),
+    ):
+        """
+        Applies a change of the notes to the catalog, ending the write begun by `begin`.
+
+        Args:
+            removed (Iterable[str]): The ID of every note removed or overwritten.
+            added (Iterable[tuple[str, str, str]]): The ID, project and ISO timestamp
+                of every note written.
+        Returns:
+            None
+        """
+        with self._lock:
+            touched = set()
+            added = list(added)
+            for note_id in [*removed, *(note_id for note_id, _, _ in added)]:
+                row = self._conn.execute(
+                    "SELECT project FROM notes WHERE id = ?", (note_id,)
+                ).fetchone()
+                if row:
+                    self._conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+                    self._conn.execute(
+                        "UPDATE projects SET note_count = note_count - 1 WHERE name = ?",
+                        row,
+                    )
+                    touched.add(row[0])
+            for note_id, project, timestamp in added:
+                self._conn.execute(
+                    "INSERT INTO notes (id, project, timestamp) VALUES (?, ?, ?)",
+                    (note_id, project, timestamp),
+                )
+                self._conn.execute(
+                    """
+                    INSERT INTO projects (name, note_count, last_updated) VALUES (?, 1, ?)
+                    ON CONFLICT (name) DO UPDATE SET note_count = note_count + 1
+                    """,
+                    (project, timestamp),
+                )
+                touched.add(project)
+            self._conn.execute("DELETE FROM projects WHERE note_count <= 0")
+            # The last update of a project may be that of a removed note, recompute it
+            for project in touched:
+                self._conn.execute(
+                    """
+                    UPDATE projects SET last_updated = (
+                        SELECT MAX(timestamp) FROM notes WHERE project = projects.name
+                    ) WHERE name = ?
+                    """,
+                    (project,),
+                )
+            self._conn.execute(
+                "UPDATE state SET value = MAX(value - 1, 0) WHERE key = 'pending_writes'"
+            )
+            self._conn.commit()
+
+    def rebuild(self, notes: Iterable[tuple[str, dict]]):
+        """
+        Replaces the catalog content with the projects found in the given metadata.
+
+        Args:
+            notes (Iterable[tuple[str, dict]]): The ID and metadata of every note.
+        Returns:
+            None
+        """
+        LOG.info("Rebuilding project catalog.")
+        with self._lock:
+            self._conn.execute("DELETE FROM notes")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO notes (id, project, timestamp) VALUES (?, ?, ?)",
+                (
+                    (note_id, metadata.get("project", ""), metadata.get("timestamp", ""))
+                    for note_id, metadata in notes
+                ),
+            )
+            self._conn.execute("DELETE FROM projects")
+            self._conn.execute(
+                """
+                INSERT INTO projects (name, note_count, last_updated)
+                SELECT project, COUNT(*), MAX(timestamp) FROM notes GROUP BY project
+                """
+            )
+            self._conn.execute("UPDATE state SET value = 0 WHERE key = 'pending_writes'")
+            self._conn.commit()
+
+    def is_stale(self) -> bool:
+        """
+        Tells whether the catalog may not match the notes: a write was begun but
+        never applied, or the project counts do not match the notes recorded.
+
+        Returns:
+            bool: True if the catalog should be rebuilt.
+        """
+        with self._lock:
+            (pending,) = self._conn.execute(
+                "SELECT value FROM state WHERE key = 'pending_writes'"
+            ).fetchone()
+            counted = dict(
+                self._conn.execute("SELECT project, COUNT(*) FROM notes GROUP BY project")
+            )
+            counts = dict(self._conn.execute("SELECT name, note_count FROM projects"))
+        return pending > 0 or counted != counts
+
+    def total(self) -> int:
+        """
+        Returns the number of notes accounted for in the catalog.
+
+        Returns:
+            int: The sum of all note counts.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT COALESCE(SUM(note_count), 0) FROM projects").fetchone()
+        return row[0]
+
+    def count(self, project: str) -> int:
+        """
+        Returns the number of notes of a project.
+
+        Args:
+            project (str): The project name.
+
+        Returns:
+            int: The number of notes, 0 if the project is unknown.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT note_count FROM projects WHERE name = ?", (project,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def projects(self) -> list[str]:
+        """
+        Returns the names of all non-empty projects.
+
+        Returns:
+            list[str]: The sorted project names.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name FROM projects WHERE name != '' ORDER BY name"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self) -> list[dict]:
+        """
+        Returns the note count and last update time of every non-empty project.
+
+        Returns:
+            list[dict]: One dict per project, sorted by name.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, note_count, last_updated FROM projects WHERE name != '' ORDER BY name"
+            ).fetchall()
+        return [
+            {"project": name, "note_count": count, "last_updated": last_updated}
+            for name, count, last_updated in rows
+        ]
+
+    def close(self):
+        """Closes the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,119 @@
+import logging
+import os
+from collections import Counter
+from typing import Optional
+
+import metrics
+
+LOG = logging.getLogger(__name__)
+
+# How often each rerank path was taken, keyed by decision name
+RERANK_COUNTERS = Counter()
+
+FULL = "full"
+SHRUNK = "shrunk"
+SKIPPED_FEW_CANDIDATES = "skipped_few_candidates"
+SKIPPED_SEPARATED = "skipped_separated"
+TIMED_OUT = "timed_out"
+FAILED = "failed"
+
+
+class RerankPolicy:
+    """
+    Decides whether search candidates are worth sending to the rerank endpoint.
+
+    Reranking is skipped when there are no more candidates than results to return,
+    or when the best vector match is clearly separated from the others. Otherwise
+    only the candidates close enough to the best match are reranked.
+    Attributes:
+        separation_ratio (float): Share of the distance spread the gap between the
+            first two candidates must exceed to skip reranking.
+        window_ratio (float): Share of the distance spread, from the best match,
+            within which candidates are reranked.
+        budget_ms (float): Deadline of a rerank call, after which vector order is used.
+    """
+
+    def __init__(
+        self,
+        separation_ratio: Optional[float] = None,
+        window_ratio: Optional[float] = None,
+        budget_ms: Optional[float] = None,
+    ):
+        if separation_ratio is None:
+            separation_ratio = float(os.getenv("NOTIA_RERANK_SEPARATION", "0.5"))
+        if window_ratio is None:
+            window_ratio = float(os.getenv("NOTIA_RERANK_WINDOW", "0.6"))
+        if budget_ms is None:
+            budget_ms = float(os.getenv("NOTIA_RERANK_BUDGET_MS", "2000"))
+        self.separation_ratio = separation_ratio
+        self.window_ratio = window_ratio
+        self.budget_ms = budget_ms
+
+    def plan(
+        self, distances: list[Optional[float]], final_n_results: int
+    ) -> tuple[str, list[int]]:
+        """
+        Chooses which of the candidates to rerank.
+
+        The candidates may come from a rank fusion, so they are not necessarily
+        ordered by distance: the ones to rerank are chosen by their distance,
+        wherever they are in the list.
+
+        Args:
+            distances (list[Optional[float]]): The vector distance of each candidate,
+                None for candidates only found by the lexical search.
+            final_n_results (int): The number of results that will be returned.
+
+        Returns:
+            tuple[str, list[int]]: The decision and the positions of the candidates
+                to rerank, in increasing order.
+        """
+        if len(distances) <= final_n_results:
+            return SKIPPED_FEW_CANDIDATES, []
+
+        everything = list(range(len(distances)))
+        # Lexical-only candidates have no distance to compare, rerank them all
+        if any(distance is None for distance in distances):
+            return FULL, everything
+
+        by_distance = sorted(everything, key=lambda i: distances[i])
+        closest = distances[by_distance[0]]
+        spread = distances[by_distance[-1]] - closest
+        if spread <= 0:
+            return FULL, everything
+
+        if (distances[by_distance[1]] - closest) / spread >= self.separation_ratio:
+            return SKIPPED_SEPARATED, []
+
+        cutoff = closest + self.window_ratio * spread
+        within = sum(1 for distance in distances if distance <= cutoff)
+        count = max(within, final_n_results)
+        if count < len(distances):
+            return SHRUNK, sorted(by_distance[:count])
+        return FULL, everything
+
+
+def record(decision: str):
+    """
+    Counts a rerank decision.
+
+    Args:
+        decision (str): The decision taken.
+    Returns:
+        None
+    """
+    LOG.info(f"Rerank decision: {decision}")
+    RERANK_COUNTERS[decision] += 1
+
+
+def rerank_stats() -> dict[str, int]:
+    """
+    Returns how often each rerank path was taken.
+
+    Returns:
+        dict[str, int]: The count of each decision.
+    """
+    return dict(RERANK_COUNTERS)
+
+
+metrics.register_collector("rerank", rerank_stats)
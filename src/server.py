@@ -0,0 +1,692 @@
+import asyncio
+import csv
+import datetime
+import io
+import json
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Optional
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import metrics
+from core import setup_agent, setup_session, stream_query
+from models import Note
+from note_filters import note_filter
+from store import get_vector_store, set_writer
+
+if TYPE_CHECKING:
+    from agents import Agent
+    from history import CompactingSession
+    from vector_store import VectorStore
+
+LOG = logging.getLogger(__name__)
+
+# Time during which concurrent writes or search queries are gathered into one batch
+BATCH_WINDOW_MS = float(os.getenv("NOTIA_SERVER_BATCH_WINDOW_MS", "5"))
+
+# Maximum number of writes or search queries handled in one batch
+MAX_BATCH_SIZE = int(os.getenv("NOTIA_SERVER_MAX_BATCH", "64"))
+
+# Maximum number of conversations kept by the server, the least recently used idle ones are dropped
+MAX_SESSIONS = int(os.getenv("NOTIA_SERVER_MAX_SESSIONS", "256"))
+
+# Maximum size in bytes of a request body
+MAX_BODY_SIZE = 10 * 1024 * 1024
+
+# Number of notes per page of the /notes listing
+PAGE_SIZE = 100
+
+# Content type of the endpoints streaming their response
+STREAM_CONTENT_TYPES = {
+    "export": "text/csv; charset=utf-8",
+    "chat": "application/x-ndjson",
+}
+
+
+class HttpError(Exception):
+    """An error reported to the client with an HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str = ""):
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+class Request:
+    """
+    A parsed HTTP request.
+    Attributes:
+        method (str): The HTTP method.
+        path (str): The decoded path, without the query string.
+        query (dict): The query string parameters.
+        headers (dict): The headers, with lowercase names.
+        body (bytes): The raw body.
+        path_args (list[str]): The path segments following the resource name.
+    """
+
+    def __init__(self, method: str, path: str, query: dict, headers: dict, body: bytes):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.path_args: list[str] = []
+
+    def json(self) -> dict:
+        """Returns the body decoded as a JSON object."""
+        try:
+            payload = json.loads(self.body or b"{}")
+        except json.JSONDecodeError as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Invalid JSON body: {e}")
+        if not isinstance(payload, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "The JSON body must be an object.")
+        return payload
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get("connection", "").lower() != "close"
+
+
+class Batcher:
+    """
+    Gathers the items submitted concurrently into batches handled by a single worker.
+
+    The worker waits up to `window_ms` after the first item for others to arrive,
+    then hands the whole batch to `handle`, which returns one result per item.
+    Attributes:
+        handle (Callable): Async function processing a batch of items.
+        window_ms (float): Time during which items are gathered into one batch.
+        max_size (int): Maximum number of items of a batch.
+    """
+
+    def __init__(
+        self,
+        handle: Callable[[list], Awaitable[list]],
+        window_ms: float = BATCH_WINDOW_MS,
+        max_size: int = MAX_BATCH_SIZE,
+    ):
+        self.handle = handle
+        self.window_ms = window_ms
+        self.max_size = max_size
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Starts the worker on the running event loop."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the worker."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def submit(self, item):
+        """
+        Queues an item and waits for its result.
+
+        Args:
+            item: The item to process.
+
+        Returns:
+            The result of the item, or raises the exception of its batch.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window_ms / 1000
+            while len(batch) < self.max_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = await self.handle(items)
+            except Exception as e:
+                LOG.exception(f"Batch of {len(items)} items failed: {e}")
+                results = [e] * len(items)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+class WriteQueue:
+    """
+    Single writer of the vector store.
+
+    Every write of the server goes through one queue and runs on one thread, in
+    arrival order, so concurrent clients never interleave partial writes while
+    reads keep running in parallel. Consecutive additions are stored with one
+    `add_notes` call, which embeds them in a single request.
+    Attributes:
+        store (VectorStore): The vector store written to.
+    """
+
+    ADD = "add"
+    UPDATE = "update"
+    DELETE = "delete"
+
+    def __init__(self, store: "VectorStore"):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notia-writer")
+        self._batcher = Batcher(self._write)
+
+    def start(self):
+        """Starts the writer."""
+        self._batcher.start()
+
+    async def stop(self):
+        """Stops the writer once the running batch is stored."""
+        await self._batcher.stop()
+        self._executor.shutdown(wait=True)
+
+    async def add(self, note: Note):
+        """Queues the addition of a note and waits until it is stored."""
+        await self._batcher.submit((self.ADD, note))
+
+    async def update(self, note: Note):
+        """Queues the update of a note and waits until it is stored."""
+        await self._batcher.submit((self.UPDATE, note))
+
+    async def delete(self, note_id: str):
+        """Queues the deletion of a note and waits until it is done."""
+        await self._batcher.submit((self.DELETE, note_id))
+
+    def call(self, method: Callable, *args, **kwargs):
+        """
+        Runs a write method of the store on the writer thread and waits for its result.
+
+        Unlike the other methods, it can be called from any thread, and is used
+        for the writes of the agent's tools, which are synchronous.
+        """
+        return self._executor.submit(method, *args, **kwargs).result()
+
+    async def _write(self, operations: list[tuple[str, object]]) -> list:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._apply, operations)
+
+    def _apply(self, operations: list[tuple[str, object]]) -> list:
+        results = []
+        i = 0
+        while i < len(operations):
+            kind, value = operations[i]
+            if kind == self.ADD:
+                # Store the run of consecutive additions together
+                notes = []
+                while i < len(operations) and operations[i][0] == self.ADD:
+                    notes.append(operations[i][1])
+                    i += 1
+                try:
+                    self.store.add_notes(notes, batch_size=len(notes), max_concurrency=1)
+                    results.extend([None] * len(notes))
+                except Exception as e:
+                    LOG.exception(f"Could not store {len(notes)} notes: {e}")
+                    results.extend([e] * len(notes))
+                continue
+            try:
+                if kind == self.UPDATE:
+                    self.store.update_note(value)
+                else:
+                    self.store.delete_note(value)
+                results.append(None)
+            except Exception as e:
+                LOG.exception(f"Could not {kind} note: {e}")
+                results.append(e)
+            i += 1
+        return results
+
+
+class NotiaServer:
+    """
+    HTTP/JSON API over the Notia vector store and agent, for several local clients.
+
+    Endpoints:
+        GET /health: Liveness check.
+        GET /notes?project=&cursor=: Lists notes, a page at a time.
+        POST /notes {content, project, check_duplicates}: Adds a note.
+        GET /notes/{id}: Returns a note.
+        PUT /notes/{id} {content, project}: Overwrites a note.
+        DELETE /notes/{id}: Deletes a note.
+        POST /search {query, n_results, hybrid, rerank}: Searches notes.
+        GET /export?project=: Streams notes as CSV.
+        POST /chat {query, session_id}: Streams the agent's answer as JSON lines.
+    Attributes:
+        host (str): The interface to bind.
+        port (int): The port to bind.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8642):
+        self.host = host
+        self.port = port
+        self.store: Optional["VectorStore"] = None
+        self.writer: Optional[WriteQueue] = None
+        self._query_batcher = Batcher(self._embed_queries)
+        self._agent: Optional["Agent"] = None
+        self._agent_lock = asyncio.Lock()
+        self._sessions: OrderedDict[str, tuple["CompactingSession", asyncio.Lock]] = OrderedDict()
+        self._server: Optional[asyncio.Server] = None
+
+    async def start(self):
+        """Opens the vector store and starts listening."""
+        loop = asyncio.get_running_loop()
+        self.store = await loop.run_in_executor(None, get_vector_store)
+        self.writer = WriteQueue(self.store)
+        self.writer.start()
+        # The tools of the agent write to the shared store, through the same queue
+        set_writer(self.writer.call)
+        self._query_batcher.start()
+        metrics.start_prometheus_dump()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        LOG.info(f"Notia server listening on http://{self.host}:{self.port}")
+
+    async def serve_forever(self):
+        """Starts the server and serves until cancelled."""
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """Stops listening and flushes pending writes."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        await self._query_batcher.stop()
+        if self.writer:
+            set_writer(None)
+            await self.writer.stop()
+        if self.store:
+            await self.store.aclose()
+
+    async def _embed_queries(self, queries: list[str]) -> list:
+        """Embeds the search queries received concurrently with one request."""
+        loop = asyncio.get_running_loop()
+        embeddings = await loop.run_in_executor(None, self.store.embedding_function, queries)
+        return [list(embedding) for embedding in embeddings]
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as e:
+                    await self._send_json(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                await self._dispatch(request, writer)
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line.")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0) or 0)
+        if length > MAX_BODY_SIZE:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(length) if length else b""
+
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+        return Request(method.upper(), unquote(url.path), query, headers, body)
+
+    def _route(self, request: Request) -> tuple[Optional[Callable], str]:
+        parts = [part for part in request.path.split("/") if part]
+        request.path_args = parts[1:]
+        resource = "/".join(parts[:1] + ["*"] * len(parts[1:]))
+        routes = {
+            ("GET", "health"): self.health,
+            ("GET", "notes"): self.list_notes,
+            ("POST", "notes"): self.add_note,
+            ("GET", "notes/*"): self.get_note,
+            ("PUT", "notes/*"): self.update_note,
+            ("DELETE", "notes/*"): self.delete_note,
+            ("POST", "search"): self.search,
+            ("GET", "export"): self.export,
+            ("POST", "chat"): self.chat,
+            ("GET", "stats"): self.stats,
+        }
+        return routes.get((request.method, resource)), resource
+
+    async def _dispatch(self, request: Request, writer: asyncio.StreamWriter):
+        handler, resource = self._route(request)
+        try:
+            if handler is None:
+                raise HttpError(
+                    HTTPStatus.NOT_FOUND, f"No route for {request.method} {request.path}"
+                )
+            if resource in STREAM_CONTENT_TYPES:
+                await self._send_stream(
+                    writer, STREAM_CONTENT_TYPES[resource], handler(request), request.keep_alive
+                )
+            else:
+                created = request.method == "POST" and resource == "notes"
+                status = HTTPStatus.CREATED if created else HTTPStatus.OK
+                with metrics.span(f"server.{request.method} {resource}"):
+                    body = await handler(request)
+                await self._send_json(writer, status, body, request.keep_alive)
+        except HttpError as e:
+            await self._send_json(writer, e.status, {"error": str(e)}, request.keep_alive)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            raise
+        except Exception as e:
+            LOG.exception(f"Error handling {request.method} {request.path}: {e}")
+            await self._send_json(
+                writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}, request.keep_alive
+            )
+
+    @staticmethod
+    async def _send_json(
+        writer: asyncio.StreamWriter, status: HTTPStatus, body: dict, keep_alive: bool = True
+    ):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            (
+                f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode("latin-1")
+            + data
+        )
+        await writer.drain()
+
+    @staticmethod
+    async def _send_stream(
+        writer: asyncio.StreamWriter,
+        content_type: str,
+        chunks: AsyncIterator[str],
+        keep_alive: bool = True,
+    ):
+        # Fail before the headers are sent, so errors get a proper status
+        first = await anext(chunks, "")
+        writer.write(
+            (
+                f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\n"
+                "Transfer-Encoding: chunked\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode("latin-1")
+        )
+        chunk = first
+        try:
+            while chunk is not None:
+                if chunk:
+                    data = chunk.encode("utf-8")
+                    writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+                    await writer.drain()
+                chunk = await anext(chunks, None)
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            # The status was already sent, cut the response so the client sees it is incomplete
+            LOG.exception(f"Error while streaming a response: {e}")
+            writer.close()
+            return
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    def _note_json(note_id: str, content: str, metadata: dict) -> dict:
+        return {
+            "id": note_id,
+            "content": content,
+            "project": metadata.get("project", ""),
+            "timestamp": metadata.get("timestamp", ""),
+        }
+
+    async def list_notes(self, request: Request) -> dict:
+        """Returns a page of notes, optionally of one project and date range."""
+        try:
+            cursor = int(request.query.get("cursor", 0))
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "The cursor must be an integer.")
+        project = request.query.get("project")
+        where = self._note_filter(request.query)
+        dated = "since" in request.query or "until" in request.query
+
+        def read_page():
+            pages = self.store.iter_notes(where=where, page_size=PAGE_SIZE, offset=cursor)
+            page = next(pages, None)
+            if dated:
+                return page, self.store.count_notes(where=where)
+            return page, self.store.count_notes(project)
+
+        page, total = await asyncio.to_thread(read_page)
+        notes = []
+        if page:
+            notes = [
+                self._note_json(note_id, page["documents"][i], page["metadatas"][i])
+                for i, note_id in enumerate(page["ids"])
+            ]
+        next_cursor = cursor + len(notes)
+        return {
+            "notes": notes,
+            "total": total,
+            "next_cursor": next_cursor if next_cursor < total else None,
+        }
+
+    @staticmethod
+    def _note_filter(values: dict) -> Optional[dict]:
+        """Builds the metadata filter of the `project`, `since` and `until` parameters."""
+        try:
+            since, until = (
+                datetime.datetime.fromisoformat(values[key]) if values.get(key) else None
+                for key in ("since", "until")
+            )
+        except (TypeError, ValueError):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Dates must be in ISO format.")
+        return note_filter(values.get("project"), since, until)
+
+    async def health(self, request: Request) -> dict:
+        """Returns the status of the server."""
+        return {"status": "ok"}
+
+    async def stats(self, request: Request) -> dict:
+        """Returns the latency of the instrumented operations, the counters and the gauges."""
+        return metrics.snapshot()
+
+    async def get_note(self, request: Request) -> dict:
+        """Returns a single note."""
+        note_id = request.path_args[0]
+        note_data = await asyncio.to_thread(self.store.get_note, note_id)
+        if not note_data or not note_data.get("ids"):
+            raise HttpError(HTTPStatus.NOT_FOUND, f"No note found with ID: {note_id}")
+        return self._note_json(note_id, note_data["documents"][0], note_data["metadatas"][0])
+
+    async def add_note(self, request: Request) -> dict:
+        """Adds a note through the write queue, refusing near-duplicates if asked."""
+        payload = request.json()
+        content = payload.get("content")
+        if not isinstance(content, str) or not content.strip():
+            raise HttpError(HTTPStatus.BAD_REQUEST, "A non-empty 'content' is required.")
+
+        from tools import DUPLICATE_CHECK, DUPLICATE_THRESHOLD
+
+        if payload.get("check_duplicates", True) and DUPLICATE_CHECK != "off":
+            duplicate = await asyncio.to_thread(
+                self.store.find_near_duplicate,
+                content,
+                DUPLICATE_THRESHOLD,
+                semantic=DUPLICATE_CHECK == "semantic",
+            )
+            if duplicate:
+                duplicate_id, similarity = duplicate
+                raise HttpError(
+                    HTTPStatus.CONFLICT,
+                    f"Note is {similarity:.0%} similar to existing note {duplicate_id}.",
+                )
+
+        note = Note(content=content, project=payload.get("project", ""))
+        await self.writer.add(note)
+        return {"id": note.id}
+
+    async def update_note(self, request: Request) -> dict:
+        """Overwrites a note through the write queue."""
+        note_id = request.path_args[0]
+        payload = request.json()
+        content = payload.get("content")
+        if not isinstance(content, str):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "A 'content' string is required.")
+        note = Note(content=content, project=payload.get("project", ""), id=note_id)
+        await self.writer.update(note)
+        return {"id": note_id}
+
+    async def delete_note(self, request: Request) -> dict:
+        """Deletes a note through the write queue."""
+        note_id = request.path_args[0]
+        await self.writer.delete(note_id)
+        return {"id": note_id}
+
+    async def search(self, request: Request) -> dict:
+        """
+        Searches notes. The queries of concurrent searches are embedded together,
+        and the results are optionally reranked.
+        """
+        payload = request.json()
+        query = payload.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise HttpError(HTTPStatus.BAD_REQUEST, "A non-empty 'query' is required.")
+        try:
+            n_results = int(payload.get("n_results", 5))
+        except (TypeError, ValueError):
+            n_results = 0
+        if n_results <= 0:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "'n_results' must be a positive integer.")
+        search = self.store.hybrid_search if payload.get("hybrid", True) else self.store.search_notes
+
+        where = self._note_filter(payload)
+        query_embedding = await self._query_batcher.submit(query)
+        results = await asyncio.to_thread(
+            search, query, n_results=n_results, query_embedding=query_embedding, where=where
+        )
+
+        notes = [
+            {
+                **self._note_json(note_id, results["documents"][0][i], results["metadatas"][0][i]),
+                "distance": results["distances"][0][i],
+            }
+            for i, note_id in enumerate(results["ids"][0])
+        ]
+        if payload.get("rerank", False) and notes:
+            reranked = await self.store.rerank_documents(query, [note["content"] for note in notes])
+            for result in reranked:
+                notes[result["index"]]["rerank_score"] = result["relevance_score"]
+            notes.sort(key=lambda note: note.get("rerank_score", float("-inf")), reverse=True)
+        return {"results": notes}
+
+    async def export(self, request: Request) -> AsyncIterator[str]:
+        """Streams notes as CSV, one page at a time."""
+        pages = self.store.iter_notes(where=self._note_filter(request.query))
+
+        buffer = io.StringIO()
+        csv_writer = csv.writer(buffer)
+        csv_writer.writerow(["ID", "Content", "Project", "Timestamp"])
+        yield buffer.getvalue()
+        while True:
+            page = await asyncio.to_thread(next, pages, None)
+            if page is None:
+                break
+            buffer.seek(0)
+            buffer.truncate()
+            for i, note_id in enumerate(page["ids"]):
+                metadata = page["metadatas"][i]
+                project_name = metadata.get("project", "")
+                timestamp = metadata.get("timestamp", "")
+                csv_writer.writerow([note_id, page["documents"][i], project_name, timestamp])
+            yield buffer.getvalue()
+
+    async def _get_agent(self) -> "Agent":
+        async with self._agent_lock:
+            if self._agent is None:
+                self._agent = await asyncio.to_thread(setup_agent)
+        return self._agent
+
+    def _session(self, session_id: str) -> tuple["CompactingSession", asyncio.Lock]:
+        """
+        Returns the session of a conversation and the lock serializing its queries.
+
+        At most MAX_SESSIONS conversations are kept: past that, the least recently
+        used ones that are not answering a query are dropped, and start over if
+        their client comes back.
+        """
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            entry = (setup_session(f"notia-server-{session_id}"), asyncio.Lock())
+            self._sessions[session_id] = entry
+            idle = [key for key, (_, lock) in self._sessions.items() if not lock.locked()]
+            for key in idle[: max(0, len(self._sessions) - MAX_SESSIONS)]:
+                del self._sessions[key]
+        self._sessions.move_to_end(session_id)
+        return entry
+
+    async def chat(self, request: Request) -> AsyncIterator[str]:
+        """
+        Streams the agent's answer as JSON lines of `{"type", "value"}` events.
+
+        Each client chooses its conversation with `session_id`. Queries of the same
+        conversation are answered one after the other.
+        """
+        payload = request.json()
+        query = payload.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise HttpError(HTTPStatus.BAD_REQUEST, "A non-empty 'query' is required.")
+        session_id = str(payload.get("session_id", "default"))
+
+        agent = await self._get_agent()
+        session, lock = self._session(session_id)
+
+        async with lock:
+            async for kind, value in stream_query(agent, session, query):
+                yield json.dumps({"type": kind, "value": value}, ensure_ascii=False) + "\n"
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8642):
+    """
+    Runs the Notia API server until interrupted.
+
+    Args:
+        host (str): The interface to bind.
+        port (int): The port to bind.
+    Returns:
+        None
+    """
+    await NotiaServer(host, port).serve_forever()
@@ -0,0 +1,565 @@
+import hashlib
+import logging
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional, Sequence
+
+import chromadb
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+
+# Layouts of a sharded collection: one shard per project, or projects hashed into buckets
+PROJECT = "project"
+HASH = "hash"
+MODES = (PROJECT, HASH)
+
+# Number of record locations remembered to route writes without asking every shard
+LOCATION_CACHE_SIZE = 200_000
+
+DEFAULT_GET_INCLUDE = ("documents", "metadatas")
+DEFAULT_QUERY_INCLUDE = ("documents", "metadatas", "distances")
+RESULT_KEYS = ("documents", "metadatas", "embeddings")
+
+# Keys of the shard metadata describing the layout, the other keys are shared by all shards
+LAYOUT_KEYS = ("sharding", "shard_count", "project", "bucket")
+
+
+def shard_prefix(name: str) -> str:
+    """Returns the prefix of the names of the shards of a logical collection."""
+    return f"{name}-shard-"
+
+
+def collection_names(client: chromadb.ClientAPI) -> list[str]:
+    """Returns the names of the collections of a client."""
+    # Depending on the ChromaDB version, collections or their names are listed
+    return [getattr(collection, "name", collection) for collection in client.list_collections()]
+
+
+def shard_layout(client: chromadb.ClientAPI, name: str) -> Optional[tuple[str, int]]:
+    """
+    Returns the layout of an existing sharded collection.
+
+    Args:
+        client (chromadb.ClientAPI): The ChromaDB client.
+        name (str): The name of the logical collection.
+
+    Returns:
+        tuple[str, int]: The sharding mode and shard count, or None if the
+            collection is not sharded.
+    """
+    prefix = shard_prefix(name)
+    for shard_name in collection_names(client):
+        if shard_name.startswith(prefix):
+            metadata = client.get_collection(shard_name).metadata or {}
+            return metadata.get("sharding", PROJECT), int(metadata.get("shard_count", 0))
+    return None
+
+
+def _projects_in(where: Optional[dict]) -> Optional[set[str]]:
+    """Returns the projects a filter is restricted to, or None if it may match any project."""
+    if not where:
+        return None
+    if "$and" in where:
+        for condition in where["$and"]:
+            projects = _projects_in(condition)
+            if projects is not None:
+                return projects
+        return None
+    condition = where.get("project")
+    if isinstance(condition, str):
+        return {condition}
+    if isinstance(condition, dict):
+        if isinstance(condition.get("$eq"), str):
+            return {condition["$eq"]}
+        if isinstance(condition.get("$in"), list):
+            return set(condition["$in"])
+    return None
+
+
+def _select(values: Optional[Sequence], positions: list[int]) -> Optional[list]:
+    return None if values is None else [values[i] for i in positions]
+
+
+class ShardedCollection:
+    """
+    A logical collection whose records are spread over several ChromaDB collections.
+
+    Records are placed by the `project` of their metadata, either one shard per
+    project or projects hashed into a fixed number of buckets, so each HNSW index
+    stays small and operations filtered on a project only touch its shard. Other
+    reads fan out to the shards on a thread pool: queries merge the nearest
+    records of each shard by distance, and pages are read shard after shard.
+
+    It implements the part of the `chromadb.Collection` API used by `VectorStore`,
+    which uses it in place of a single collection.
+    Attributes:
+        client (chromadb.ClientAPI): The ChromaDB client.
+        name (str): The name of the logical collection, shards are named after it.
+        mode (str): PROJECT or HASH.
+        shard_count (int): The number of buckets in HASH mode.
+        shards (dict[str, chromadb.Collection]): The shards, by name.
+    """
+
+    def __init__(
+        self,
+        client: chromadb.ClientAPI,
+        name: str,
+        embedding_function=None,
+        mode: str = PROJECT,
+        shard_count: int = 16,
+        max_workers: int = 8,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown sharding mode '{mode}', expected one of {MODES}.")
+        self.client = client
+        self.name = name
+        self.mode = mode
+        self.shard_count = shard_count
+        self._embedding_function = embedding_function
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="notia-shard"
+        )
+        # Shard of each record seen, and number of records of a shard matching a filter.
+        # Lookups racing a write only remember what they found if no write happened
+        # meanwhile, which the generation tells
+        self._cache_lock = threading.Lock()
+        self._generation = 0
+        self._locations: dict[str, str] = {}
+        self._match_counts: dict[tuple[str, str], int] = {}
+        self.shards: dict[str, chromadb.Collection] = {}
+        prefix = shard_prefix(name)
+        for shard_name in sorted(collection_names(client)):
+            if shard_name.startswith(prefix):
+                self.shards[shard_name] = client.get_collection(
+                    shard_name, embedding_function=embedding_function
+                )
+        self._shared_metadata = self._common_metadata()
+
+    def _common_metadata(self) -> dict:
+        """Returns the metadata shared by all shards, without their layout keys."""
+        common = None
+        for shard in self.shards.values():
+            metadata = {
+                key: value
+                for key, value in (shard.metadata or {}).items()
+                if key not in LAYOUT_KEYS
+            }
+            if common is None:
+                common = metadata
+            else:
+                common = {key: value for key, value in common.items() if metadata.get(key) == value}
+        return common or {}
+
+    def _layout_metadata(self, project: str) -> dict:
+        metadata = {"sharding": self.mode, "shard_count": self.shard_count}
+        if self.mode == PROJECT:
+            metadata["project"] = project
+        else:
+            metadata["bucket"] = self._bucket(project)
+        return metadata
+
+    def _bucket(self, project: str) -> int:
+        return zlib.crc32(project.encode("utf-8")) % self.shard_count
+
+    def _shard_name(self, project: str) -> str:
+        if self.mode == PROJECT:
+            digest = hashlib.sha1(project.encode("utf-8")).hexdigest()[:16]
+            return f"{shard_prefix(self.name)}p{digest}"
+        return f"{shard_prefix(self.name)}h{self._bucket(project):03d}"
+
+    def _shard(self, project: str) -> chromadb.Collection:
+        """Returns the shard of a project, creating it if needed."""
+        shard_name = self._shard_name(project)
+        shard = self.shards.get(shard_name)
+        if shard is None:
+            with self._lock:
+                shard = self.shards.get(shard_name)
+                if shard is None:
+                    shard = self.client.get_or_create_collection(
+                        shard_name,
+                        embedding_function=self._embedding_function,
+                        metadata={**self._shared_metadata, **self._layout_metadata(project)},
+                    )
+                    self.shards = dict(sorted({**self.shards, shard_name: shard}.items()))
+        return shard
+
+    def _shards_for(self, where: Optional[dict]) -> list[chromadb.Collection]:
+        """Returns the shards that may hold records matching a filter."""
+        projects = _projects_in(where)
+        if projects is None:
+            return list(self.shards.values())
+        names = sorted({self._shard_name(project) for project in projects})
+        return [self.shards[name] for name in names if name in self.shards]
+
+    def _map(self, function: Callable, items: Iterable) -> list:
+        """Calls `function` on each item, concurrently when there are several."""
+        items = list(items)
+        if len(items) <= 1:
+            return [function(item) for item in items]
+        return list(self._executor.map(function, items))
+
+    def _remember(self, locations: dict[str, str], generation: Optional[int] = None):
+        """
+        Remembers the shard of records. Locations found by a lookup that started at
+        `generation` are dropped if a write happened since.
+        """
+        with self._cache_lock:
+            if generation is not None and generation != self._generation:
+                return
+            if len(self._locations) > LOCATION_CACHE_SIZE:
+                self._locations.clear()
+            self._locations.update(locations)
+
+    def _changed(self, ids: Optional[Iterable[str]] = ()):
+        """Forgets the location of records that were written, or of all records if None."""
+        with self._cache_lock:
+            self._generation += 1
+            self._match_counts.clear()
+            if ids is None:
+                self._locations.clear()
+            for record_id in ids or ():
+                self._locations.pop(record_id, None)
+
+    def _locate(self, ids: list[str]) -> dict[str, str]:
+        """
+        Returns the shard name of each existing record among `ids`.
+
+        Unknown records are looked up in every shard at once, and the records found
+        are remembered. Records not found are not, as they may be written next.
+        """
+        with self._cache_lock:
+            generation = self._generation
+            located = {
+                record_id: self._locations[record_id]
+                for record_id in ids
+                if record_id in self._locations
+            }
+        unknown = [record_id for record_id in ids if record_id not in located]
+        if unknown:
+            found = {
+                record_id: shard_name
+                for shard_name, shard_ids in self._map(
+                    lambda item: (item[0], item[1].get(ids=unknown, include=[])["ids"]),
+                    self.shards.items(),
+                )
+                for record_id in shard_ids
+            }
+            self._remember(found, generation)
+            located.update(found)
+        return located
+
+    @staticmethod
+    def _group(keys: list[str]) -> dict[str, list[int]]:
+        """Groups positions by key, in order."""
+        groups = {}
+        for position, key in enumerate(keys):
+            groups.setdefault(key, []).append(position)
+        return groups
+
+    @property
+    def metadata(self) -> dict:
+        return dict(self._shared_metadata)
+
+    def modify(self, metadata: dict):
+        """Sets the metadata of every shard, keeping their layout keys."""
+        self._shared_metadata = dict(metadata)
+        for shard in self.shards.values():
+            layout = {
+                key: value
+                for key, value in (shard.metadata or {}).items()
+                if key in LAYOUT_KEYS
+            }
+            shard.modify(metadata={**metadata, **layout})
+
+    def count(self) -> int:
+        """Returns the number of records of all shards."""
+        return sum(self._map(lambda shard: shard.count(), self.shards.values()))
+
+    def add(self, ids: list[str], documents=None, metadatas=None, embeddings=None):
+        """Adds new records to the shards of their projects."""
+        self._write("add", ids, documents, metadatas, embeddings)
+
+    def upsert(self, ids: list[str], documents=None, metadatas=None, embeddings=None):
+        """Adds or replaces records, moving those whose project changed to its shard."""
+        current = self._locate(ids)
+        targets = [self._shard_name(metadata.get("project", "")) for metadata in metadatas]
+        moved = [
+            record_id
+            for record_id, target in zip(ids, targets)
+            if current.get(record_id) not in (None, target)
+        ]
+        if moved:
+            self._delete_located(moved, current)
+        self._write("upsert", ids, documents, metadatas, embeddings)
+
+    def _write(self, method: str, ids: list[str], documents, metadatas, embeddings):
+        projects = [metadata.get("project", "") for metadata in metadatas]
+        groups = self._group(projects)
+        shards = {project: self._shard(project) for project in groups}
+
+        def write(item):
+            project, positions = item
+            getattr(shards[project], method)(
+                ids=_select(ids, positions),
+                documents=_select(documents, positions),
+                metadatas=_select(metadatas, positions),
+                embeddings=_select(embeddings, positions),
+            )
+
+        self._map(write, groups.items())
+        self._changed(ids)
+        self._remember(
+            {
+                record_id: shards[project].name
+                for project, positions in groups.items()
+                for record_id in _select(ids, positions)
+            }
+        )
+
+    def update(self, ids: list[str], documents=None, metadatas=None, embeddings=None):
+        """
+        Updates existing records. Records whose new metadata belongs to another shard
+        are moved there, with the fields not given copied from their current shard.
+        """
+        current = self._locate(ids)
+        in_place = []
+        moves = []
+        for position, record_id in enumerate(ids):
+            if record_id not in current:
+                LOG.warning(f"Cannot update record {record_id}, it does not exist.")
+                continue
+            target = (
+                self._shard_name(metadatas[position].get("project", ""))
+                if metadatas is not None
+                else current[record_id]
+            )
+            (in_place if target == current[record_id] else moves).append(position)
+
+        for shard_name, positions in self._group([current[ids[i]] for i in in_place]).items():
+            selected = [in_place[i] for i in positions]
+            self.shards[shard_name].update(
+                ids=_select(ids, selected),
+                documents=_select(documents, selected),
+                metadatas=_select(metadatas, selected),
+                embeddings=_select(embeddings, selected),
+            )
+
+        if moves:
+            moved_ids = _select(ids, moves)
+            old = self.get(ids=moved_ids, include=["documents", "metadatas", "embeddings"])
+            old_records = {
+                record_id: (old["documents"][i], old["embeddings"][i])
+                for i, record_id in enumerate(old["ids"])
+            }
+            self._delete_located(moved_ids, current)
+            self._write(
+                "add",
+                moved_ids,
+                [
+                    documents[i] if documents is not None else old_records[ids[i]][0]
+                    for i in moves
+                ],
+                _select(metadatas, moves),
+                [
+                    embeddings[i] if embeddings is not None else old_records[ids[i]][1]
+                    for i in moves
+                ],
+            )
+        self._changed()
+
+    def _delete_located(self, ids: list[str], located: dict[str, str]):
+        groups = self._group([located[record_id] for record_id in ids])
+        self._map(
+            lambda item: self.shards[item[0]].delete(ids=_select(ids, item[1])), groups.items()
+        )
+        self._changed(ids)
+
+    def delete(self, ids: Optional[list[str]] = None, where: Optional[dict] = None):
+        """Deletes records by ID, or the records matching a filter."""
+        if ids is not None:
+            located = self._locate(ids)
+            self._delete_located([record_id for record_id in ids if record_id in located], located)
+        elif where is not None:
+            self._map(lambda shard: shard.delete(where=where), self._shards_for(where))
+            # The deleted records are not known
+            self._changed(None)
+
+    @staticmethod
+    def _merge(results: list[dict], include: Sequence[str]) -> dict:
+        merged = {"ids": []}
+        for key in RESULT_KEYS:
+            merged[key] = [] if key in include else None
+        for result in results:
+            merged["ids"].extend(result["ids"])
+            for key in include:
+                if key in RESULT_KEYS and result.get(key) is not None:
+                    merged[key].extend(result[key])
+        if merged["embeddings"]:
+            merged["embeddings"] = np.asarray(merged["embeddings"])
+        merged["include"] = list(include)
+        return merged
+
+    def _matching(self, shard: chromadb.Collection, where: Optional[dict]) -> int:
+        """Returns the number of records of a shard matching a filter."""
+        if where is None:
+            return shard.count()
+        key = (shard.name, repr(where))
+        with self._cache_lock:
+            generation = self._generation
+            count = self._match_counts.get(key)
+        if count is None:
+            count = len(shard.get(where=where, include=[])["ids"])
+            with self._cache_lock:
+                if generation == self._generation:
+                    self._match_counts[key] = count
+        return count
+
+    def get(
+        self,
+        ids: Optional[list[str]] = None,
+        where: Optional[dict] = None,
+        include: Sequence[str] = DEFAULT_GET_INCLUDE,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> dict:
+        """
+        Gets records by ID or by filter. Pages defined by `limit` and `offset` are
+        read shard after shard, in the order of the shard names.
+        """
+        include = list(include)
+        if ids is not None:
+            located = self._locate(ids)
+            present = [record_id for record_id in ids if record_id in located]
+            groups = self._group([located[record_id] for record_id in present])
+            results = self._map(
+                lambda item: self.shards[item[0]].get(
+                    ids=_select(present, item[1]), where=where, include=include
+                ),
+                groups.items(),
+            )
+            return self._merge(results, include)
+
+        shards = self._shards_for(where)
+        if limit is None and not offset:
+            results = self._map(lambda shard: shard.get(where=where, include=include), shards)
+            return self._merge(results, include)
+
+        results = []
+        skip = offset or 0
+        remaining = limit
+        for shard in shards:
+            if remaining is not None and remaining <= 0:
+                break
+            if skip:
+                matching = self._matching(shard, where)
+                if skip >= matching:
+                    skip -= matching
+                    continue
+            page = shard.get(where=where, include=include, limit=remaining, offset=skip or None)
+            skip = 0
+            results.append(page)
+            if remaining is not None:
+                remaining -= len(page["ids"])
+        return self._merge(results, include)
+
+    def query(
+        self,
+        query_embeddings: list,
+        n_results: int = 10,
+        where: Optional[dict] = None,
+        include: Sequence[str] = DEFAULT_QUERY_INCLUDE,
+    ) -> dict:
+        """
+        Queries the shards that may hold matching records concurrently, and keeps the
+        `n_results` nearest records of all shards for each query.
+        """
+        include = list(include)
+        shard_include = include if "distances" in include else include + ["distances"]
+        results = self._map(
+            lambda shard: shard.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=where,
+                include=shard_include,
+            ),
+            self._shards_for(where),
+        )
+        keys = ["ids", "distances"] + [key for key in RESULT_KEYS if key in include]
+        merged = {key: [] for key in keys}
+        for query_index in range(len(query_embeddings)):
+            hits = sorted(
+                (
+                    (distance, result, position)
+                    for result in results
+                    for position, distance in enumerate(result["distances"][query_index])
+                ),
+                key=lambda hit: hit[0],
+            )[:n_results]
+            for key in keys:
+                merged[key].append([result[key][query_index][i] for _, result, i in hits])
+        for key in RESULT_KEYS:
+            merged.setdefault(key, None)
+        merged["include"] = include
+        return merged
+
+    def close(self):
+        """Stops the fan-out threads."""
+        self._executor.shutdown(wait=True)
+
+
+def migrate_collection(
+    client: chromadb.ClientAPI,
+    name: str,
+    embedding_function=None,
+    mode: str = PROJECT,
+    shard_count: int = 16,
+    max_workers: int = 8,
+    page_size: int = 1000,
+    progress: Optional[Callable[[int], None]] = None,
+) -> ShardedCollection:
+    """
+    Moves the records of a single collection into shards, with their embeddings.
+
+    The single collection is only deleted once every record is copied, so an
+    interrupted migration is resumed by running it again.
+
+    Args:
+        client (chromadb.ClientAPI): The ChromaDB client.
+        name (str): The name of the collection to shard.
+        embedding_function: The embedding function of the collection.
+        mode (str): PROJECT or HASH.
+        shard_count (int): The number of buckets in HASH mode.
+        max_workers (int): The number of threads of the fan-out reads.
+        page_size (int): The number of records copied at a time.
+        progress (Callable[[int], None], optional): Called with the number of
+            records copied after each page.
+
+    Returns:
+        ShardedCollection: The sharded collection.
+    """
+    sharded = ShardedCollection(client, name, embedding_function, mode, shard_count, max_workers)
+    if name not in collection_names(client):
+        return sharded
+    source = client.get_collection(name, embedding_function=embedding_function)
+    metadata = source.metadata or {}
+    sharded.modify({key: value for key, value in metadata.items() if not key.startswith("hnsw:")})
+    copied = 0
+    while True:
+        page = source.get(
+            include=["documents", "metadatas", "embeddings"], limit=page_size, offset=copied
+        )
+        if not page["ids"]:
+            break
+        # Resumed migrations overwrite the records already copied
+        sharded._write(
+            "upsert", page["ids"], page["documents"], page["metadatas"], page["embeddings"]
+        )
+        copied += len(page["ids"])
+        if progress:
+            progress(copied)
+    client.delete_collection(name)
+    LOG.info(f"Moved {copied} records of {name} into {len(sharded.shards)} shards.")
+    return sharded
@@ -0,0 +1,186 @@
+import datetime
+import json
+import os
+import struct
+import zlib
+from typing import BinaryIO, Iterator, Optional
+
+import numpy as np
+
+MAGIC = b"NOTIASNP"
+FORMAT_VERSION = 1
+
+# Kinds of record blocks
+NOTES = 1
+CHUNKS = 2
+
+# Format version, number of notes, number of chunks, length of the JSON header
+_HEADER = struct.Struct("<HQQI")
+# Kind, number of records, embedding dimension, compressed JSON length, embeddings length
+_BLOCK = struct.Struct("<BIIIQ")
+
+
+class SnapshotBlock:
+    """
+    A block of records of a snapshot.
+    Attributes:
+        kind (int): NOTES or CHUNKS.
+        ids (list[str]): The record IDs.
+        documents (list[str]): The record documents.
+        metadatas (list[dict]): The record metadata.
+        embeddings (np.ndarray): The record embeddings, one float32 row per record.
+    """
+
+    def __init__(
+        self,
+        kind: int,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict],
+        embeddings: np.ndarray,
+    ):
+        self.kind = kind
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.embeddings = embeddings
+
+
+class SnapshotWriter:
+    """
+    Writes a snapshot file of the notes and chunks of a store, with their embeddings.
+
+    The file starts with a magic number, fixed-size counts and a JSON header holding
+    the embedding model. Records follow in blocks: the ids, documents and metadata
+    of a block are zlib-compressed JSON, and its embeddings raw little-endian float32,
+    so a block is written and read without any conversion of the vectors.
+    The file is written under a temporary name and only replaces `path` once complete.
+    Attributes:
+        path (str): The snapshot file.
+        header (dict): The JSON header.
+        counts (dict[int, int]): The number of records written of each kind.
+    """
+
+    def __init__(self, path: str, embedding_model: str, **header):
+        self.path = path
+        self.header = {
+            "embedding_model": embedding_model,
+            "created": datetime.datetime.now().isoformat(),
+            **header,
+        }
+        self.counts = {NOTES: 0, CHUNKS: 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._tmp_path = f"{path}.tmp"
+        self._file: BinaryIO = open(self._tmp_path, "wb")
+        self._write_header()
+
+    def _write_header(self):
+        header = json.dumps(self.header).encode("utf-8")
+        self._file.write(MAGIC)
+        self._file.write(
+            _HEADER.pack(FORMAT_VERSION, self.counts[NOTES], self.counts[CHUNKS], len(header))
+        )
+        self._file.write(header)
+
+    def write(
+        self,
+        kind: int,
+        ids: list[str],
+        documents: list[str],
+        metadatas: list[dict],
+        embeddings,
+    ):
+        """
+        Appends a block of records.
+
+        Args:
+            kind (int): NOTES or CHUNKS.
+            ids (list[str]): The record IDs.
+            documents (list[str]): The record documents.
+            metadatas (list[dict]): The record metadata.
+            embeddings: The record embeddings, as returned by the collection.
+        Returns:
+            None
+        """
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype="<f4")
+        records = zlib.compress(
+            json.dumps([ids, documents, metadatas], ensure_ascii=False).encode("utf-8")
+        )
+        data = vectors.tobytes()
+        self._file.write(_BLOCK.pack(kind, len(ids), vectors.shape[1], len(records), len(data)))
+        self._file.write(records)
+        self._file.write(data)
+        self.counts[kind] += len(ids)
+
+    def close(self):
+        """Writes the final counts and moves the complete file in place."""
+        self._file.seek(0)
+        self._write_header()
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Removes the incomplete file."""
+        self._file.close()
+        os.remove(self._tmp_path)
+
+
+class SnapshotReader:
+    """
+    Reads a snapshot file written by `SnapshotWriter`, one block at a time.
+    Attributes:
+        path (str): The snapshot file.
+        header (dict): The JSON header, with the embedding model.
+        counts (dict[int, int]): The number of records of each kind.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: BinaryIO = open(path, "rb")
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a Notia snapshot.")
+        version, notes, chunks, header_length = _HEADER.unpack(self._file.read(_HEADER.size))
+        if version > FORMAT_VERSION:
+            self._file.close()
+            raise ValueError(
+                f"{path} uses snapshot format {version}, newer than this version of Notia."
+            )
+        self.header = json.loads(self._file.read(header_length))
+        self.counts = {NOTES: notes, CHUNKS: chunks}
+
+    @property
+    def embedding_model(self) -> Optional[str]:
+        return self.header.get("embedding_model")
+
+    def blocks(self) -> Iterator[SnapshotBlock]:
+        """
+        Yields the blocks of records, in the order they were written.
+
+        Raises:
+            ValueError: If the file is truncated.
+        """
+        read = {NOTES: 0, CHUNKS: 0}
+        while True:
+            raw = self._file.read(_BLOCK.size)
+            if not raw:
+                break
+            if len(raw) < _BLOCK.size:
+                raise ValueError(f"{self.path} is truncated.")
+            kind, count, dimension, records_length, data_length = _BLOCK.unpack(raw)
+            records = self._file.read(records_length)
+            data = self._file.read(data_length)
+            if len(records) < records_length or len(data) < data_length:
+                raise ValueError(f"{self.path} is truncated.")
+            ids, documents, metadatas = json.loads(zlib.decompress(records))
+            embeddings = np.frombuffer(data, dtype="<f4").reshape(count, dimension)
+            read[kind] += count
+            yield SnapshotBlock(kind, ids, documents, metadatas, embeddings)
+        if read != self.counts:
+            raise ValueError(f"{self.path} is incomplete: read {read}, expected {self.counts}.")
+
+    def close(self):
+        """Closes the file."""
+        self._file.close()
@@ -0,0 +1,111 @@
+import functools
+import logging
+import threading
+from typing import Callable, Optional
+
+LOG = logging.getLogger(__name__)
+
+# Methods of the vector store that write to it
+WRITE_METHODS = {"add_note", "add_notes", "update_note", "delete_note"}
+
+_vector_store = None
+_vector_store_lock = threading.Lock()
+_writer: Optional[Callable] = None
+# Serializes the writes made without a writer, such as those of the CLI agent and the ingest queue
+_write_lock = threading.RLock()
+
+
+def get_vector_store():
+    """
+    Returns the shared vector store, creating it on first use.
+
+    Importing ChromaDB and opening the persistent client is slow, so it is
+    deferred until the store is actually needed.
+
+    Returns:
+        VectorStore: The shared vector store.
+    """
+    global _vector_store
+    if _vector_store is None:
+        with _vector_store_lock:
+            if _vector_store is None:
+                from vector_store import VectorStore
+
+                LOG.info("Opening vector store.")
+                _vector_store = VectorStore(write=write)
+    return _vector_store
+
+
+def vector_store_loaded() -> bool:
+    """
+    Tells whether the shared vector store has been created.
+
+    Returns:
+        bool: True if the store is open.
+    """
+    return _vector_store is not None
+
+
+def warm_up_vector_store() -> threading.Thread:
+    """
+    Opens the shared vector store in a background thread.
+
+    Returns:
+        threading.Thread: The thread opening the store.
+    """
+    thread = threading.Thread(target=get_vector_store, name="notia-store-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def set_writer(writer: Optional[Callable]):
+    """
+    Routes the writes made through `write`, by `vs` and the ingest queue, to a
+    single writer, such as the write queue of the API server, so they do not race
+    with the writes it makes itself.
+
+    Args:
+        writer (Callable, optional): Called with a bound write method of the store
+            and its arguments, it runs the method and returns its result. None
+            writes directly again.
+    Returns:
+        None
+    """
+    global _writer
+    _writer = writer
+
+
+def write(method: Callable, *args, **kwargs):
+    """
+    Runs a write of the shared vector store, through the writer if one is set,
+    and otherwise one write at a time.
+
+    Args:
+        method (Callable): The write method, or a function writing to the store.
+        *args: The positional arguments of the method.
+        **kwargs: The keyword arguments of the method.
+    Returns:
+        The result of the method.
+    """
+    writer = _writer
+    if writer is not None:
+        return writer(method, *args, **kwargs)
+    with _write_lock:
+        return method(*args, **kwargs)
+
+
+class LazyVectorStore:
+    """
+    Proxy to the shared vector store, which is only created when first used.
+    Its write methods run through `write`.
+    """
+
+    def __getattr__(self, name: str):
+        attribute = getattr(get_vector_store(), name)
+        if name in WRITE_METHODS:
+            return functools.partial(write, attribute)
+        return attribute
+
+
+# Shared vector store, opened on first use
+vs = LazyVectorStore()
@@ -0,0 +1,97 @@
+import json
+import os
+from typing import Optional
+
+# Maximum number of characters of note data returned to the model by a tool call
+TOOL_OUTPUT_BUDGET = int(os.getenv("NOTIA_TOOL_OUTPUT_BUDGET", "4000"))
+
+# Maximum number of characters of a note's content shown in a list preview
+PREVIEW_LENGTH = int(os.getenv("NOTIA_PREVIEW_LENGTH", "200"))
+
+
+def preview(content: str, length: int = PREVIEW_LENGTH) -> str:
+    """
+    Shortens a note's content to a single-line preview.
+
+    Args:
+        content (str): The content of the note.
+        length (int): The maximum length of the preview.
+
+    Returns:
+        str: The preview, ending with an ellipsis if the content was cut.
+    """
+    flat = " ".join(content.split())
+    return flat if len(flat) <= length else flat[: length - 1] + "…"
+
+
+def shape_notes(
+    notes_data: dict,
+    cursor: int = 0,
+    total: Optional[int] = None,
+    budget: int = TOOL_OUTPUT_BUDGET,
+) -> dict:
+    """
+    Builds a compact, size-bounded page of notes to return to the model.
+
+    Notes are returned as previews with their ID and metadata, until the page
+    reaches the character budget. At least one note is always returned.
+
+    Args:
+        notes_data (dict): The notes starting at `cursor`, as returned by `collection.get`.
+        cursor (int): The position of the first note in the full listing.
+        total (int, optional): The number of notes in the full listing, if known.
+        budget (int): The maximum size in characters of the notes returned.
+
+    Returns:
+        dict: The page of `notes`, the `total`, and the `next_cursor` to pass back to
+            the tool to get the following notes, or None if there are no more.
+    """
+    notes = []
+    used = 0
+    for i, note_id in enumerate(notes_data["ids"]):
+        metadata = notes_data["metadatas"][i]
+        content = notes_data["documents"][i]
+        note = {
+            "id": note_id,
+            "preview": preview(content),
+            "length": len(content),
+            "project": metadata.get("project", ""),
+            "timestamp": metadata.get("timestamp", ""),
+        }
+        size = len(json.dumps(note, ensure_ascii=False))
+        if notes and used + size > budget:
+            break
+        notes.append(note)
+        used += size
+
+    next_cursor = cursor + len(notes)
+    has_more = (
+        next_cursor < total if total is not None else len(notes) < len(notes_data["ids"])
+    )
+    return {
+        "notes": notes,
+        "total": total,
+        "next_cursor": next_cursor if has_more else None,
+    }
+
+
+def shape_content(content: str, offset: int = 0, budget: int = TOOL_OUTPUT_BUDGET) -> dict:
+    """
+    Returns a window of a note's content within the character budget.
+
+    Args:
+        content (str): The full content of the note.
+        offset (int): The position of the first character to return.
+        budget (int): The maximum number of characters returned.
+
+    Returns:
+        dict: The `content` window, the full `length`, and the `next_offset` to read
+            the rest, or None if the end was reached.
+    """
+    window = content[offset : offset + budget]
+    end = offset + len(window)
+    return {
+        "content": window,
+        "length": len(content),
+        "next_offset": end if end < len(content) else None,
+    }
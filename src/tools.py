@@ -1,73 +1,136 @@
+import asyncio
 import logging
 from agents import function_tool
 from models import Note
 from rich.table import Table
 from console import console
-from vector_store import vs
+from store import vs
+from note_filters import note_filter
+from rerank_policy import FAILED, TIMED_OUT, RerankPolicy, record
+from tool_output import shape_content, shape_notes
+from metrics import span, timed
 import csv
 import os
 import json
 import datetime
-from notia_analyzer import analyze_notes_content, extract_keywords #ty: ignore[unresolved-import]
+import functools
+import hashlib
+import uuid
+from typing import Optional
 
 LOG = logging.getLogger(__name__)
 
+# Minimum similarity for a new note to be considered a near-duplicate
+DUPLICATE_THRESHOLD = float(os.getenv("NOTIA_DUPLICATE_THRESHOLD", "0.9"))
+
+# How new notes are checked for near-duplicates: "lexical" compares them with the notes
+# sharing the most terms, "semantic" with the nearest notes by embedding, "off" skips the check
+DUPLICATE_CHECK = os.getenv("NOTIA_DUPLICATE_CHECK", "lexical").lower()
+
+# Decides when search results are reranked
+rerank_policy = RerankPolicy()
+
+# Whether add_note returns as soon as the note is journaled, storing it in the background
+WRITE_BEHIND = os.getenv("NOTIA_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+
 
 @function_tool
-def add_note(content: str, project: str = "") -> str:
+@timed("tool.add_note")
+def add_note(content: str, project: str = "", check_duplicates: bool = True) -> str:
     """
     Adds a new note with content and optional project.
 
     Args:
         content (str): The main content of the note.
         project (str, optional): The project name for this note. Defaults to "".
+        check_duplicates (bool, optional): Whether to refuse the note if a nearly identical note already exists. Defaults to True.
+            The check is configured by NOTIA_DUPLICATE_CHECK.
 
     Returns:
         str: A confirmation message with the new note's ID.
     """
     LOG.info("Tool called: add_note")
+    if check_duplicates and DUPLICATE_CHECK != "off":
+        # With write-behind, the note is not embedded during the turn, so neither is the check
+        duplicate = vs.find_near_duplicate(
+            content,
+            threshold=DUPLICATE_THRESHOLD,
+            semantic=DUPLICATE_CHECK == "semantic" and not WRITE_BEHIND,
+        )
+        if duplicate:
+            note_id, similarity = duplicate
+            return (
+                f"Note not added: it is a near-duplicate (similarity {similarity:.2f}) "
+                f"of the note with ID: {note_id}. Call add_note with check_duplicates=False to add it anyway."
+            )
     note = Note(content=content, project=project)
+    if WRITE_BEHIND:
+        vs.enqueue_note(note)
+        return f"Note queued with ID: {note.id}. It is saved and will be searchable in a moment."
     vs.add_note(note)
     return f"Note added successfully with ID: {note.id}"
 
 
+# Number of notes fetched to build one page of tool output
+TOOL_PAGE_SIZE = 100
+
+EMPTY_PAGE = {"ids": [], "documents": [], "metadatas": []}
+
+
 @function_tool
-def list_all_notes() -> dict:
+@timed("tool.list_all_notes")
+def list_all_notes(cursor: int = 0, since: str = "", until: str = "") -> dict:
     """
-    Lists all notes, displaying them to the user in a formatted table and returning the raw data.
+    Lists all notes, displaying them to the user in a formatted table and returning a page of previews.
     The user has already seen the formatted table in the console.
 
+    Args:
+        cursor (int, optional): The `next_cursor` of a previous call, to get the following notes
+            without displaying the table again. Defaults to 0.
+        since (str, optional): Only list notes written on or after this ISO date (e.g. "2025-01-31").
+        until (str, optional): Only list notes written on or before this ISO date.
+
     Returns:
-        dict: The raw data of all notes from the vector store.
+        dict: The `notes` of the page with their ID, a content preview, length, project and timestamp,
+            the `total` number of notes, and the `next_cursor`, or None if all notes were returned.
+            Use get_note_by_id to read the full content of a note.
     """
-    LOG.info("Tool called: list_all_notes")
+    LOG.info(f"Tool called: list_all_notes with cursor: {cursor}, since: '{since}', until: '{until}'")
 
-    notes_data = vs.get_all_notes()
+    try:
+        where = note_filter(since=_parse_date(since), until=_parse_date(until, end_of_day=True))
+    except ValueError as e:
+        return {"error": f"Invalid date: {e}"}
 
-    if not notes_data or not notes_data.get("ids"):
-        console.print("[bold yellow]No notes found.[/bold yellow]")
-        return {}
+    if cursor == 0:
+        table = Table(show_header=True, header_style="bold magenta")
+        table.add_column("ID", style="dim", width=36)
+        table.add_column("Content")
+        table.add_column("Project")
+        table.add_column("Timestamp")
 
-    table = Table(show_header=True, header_style="bold magenta")
-    table.add_column("ID", style="dim", width=36)
-    table.add_column("Content")
-    table.add_column("Project")
-    table.add_column("Timestamp")
+        for page in vs.iter_notes(where=where):
+            for i, note_id in enumerate(page["ids"]):
+                content = page["documents"][i]
+                metadata = page["metadatas"][i]
+                project = metadata.get("project", "")
+                timestamp = metadata.get("timestamp", "")
 
-    for i, note_id in enumerate(notes_data["ids"]):
-        content = notes_data["documents"][i]
-        metadata = notes_data["metadatas"][i]
-        project = metadata.get("project", "")
-        timestamp = metadata.get("timestamp", "")
+                table.add_row(note_id, content, project, timestamp)
 
-        table.add_row(note_id, content, project, timestamp)
+        if not table.row_count:
+            console.print("[bold yellow]No notes found.[/bold yellow]")
+            return {}
 
-    console.print(table)
+        with span("render.table"):
+            console.print(table)
 
-    return notes_data
+    page = next(vs.iter_notes(where=where, page_size=TOOL_PAGE_SIZE, offset=cursor), EMPTY_PAGE)
+    return shape_notes(page, cursor=cursor, total=vs.count_notes(where=where))
 
 
 @function_tool
+@timed("tool.delete_note")
 def delete_note(note_id: str) -> str:
     """
     Deletes a note specified by its unique ID.
@@ -84,6 +147,7 @@ def delete_note(note_id: str) -> str:
 
 
 @function_tool
+@timed("tool.edit_note")
 def edit_note(note_id: str, new_content: str, new_project: str = "") -> str:
     """
     Overwrites an existing note with new content and project.
@@ -112,17 +176,21 @@ def edit_note(note_id: str, new_content: str, new_project: str = "") -> str:
 
 
 @function_tool
-def get_note_by_id(note_id: str) -> dict:
+@timed("tool.get_note_by_id")
+def get_note_by_id(note_id: str, offset: int = 0) -> dict:
     """
     Retrieves and displays a single note by its ID.
 
     Args:
         note_id (str): The exact ID of the note to retrieve.
+        offset (int, optional): The `next_offset` of a previous call, to read the rest of a long
+            note without displaying it again. Defaults to 0.
 
     Returns:
-        dict: The raw data of the note from the vector store.
+        dict: The note's `id`, `project`, `timestamp`, a window of its `content`, its full `length`,
+            and the `next_offset` to read further, or None if the end of the note was reached.
     """
-    LOG.info(f"Tool called: get_note_by_id with id: {note_id}")
+    LOG.info(f"Tool called: get_note_by_id with id: {note_id}, offset: {offset}")
 
     note_data = vs.get_note(note_id)
 
@@ -130,67 +198,99 @@ def get_note_by_id(note_id: str) -> dict:
         console.print(f"[bold yellow]No note found with ID: {note_id}[/bold yellow]")
         return {}
 
-    table = Table(show_header=True, header_style="bold green")
-    table.add_column("ID", style="dim", width=36)
-    table.add_column("Content")
-    table.add_column("Project")
-    table.add_column("Timestamp")
-
     content = note_data["documents"][0]
     metadata = note_data["metadatas"][0]
     project = metadata.get("project", "")
     timestamp = metadata.get("timestamp", "")
 
-    table.add_row(note_id, content, project, timestamp)
+    if offset == 0:
+        table = Table(show_header=True, header_style="bold green")
+        table.add_column("ID", style="dim", width=36)
+        table.add_column("Content")
+        table.add_column("Project")
+        table.add_column("Timestamp")
 
-    console.print(table)
+        table.add_row(note_id, content, project, timestamp)
+
+        with span("render.table"):
+            console.print(table)
 
-    return note_data
+    return {
+        "id": note_id,
+        "project": project,
+        "timestamp": timestamp,
+        **shape_content(content, offset=offset),
+    }
 
 
 @function_tool
-def search_notes_by_project(project: str) -> dict:
+@timed("tool.search_notes_by_project")
+def search_notes_by_project(
+    project: str, cursor: int = 0, since: str = "", until: str = ""
+) -> dict:
     """
-    Searches for notes by project and displays them to the user.
+    Searches for notes by project, displaying them to the user and returning a page of previews.
 
     Args:
         project (str): The project name to search for.
+        cursor (int, optional): The `next_cursor` of a previous call, to get the following notes
+            without displaying the table again. Defaults to 0.
+        since (str, optional): Only list notes written on or after this ISO date (e.g. "2025-01-31").
+        until (str, optional): Only list notes written on or before this ISO date.
 
     Returns:
-        dict: The raw search result data from the vector store.
+        dict: The `notes` of the page with their ID, a content preview, length, project and timestamp,
+            the `total` number of notes in the project, and the `next_cursor`, or None if all notes
+            were returned. Use get_note_by_id to read the full content of a note.
     """
-    LOG.info(f"Tool called: search_notes_by_project with project: '{project}'")
+    LOG.info(f"Tool called: search_notes_by_project with project: '{project}', cursor: {cursor}")
 
-    notes_data = vs.get_notes_by_project(project)
-
-    if not notes_data or not notes_data.get("ids"):
-        console.print("[bold yellow]No matching notes found.[/bold yellow]")
-        return {}
-
-    table = Table(
-        title=f"Search Results for project: '{project}'",
-        show_header=True,
-        header_style="bold cyan",
+    try:
+        since_date = _parse_date(since)
+        until_date = _parse_date(until, end_of_day=True)
+    except ValueError as e:
+        return {"error": f"Invalid date: {e}"}
+    where = note_filter(project, since_date, until_date)
+    if cursor == 0:
+        table = Table(
+            title=f"Search Results for project: '{project}'",
+            show_header=True,
+            header_style="bold cyan",
+        )
+        table.add_column("ID", style="dim", width=36)
+        table.add_column("Content")
+        table.add_column("Project")
+        table.add_column("Timestamp")
+
+        for page in vs.iter_notes(where=where):
+            for i, note_id in enumerate(page["ids"]):
+                content = page["documents"][i]
+                metadata = page["metadatas"][i]
+
+                table.add_row(
+                    note_id,
+                    content,
+                    metadata.get("project", ""),
+                    metadata.get("timestamp", ""),
+                )
+
+        if not table.row_count:
+            console.print("[bold yellow]No matching notes found.[/bold yellow]")
+            return {}
+
+        with span("render.table"):
+            console.print(table)
+
+    page = next(
+        vs.iter_notes(where=where, page_size=TOOL_PAGE_SIZE, offset=cursor), EMPTY_PAGE
     )
-    table.add_column("ID", style="dim", width=36)
-    table.add_column("Content")
-    table.add_column("Project")
-    table.add_column("Timestamp")
-
-    for i, note_id in enumerate(notes_data["ids"]):
-        content = notes_data["documents"][i]
-        metadata = notes_data["metadatas"][i]
-        project = metadata.get("project", "")
-        timestamp = metadata.get("timestamp", "")
-
-        table.add_row(note_id, content, project, timestamp)
-
-    console.print(table)
-
-    return notes_data
+    dated = since_date is not None or until_date is not None
+    total = vs.count_notes(where=where) if dated else vs.count_notes(project)
+    return shape_notes(page, cursor=cursor, total=total)
 
 
 @function_tool
+@timed("tool.list_all_projects")
 def list_all_projects() -> list[str]:
     """
     Lists all unique projects in the system.
@@ -200,22 +300,69 @@ def list_all_projects() -> list[str]:
     """
     LOG.info("Tool called: list_all_projects")
 
-    projects = vs.get_all_projects()
+    project_stats = vs.get_project_stats()
 
-    if not projects:
+    if not project_stats:
         console.print("[bold yellow]No projects found.[/bold yellow]")
         return []
 
-    console.print(f"[bold green]Found {len(projects)} project(s):[/bold green]")
-    for i, project in enumerate(projects, 1):
-        console.print(f"  {i}. {project}")
+    console.print(f"[bold green]Found {len(project_stats)} project(s):[/bold green]")
+    for i, stats in enumerate(project_stats, 1):
+        console.print(
+            f"  {i}. {stats['project']} [dim]({stats['note_count']} notes, "
+            f"last updated {stats['last_updated']})[/dim]"
+        )
+
+    return [stats["project"] for stats in project_stats]
+
 
-    return projects
+async def _rerank_candidates(
+    query: str, documents: list[str], decision: str, positions: list[int]
+) -> tuple[str, dict[int, float]]:
+    """
+    Reranks the candidates at the given positions within the latency budget.
+
+    Args:
+        query (str): The search query.
+        documents (list[str]): The content of all candidates.
+        decision (str): The rerank decision of the policy.
+        positions (list[int]): The positions of the candidates to rerank.
+
+    Returns:
+        tuple[str, dict[int, float]]: The decision, FAILED or TIMED_OUT if the vector
+            order is kept, and the rerank score of the candidates by position.
+    """
+    try:
+        reranked_results = await asyncio.wait_for(
+            vs.rerank_documents(query, [documents[i] for i in positions]),
+            timeout=rerank_policy.budget_ms / 1000,
+        )
+        # Map the indices of the reranked documents back to the candidates,
+        # ignoring those not sent
+        rerank_scores = {
+            positions[doc["index"]]: doc["relevance_score"]
+            for doc in reranked_results
+            if doc.get("index") in range(len(positions))
+        }
+    except asyncio.TimeoutError:
+        LOG.warning(f"Reranking exceeded {rerank_policy.budget_ms} ms, using vector order.")
+        return TIMED_OUT, {}
+    except Exception as e:
+        LOG.warning(f"Reranking failed, using vector order: {e}")
+        return FAILED, {}
+    return (decision if rerank_scores else FAILED), rerank_scores
 
 
 @function_tool
+@timed("tool.search_notes")
 async def search_notes(
-    query: str, initial_n_results: int = 20, final_n_results: int = 5
+    query: str,
+    initial_n_results: int = 10,
+    final_n_results: int = 5,
+    hybrid: bool = True,
+    project: str = "",
+    since: str = "",
+    until: str = "",
 ) -> dict:
     """
     Searches for notes, displays them to the user in a formatted table, and returns the raw data.
@@ -223,15 +370,29 @@ async def search_notes(
 
     Args:
         query (str): The search query for finding semantically similar notes.
-        initial_n_results (int, optional): The number of results to retrieve from the vector store before reranking. Defaults to 20.
+        initial_n_results (int, optional): The number of results to retrieve from the vector store before reranking. Defaults to 10.
         final_n_results (int, optional): The number of top results to return after reranking. Defaults to 5.
+        hybrid (bool, optional): Whether to also match exact terms (identifiers, ticket numbers, error messages) with the lexical index. Defaults to True.
+        project (str, optional): Only search the notes of this project, so all candidates come from it. Defaults to all projects.
+        since (str, optional): Only search notes written on or after this ISO date (e.g. "2025-01-31").
+        until (str, optional): Only search notes written on or before this ISO date.
 
     Returns:
         dict: The raw search result data from the vector store.
     """
     LOG.info(f"Tool called: search_notes with query: '{query}'")
 
-    search_results = vs.search_notes(query, n_results=initial_n_results)
+    try:
+        where = note_filter(
+            project or None, _parse_date(since), _parse_date(until, end_of_day=True)
+        )
+    except ValueError as e:
+        return {"error": f"Invalid date: {e}"}
+
+    if hybrid:
+        search_results = vs.hybrid_search(query, n_results=initial_n_results, where=where)
+    else:
+        search_results = vs.search_notes(query, n_results=initial_n_results, where=where)
 
     if (
         not search_results
@@ -246,9 +407,14 @@ async def search_notes(
     metadatas = search_results["metadatas"][0]
     distances = search_results["distances"][0]
 
-    # Rerank the results using the rerank_documents method
-    reranked_results = await vs.rerank_documents(query, documents)
-    rerank_scores = {doc["index"]: doc["relevance_score"] for doc in reranked_results}
+    # Rerank only the candidates worth it, within the latency budget
+    decision, rerank_positions = rerank_policy.plan(distances, final_n_results)
+    rerank_scores = {}
+    if rerank_positions:
+        decision, rerank_scores = await _rerank_candidates(
+            query, documents, decision, rerank_positions
+        )
+    record(decision)
 
     combined_results = []
     for i, note_id in enumerate(ids):
@@ -259,11 +425,14 @@ async def search_notes(
                 "project": metadatas[i].get("project", ""),
                 "timestamp": metadatas[i].get("timestamp", ""),
                 "distance": distances[i],
-                "rerank_score": rerank_scores.get(i, 0.0),
+                "rerank_score": rerank_scores.get(i),
             }
         )
-    # Sort the combined results by rerank score and take the top final_n_results
-    combined_results.sort(key=lambda x: x["rerank_score"], reverse=True)
+    # Sort the reranked results by rerank score, the others keep their order,
+    # and take the top final_n_results
+    combined_results.sort(
+        key=lambda x: (x["rerank_score"] is None, -(x["rerank_score"] or 0.0))
+    )
     final_results = combined_results[:final_n_results]
 
     table = Table(
@@ -284,11 +453,12 @@ async def search_notes(
             result["content"],
             result["project"],
             result["timestamp"],
-            f"{result['distance']:.4f}",
-            f"{result['rerank_score']:.4f}",
+            f"{result['distance']:.4f}" if result["distance"] is not None else "-",
+            f"{result['rerank_score']:.4f}" if result["rerank_score"] is not None else "-",
         )
 
-    console.print(table)
+    with span("render.table"):
+        console.print(table)
 
     return {
         "ids": [[r["id"] for r in final_results]],
@@ -308,6 +478,7 @@ async def search_notes(
 
 
 @function_tool
+@timed("tool.export_notes_by_project_to_csv")
 def export_notes_by_project_to_csv(project: str) -> str:
     """
     Exports all notes from a specific project to a CSV file in the dist/ folder.
@@ -325,24 +496,42 @@ def export_notes_by_project_to_csv(project: str) -> str:
 
     filepath = f"dist/notes_{project}.csv"
 
-    notes_data = vs.get_notes_by_project(project)
-    if not notes_data or not notes_data.get("ids"):
-        return f"No notes found for project '{project}'."
-
+    exported = 0
     with open(filepath, mode="w", newline="", encoding="utf-8") as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(["ID", "Content", "Project", "Timestamp"])
-        for i, note_id in enumerate(notes_data["ids"]):
-            content = notes_data["documents"][i]
-            metadata = notes_data["metadatas"][i]
-            project_name = metadata.get("project", "")
-            timestamp = metadata.get("timestamp", "")
-            writer.writerow([note_id, content, project_name, timestamp])
+        for page in vs.iter_notes(where={"project": project}):
+            for i, note_id in enumerate(page["ids"]):
+                content = page["documents"][i]
+                metadata = page["metadatas"][i]
+                project_name = metadata.get("project", "")
+                timestamp = metadata.get("timestamp", "")
+                writer.writerow([note_id, content, project_name, timestamp])
+            exported += len(page["ids"])
+
+    if not exported:
+        os.remove(filepath)
+        return f"No notes found for project '{project}'."
 
-    return f"Exported {len(notes_data['ids'])} notes from project '{project}' to {filepath}."
+    return f"Exported {exported} notes from project '{project}' to {filepath}."
+
+
+@functools.cache
+def get_analyzer():
+    """
+    Returns the reusable Rust analyzer, holding the compiled regexes and stop words.
+    The Rust module is only loaded on first use.
+
+    Returns:
+        Analyzer: The shared analyzer.
+    """
+    from notia_analyzer import Analyzer #ty: ignore[unresolved-import]
+
+    return Analyzer()
 
 
 @function_tool
+@timed("tool.analyze_all_notes")
 def analyze_all_notes() -> str:
     """
     Performs a content analysis on all notes using the high-performance Rust module.
@@ -353,90 +542,247 @@ def analyze_all_notes() -> str:
     """
     LOG.info("Tool called: analyze_all_notes")
 
-    notes_data = vs.get_all_notes()
-
-    if not notes_data or not notes_data.get("ids"):
-        return "No notes found to analyze."
-
-    # Prepare data for Rust module (list of dicts -> JSON string)
-    notes_for_analysis = []
-    for i, note_id in enumerate(notes_data["ids"]):
-        notes_for_analysis.append({
-            "id": note_id,
-            "content": notes_data["documents"][i],
-            "project": notes_data["metadatas"][i].get("project", ""),
-        })
-
-    notes_json = json.dumps(notes_for_analysis)
+    total_notes = 0
+    total_words = 0
+    projects = set()
 
-    # Call the Rust function
+    # Each page is analyzed in parallel by the Rust module, without the GIL
     try:
-        analysis_result = analyze_notes_content(notes_json)
-        console.print(f"[bold blue]Analysis Complete:[/bold blue] {analysis_result}")
-        return analysis_result
+        for page in vs.iter_notes():
+            page_result = get_analyzer().analyze(
+                page["documents"],
+                [metadata.get("project", "") for metadata in page["metadatas"]],
+            )
+            total_notes += page_result["notes"]
+            total_words += page_result["words"]
+            projects.update(page_result["projects"])
     except Exception as e:
         error_message = f"Error calling Rust analysis module: {e}"
         LOG.error(error_message)
         return error_message
 
+    if not total_notes:
+        return "No notes found to analyze."
 
-@function_tool
-def extract_top_keywords(top_n: int = 10) -> str:
+    analysis_result = (
+        f"Analyzed {total_notes} notes. Total word count: {total_words}. "
+        f"Found {len(projects)} unique projects."
+    )
+    console.print(f"[bold blue]Analysis Complete:[/bold blue] {analysis_result}")
+    return analysis_result
+
+
+def _parse_date(value: str, end_of_day: bool = False) -> Optional[datetime.datetime]:
     """
-    Extracts the most frequent keywords from all notes using the Rust analysis module.
+    Parses an optional ISO date or datetime given to a tool.
 
     Args:
-        top_n (int): The number of top keywords to extract. Defaults to 10.
+        value (str): The ISO formatted date, or an empty string.
+        end_of_day (bool): Whether a date without a time means the end of that day,
+            so that "until 2025-01-31" includes the notes of January 31.
 
     Returns:
-        str: A formatted string of the top keywords and their counts.
+        datetime.datetime: The parsed datetime, or None if the value is empty.
+
+    Raises:
+        ValueError: If the value is not a valid ISO date.
     """
-    LOG.info(f"Tool called: extract_top_keywords with top_n: {top_n}")
+    if not value:
+        return None
+    parsed = datetime.datetime.fromisoformat(value)
+    if end_of_day and len(value) == len("2025-01-31"):
+        parsed += datetime.timedelta(days=1, microseconds=-1)
+    return parsed
 
-    notes_data = vs.get_all_notes()
 
-    if not notes_data or not notes_data.get("ids"):
-        return "No notes found to extract keywords from."
+@function_tool
+@timed("tool.extract_top_keywords")
+def extract_top_keywords(
+    top_n: int = 10, project: str = "", since: str = "", until: str = ""
+) -> str:
+    """
+    Extracts the most frequent keywords from the notes using the Rust keyword index.
 
-    notes_for_analysis = []
-    for i, note_id in enumerate(notes_data["ids"]):
-        notes_for_analysis.append({
-            "id": note_id,
-            "content": notes_data["documents"][i],
-            "project": notes_data["metadatas"][i].get("project", ""),
-        })
+    Args:
+        top_n (int): The number of top keywords to extract. Defaults to 10.
+        project (str, optional): Only consider notes from this project. Defaults to all projects.
+        since (str, optional): Only consider notes written on or after this ISO date (e.g. "2025-01-31").
+        until (str, optional): Only consider notes written on or before this ISO date.
 
-    notes_json = json.dumps(notes_for_analysis)
+    Returns:
+        str: A formatted string of the top keywords and their counts.
+    """
+    LOG.info(f"Tool called: extract_top_keywords with top_n: {top_n}")
 
     try:
-        keywords_result = extract_keywords(notes_json, top_n)
-        console.print(f"[bold green]Top {top_n} Keywords:[/bold green] {keywords_result}")
-        return keywords_result
+        top_keywords = vs.get_top_keywords(
+            top_n,
+            project=project or None,
+            since=_parse_date(since),
+            until=_parse_date(until, end_of_day=True),
+        )
+    except ValueError as e:
+        return f"Invalid date: {e}"
     except Exception as e:
         error_message = f"Error calling Rust keyword extraction module: {e}"
         LOG.error(error_message)
         return error_message
 
+    if not top_keywords:
+        return "No notes found to extract keywords from."
+
+    keywords_result = json.dumps(
+        {keyword: count for keyword, count, _ in top_keywords}, ensure_ascii=False
+    )
+    console.print(f"[bold green]Top {top_n} Keywords:[/bold green] {keywords_result}")
+    return keywords_result
+
+
+def _group_duplicates(pairs: list[tuple[str, str, float]]) -> list[list[str]]:
+    """
+    Groups pairs of duplicate note IDs into clusters of mutual duplicates.
+
+    Args:
+        pairs (list[tuple[str, str, float]]): The duplicate pairs with their similarity.
+
+    Returns:
+        list[list[str]]: The clusters of note IDs, each with at least two notes.
+    """
+    parents = {}
+
+    def find(note_id: str) -> str:
+        parents.setdefault(note_id, note_id)
+        while parents[note_id] != note_id:
+            parents[note_id] = parents[parents[note_id]]
+            note_id = parents[note_id]
+        return note_id
+
+    for left, right, _ in pairs:
+        parents[find(left)] = find(right)
+
+    clusters = {}
+    for note_id in parents:
+        clusters.setdefault(find(note_id), []).append(note_id)
+    return list(clusters.values())
+
 
 @function_tool
+@timed("tool.find_duplicate_notes")
+def find_duplicate_notes(threshold: float = 0.8, action: str = "report") -> str:
+    """
+    Finds groups of near-duplicate notes across all notes, and optionally cleans them up.
 
-def import_notes_from_csv(filepath: str) -> str:
+    Args:
+        threshold (float, optional): The minimum similarity, between 0 and 1, of two duplicate notes. Defaults to 0.8.
+        action (str, optional): What to do with each group of duplicates: "report" only lists them,
+            "delete" keeps the oldest note and deletes the others, "merge" keeps the longest note,
+            appends the lines it is missing from the others, and deletes the others. Defaults to "report".
+
+    Returns:
+        str: A summary of the duplicate groups found and of the action taken.
     """
-    Imports notes from a CSV file into the system.
+    LOG.info(f"Tool called: find_duplicate_notes with threshold: {threshold}, action: {action}")
 
-    The CSV must have the columns: ID, Content, Project, Timestamp.
-    Existing notes are added to the vector store; if an ID is provided it will be used.
+    if action not in ("report", "delete", "merge"):
+        return f"Unknown action '{action}'. Use 'report', 'delete' or 'merge'."
+
+    clusters = _group_duplicates(vs.find_duplicates(threshold))
+    if not clusters:
+        return "No duplicate notes found."
+
+    table = Table(
+        title=f"Duplicate notes (similarity >= {threshold})",
+        show_header=True,
+        header_style="bold magenta",
+    )
+    table.add_column("Group", style="dim")
+    table.add_column("ID", style="dim", width=36)
+    table.add_column("Content")
+    table.add_column("Project")
+    table.add_column("Timestamp")
+
+    removed = 0
+    for group, cluster in enumerate(clusters, 1):
+        notes_data = vs.get_notes(cluster)
+        notes = [
+            Note(
+                content=notes_data["documents"][i],
+                project=notes_data["metadatas"][i].get("project", ""),
+                timestamp=datetime.datetime.fromisoformat(notes_data["metadatas"][i]["timestamp"]),
+                id=note_id,
+            )
+            for i, note_id in enumerate(notes_data["ids"])
+        ]
+        for note in notes:
+            table.add_row(str(group), note.id, note.content, note.project, note.timestamp.isoformat())
+
+        if action == "report" or len(notes) < 2:
+            continue
+        if action == "delete":
+            kept = min(notes, key=lambda note: note.timestamp)
+        else:
+            kept = max(notes, key=lambda note: len(note.content))
+            kept_lines = set(kept.content.splitlines())
+            extra_lines = []
+            for note in notes:
+                for line in note.content.splitlines():
+                    if line.strip() and line not in kept_lines:
+                        kept_lines.add(line)
+                        extra_lines.append(line)
+            if extra_lines:
+                kept.content = "\n".join([kept.content, *extra_lines])
+                vs.update_note(kept)
+        for note in notes:
+            if note.id != kept.id:
+                vs.delete_note(note.id)
+                removed += 1
+
+    with span("render.table"):
+        console.print(table)
+
+    summary = f"Found {len(clusters)} group(s) of duplicate notes ({sum(len(c) for c in clusters)} notes)."
+    if action != "report":
+        summary += f" {removed} duplicate note(s) removed with action '{action}'."
+    return summary
+
+
+def _file_digest(filepath: str) -> str:
     """
-    LOG.info(f"Tool called: import_notes_from_csv with filepath: {filepath}")
+    Returns the SHA-256 digest of a file's content, identifying it across imports.
 
-    if not os.path.isfile(filepath):
-        return f"File not found: {filepath}"
+    Args:
+        filepath (str): The path of the file.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_notes_from_csv(filepath: str, digest: str):
+    """
+    Lazily yields notes from a CSV file with the columns: ID, Content, Project, Timestamp.
+
+    Rows without an ID get one derived from the file digest and their row number,
+    so importing the same file again overwrites them instead of duplicating them.
+
+    Args:
+        filepath (str): The path of the CSV file to read.
+        digest (str): The digest of the file, from `_file_digest`.
 
-    imported = 0
+    Yields:
+        Note: One note per CSV row.
+    """
     with open(filepath, newline="", encoding="utf-8") as csvfile:
         reader = csv.DictReader(csvfile)
-        for row in reader:
-            note_id = row.get("ID") or None
+        for row_number, row in enumerate(reader):
+            note_id = row.get("ID") or str(
+                uuid.uuid5(uuid.NAMESPACE_URL, f"{digest}:{row_number}")
+            )
             content = row.get("Content", "")
             project = row.get("Project") or None
             timestamp_str = row.get("Timestamp")
@@ -446,12 +792,77 @@ def import_notes_from_csv(filepath: str) -> str:
                     timestamp = datetime.datetime.fromisoformat(timestamp_str)
                 except Exception:
                     timestamp = None
-            note = Note(content=content, project=project, timestamp=timestamp, id=note_id)
-            vs.add_note(note)
-            imported += 1
+            yield Note(content=content, project=project, timestamp=timestamp, id=note_id)
+
+
+@function_tool
+@timed("tool.import_notes_from_csv")
+def import_notes_from_csv(filepath: str) -> str:
+    """
+    Imports notes from a CSV file into the system.
+
+    The CSV must have the columns: ID, Content, Project, Timestamp.
+    Existing notes are added to the vector store; if an ID is provided it will be used.
+    Notes are embedded and stored in batches. If an import is interrupted, running it
+    again on the same, unmodified file resumes after the last stored batch.
+    """
+    LOG.info(f"Tool called: import_notes_from_csv with filepath: {filepath}")
+
+    if not os.path.isfile(filepath):
+        return f"File not found: {filepath}"
+
+    digest = _file_digest(filepath)
+    imported = vs.add_notes(
+        _read_notes_from_csv(filepath, digest),
+        # Kept with the store rather than next to the file, whose folder may be read-only
+        checkpoint_path=os.path.join(vs.path, "imports", f"{digest}.progress"),
+        progress=lambda done: console.print(f"[dim]Imported {done} notes...[/dim]"),
+        source=digest,
+    )
 
     return f"Imported {imported} notes from {filepath}."
 
+
+@function_tool
+@timed("tool.export_notes")
+def export_notes(
+    format: str = "jsonl",
+    projects: str = "",
+    include_embeddings: bool = False,
+    compress: bool = False,
+) -> str:
+    """
+    Exports all notes, or the notes of some projects, to a JSONL or Parquet file in the dist/ folder.
+
+    Args:
+        format (str, optional): "jsonl" or "parquet". Defaults to "jsonl".
+        projects (str, optional): Comma-separated project names to export, all notes if empty. Defaults to "".
+        include_embeddings (bool, optional): Whether to include the embedding of each note. Defaults to False.
+        compress (bool, optional): Whether to compress the file with zstd. Defaults to False.
+
+    Returns:
+        str: Confirmation message with the export file path.
+    """
+    LOG.info(f"Tool called: export_notes as {format} for projects: '{projects}'")
+    from exporter import default_export_path, export_notes as export
+
+    filepath = default_export_path(format, compress)
+    try:
+        exported = export(
+            vs,
+            filepath,
+            format=format,
+            projects=[p.strip() for p in projects.split(",") if p.strip()],
+            include_embeddings=include_embeddings,
+            compress=compress,
+            progress=lambda done: console.print(f"[dim]Exported {done} notes...[/dim]"),
+        )
+    except (ValueError, ImportError) as e:
+        return f"Export failed: {e}"
+
+    return f"Exported {exported} notes to {filepath}."
+
+
 # Export a list of the decorated functions for the agent
 tools = [
     add_note,
@@ -463,7 +874,9 @@ tools = [
     search_notes_by_project,
     list_all_projects,
     export_notes_by_project_to_csv,
+    export_notes,
     analyze_all_notes,
     extract_top_keywords,
     import_notes_from_csv,
+    find_duplicate_notes,
 ]
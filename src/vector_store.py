@@ -1,13 +1,83 @@
+import asyncio
+import atexit
 import chromadb
+import datetime
+import importlib.util
 import os
-from chromadb.utils import embedding_functions
+import json
+import random
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, Sequence
 import httpx
 import logging
+import numpy as np
 
+import metrics
 from models import Note
+from note_filters import matches_filter, note_filter
+from chunking import chunk_ids, split_into_chunks
+from embedding_cache import CachedOpenAIEmbeddingFunction, EmbeddingCache
+from ingest_queue import IngestQueue
+from project_catalog import ProjectCatalog
+from sharding import (
+    MODES,
+    ShardedCollection,
+    collection_names,
+    migrate_collection,
+    shard_layout,
+)
+from snapshot import CHUNKS, NOTES, SnapshotBlock, SnapshotReader, SnapshotWriter
+from notia_analyzer import ( #ty: ignore[unresolved-import]
+    Bm25Index,
+    KeywordIndex,
+    find_duplicate_pairs,
+    minhash_signatures,
+    signature_similarity,
+)
 
 LOG = logging.getLogger(__name__)
 
+# HTTP/2 is only available when the optional `h2` package is installed.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Status codes for which a rerank request is retried.
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Number of hash permutations of the MinHash signatures used for deduplication
+MINHASH_PERMUTATIONS = 64
+
+# Constant of reciprocal rank fusion, damping the weight of the top ranks.
+RRF_K = 60
+
+# Factor by which the candidates of a search grow when they hold too few notes
+CANDIDATE_GROWTH = 4
+
+# Maximum number of candidates a search requests from a collection
+MAX_CANDIDATES = int(os.getenv("NOTIA_SEARCH_MAX_CANDIDATES", "1000"))
+
+
+# Version of the metadata layout, recorded in the metadata of each collection.
+# Version 2 adds the numeric `timestamp_epoch` used to filter notes by date.
+METADATA_VERSION = 2
+
+
+def to_epoch(timestamp: str) -> float:
+    """
+    Converts an ISO timestamp, as stored in note metadata, to seconds since the epoch.
+
+    Args:
+        timestamp (str): The ISO formatted timestamp.
+
+    Returns:
+        float: The timestamp in seconds since the epoch, or 0.0 if it cannot be parsed.
+    """
+    try:
+        return datetime.datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
 
 class VectorStore:
     """
@@ -17,34 +87,407 @@ class VectorStore:
     It uses OpenAI-compatible embedding functions for document embeddings.
     Attributes:
         client (chromadb.PersistentClient): The ChromaDB client instance.
-        collection (chromadb.Collection): The collection for storing notes.
+        collection (chromadb.Collection | ShardedCollection): The collection for storing notes.
+        chunk_collection (chromadb.Collection | ShardedCollection): The collection for storing
+            chunks of long notes.
+        sharding (str): The layout of a new store: "" for single collections, or "project"
+            or "hash" for per-project shards.
+        chunk_size (int): Length in characters above which notes are embedded by chunks.
+        chunk_overlap (int): Number of characters shared by consecutive chunks.
         openai_api_base (str): Base URL for OpenAI API.
         openai_api_key (str): API key for OpenAI.
         openai_embedding_model (str): Model name for OpenAI embeddings.
         openai_rerank_model (str): Model name for OpenAI reranking.
+        embedding_cache (EmbeddingCache): On-disk cache of computed embeddings.
+        rerank_timeout (float): Timeout in seconds of a rerank request.
+        rerank_retries (int): Number of retries of a failed rerank request.
+        project_catalog (ProjectCatalog): Incrementally maintained index of projects.
+        keyword_index (KeywordIndex): Incrementally maintained keyword statistics.
+        bm25_index (Bm25Index): Incrementally maintained lexical index of note content.
+        ingest_queue (IngestQueue): Journaled queue of notes stored in the background.
     Methods:
         rerank_documents(query, documents, model): Reranks documents based on a query.
+        aclose(): Closes the pooled HTTP client.
         add_note(note): Adds a note to the vector store.
+        enqueue_note(note): Queues a note to be stored in the background.
+        add_notes(notes, batch_size, max_concurrency): Adds notes in embedded batches.
         get_note(id): Retrieves a note by its ID.
+        get_notes(ids): Retrieves several notes by their IDs.
         delete_note(id): Deletes a note by its ID.
-        search_notes(query, n_results): Searches for notes based on a query.
+        search_notes(query, n_results, where): Searches for notes based on a query.
+        lexical_search(query, n_results): Searches for notes with the BM25 index.
+        hybrid_search(query, n_results, where): Fuses vector and BM25 results.
+        find_near_duplicate(content, threshold): Finds a stored note nearly identical to a text.
+        find_duplicates(threshold): Finds all pairs of near-duplicate notes.
+        iter_notes(where, include, page_size, offset): Iterates over notes page by page.
+        count_notes(project, where): Counts all notes, or the notes of a project or filter.
+        snapshot(path): Saves notes, chunks and embeddings to a snapshot file.
+        restore(path, force): Loads a snapshot file without embedding anything again.
+        shard(mode, shard_count): Moves the notes and chunks into per-project shards.
+        get_project_stats(): Returns per-project note counts and update times.
+        rebuild_project_catalog(): Rebuilds the project catalog from the notes.
+        rebuild_keyword_index(): Rebuilds the keyword index from the notes.
+        rebuild_bm25_index(): Rebuilds the BM25 index from the notes.
+        close(): Stores queued notes, saves the derived indexes and closes the local databases.
     """
 
-    def __init__(self, path: str = ".chromadb"):
+    def __init__(self, path: str = ".chromadb", write: Optional[Callable] = None):
         self.openai_api_base = os.getenv("OPENAI_API_BASE")
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.openai_embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL", "nomic")
         self.openai_rerank_model = os.getenv("OPENAI_RERANK_MODEL", "bge-reranker")
+        self.rerank_timeout = float(os.getenv("NOTIA_RERANK_TIMEOUT", "30"))
+        self.rerank_retries = int(os.getenv("NOTIA_RERANK_RETRIES", "2"))
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.path = path
+        self._closed = False
+        self._indexes: dict[str, object] = {}
+        self._dirty_index_files: set[str] = set()
         self.client = chromadb.PersistentClient(path=path)
-        self.collection = self.client.get_or_create_collection(
-            name="notia",
-            embedding_function=embedding_functions.OpenAIEmbeddingFunction(
-                api_key=self.openai_api_key,
-                api_base=self.openai_api_base,
-                model_name=self.openai_embedding_model,
-            ),
+        self.embedding_cache = EmbeddingCache(
+            os.path.join(path, "embedding_cache.sqlite3"),
+            max_entries=int(os.getenv("NOTIA_EMBEDDING_CACHE_SIZE", "100000")),
+        )
+        metrics.register_collector("embedding_cache", self.embedding_cache.stats)
+        self.embedding_function = CachedOpenAIEmbeddingFunction(
+            cache=self.embedding_cache,
+            api_key=self.openai_api_key,
+            api_base=self.openai_api_base,
+            model_name=self.openai_embedding_model,
+        )
+        self.sharding = os.getenv("NOTIA_SHARDING", "")
+        self.shard_count = int(os.getenv("NOTIA_SHARD_COUNT", "16"))
+        self.shard_workers = int(os.getenv("NOTIA_SHARD_WORKERS", "8"))
+        self.collection = self._open_collection("notia")
+        self.chunk_size = int(os.getenv("NOTIA_CHUNK_SIZE", "1500"))
+        self.chunk_overlap = int(os.getenv("NOTIA_CHUNK_OVERLAP", "200"))
+        # The chunks follow the layout of the notes, if their move into shards was interrupted
+        self.chunk_collection = self._open_collection(
+            "notia_chunks",
+            layout=(self.collection.mode, self.collection.shard_count)
+            if isinstance(self.collection, ShardedCollection)
+            else None,
+        )
+        metrics.register_collector(
+            "shards",
+            lambda: {
+                kind: len(collection.shards)
+                for kind, collection in (
+                    ("notes", self.collection),
+                    ("chunks", self.chunk_collection),
+                )
+                if isinstance(collection, ShardedCollection)
+            },
+        )
+        self._migrate_metadata()
+        self.project_catalog = ProjectCatalog(os.path.join(path, "project_catalog.sqlite3"))
+        if (
+            self.project_catalog.is_stale()
+            or self.project_catalog.total() != self.collection.count()
+        ):
+            self.rebuild_project_catalog()
+        self.keyword_index = self._load_index(
+            KeywordIndex, "keyword_index.json", self._fill_keyword_index
+        )
+        self.bm25_index = self._load_index(
+            Bm25Index, "bm25_index.json", self._fill_bm25_index
+        )
+        # Opened last, as notes left in its journal are stored right away
+        self.ingest_queue = IngestQueue(
+            self,
+            os.path.join(path, "ingest_journal.sqlite3"),
+            batch_size=int(os.getenv("NOTIA_INGEST_BATCH_SIZE", "32")),
+            flush_interval=float(os.getenv("NOTIA_INGEST_FLUSH_MS", "200")) / 1000,
+            write=write,
+        )
+        atexit.register(self.close)
+
+    def _open_collection(self, name: str, layout: Optional[tuple[str, int]] = None):
+        """
+        Opens a collection of the store, as shards if it was sharded.
+
+        The layout of an existing store is read from its collections: a store is
+        only sharded on creation, when NOTIA_SHARDING is set, or by `shard`. If a
+        migration to shards was interrupted, it is finished first, so no record
+        is left behind in the unsharded collection.
+
+        Args:
+            name (str): The name of the collection.
+            layout (tuple[str, int], optional): The sharding mode and shard count
+                of the other collections of the store, used if this one has no shards.
+
+        Returns:
+            chromadb.Collection | ShardedCollection: The collection.
+        """
+        single = name in collection_names(self.client)
+        layout = shard_layout(self.client, name) or layout
+        if layout is None and self.sharding and not single:
+            layout = (self.sharding, self.shard_count)
+        if layout is not None:
+            mode, shard_count = layout
+            if single:
+                LOG.warning(
+                    f"Collection {name} has both shards and unsharded records, "
+                    "finishing the interrupted move into shards."
+                )
+                return migrate_collection(
+                    self.client,
+                    name,
+                    self.embedding_function,
+                    mode=mode,
+                    shard_count=shard_count or self.shard_count,
+                    max_workers=self.shard_workers,
+                )
+            return ShardedCollection(
+                self.client,
+                name,
+                self.embedding_function,
+                mode=mode,
+                shard_count=shard_count or self.shard_count,
+                max_workers=self.shard_workers,
+            )
+        if self.sharding and single:
+            LOG.warning(
+                f"NOTIA_SHARDING is set but collection {name} is not sharded, "
+                "run `notia shard` to move its records into shards."
+            )
+        return self.client.get_or_create_collection(
+            name=name, embedding_function=self.embedding_function
         )
 
+    def _load_index(self, index_class, filename: str, fill: Callable[[object], None]):
+        """
+        Loads a persisted Rust index, or rebuilds it from the notes if it is stale.
+
+        Index files are deleted on the first change after loading and written back
+        by `close`, so a file left over from a crash is never trusted.
+
+        Args:
+            index_class: The Rust index class, with `load` and `save` methods.
+            filename (str): The name of the index file in the store directory.
+            fill (Callable[[object], None]): Fills an empty index from the notes.
+
+        Returns:
+            The loaded or rebuilt index.
+        """
+        index_path = os.path.join(self.path, filename)
+        if os.path.isfile(index_path):
+            try:
+                index = index_class.load(index_path)
+                if len(index) == self.collection.count():
+                    self._indexes[filename] = index
+                    return index
+            except (IOError, ValueError) as e:
+                LOG.warning(f"Ignoring unreadable index {index_path}: {e}")
+        index = index_class()
+        fill(index)
+        self._indexes[filename] = index
+        self._mark_index_dirty(filename)
+        return index
+
+    def _mark_index_dirty(self, filename: str):
+        """
+        Deletes the persisted copy of an index that no longer matches the notes.
+
+        Args:
+            filename (str): The name of the index file in the store directory.
+        Returns:
+            None
+        """
+        if filename in self._dirty_index_files:
+            return
+        index_path = os.path.join(self.path, filename)
+        if os.path.isfile(index_path):
+            os.remove(index_path)
+        self._dirty_index_files.add(filename)
+
+    def close(self):
+        """
+        Saves the derived indexes that changed and closes the local databases.
+
+        Returns:
+            None
+        """
+        if self._closed:
+            return
+        self.ingest_queue.close()
+        self._closed = True
+        for filename in self._dirty_index_files:
+            self._indexes[filename].save(os.path.join(self.path, filename))
+        self.embedding_cache.close()
+        self.project_catalog.close()
+        for collection in (self.collection, self.chunk_collection):
+            if isinstance(collection, ShardedCollection):
+                collection.close()
+
+    @staticmethod
+    def _note_metadata(note: Note) -> dict:
+        """
+        Builds the metadata stored alongside a note in the collection.
+
+        Args:
+            note (Note): The note to describe.
+
+        Returns:
+            dict: The metadata for the note.
+        """
+        return {
+            "timestamp": note.timestamp.isoformat(),
+            "timestamp_epoch": note.timestamp.timestamp(),
+            "project": note.project or "",
+        }
+
+    @staticmethod
+    def _upgrade_metadata(metadata: dict) -> dict:
+        """
+        Adds the fields of the current metadata version missing from older metadata.
+
+        Args:
+            metadata (dict): The metadata of a note or chunk.
+
+        Returns:
+            dict: The upgraded metadata.
+        """
+        if "timestamp_epoch" in metadata:
+            return metadata
+        return {**metadata, "timestamp_epoch": to_epoch(metadata.get("timestamp", ""))}
+
+    def _migrate_metadata(self, page_size: int = 1000):
+        """
+        Upgrades the metadata of notes and chunks written by earlier versions.
+
+        Each collection records its metadata version once migrated, so this only
+        reads the collections the first time a store is opened by this version.
+
+        Args:
+            page_size (int): The number of records read and updated at a time.
+        Returns:
+            None
+        """
+        for collection in (self.collection, self.chunk_collection):
+            metadata = collection.metadata or {}
+            if metadata.get("metadata_version", 1) >= METADATA_VERSION:
+                continue
+            migrated = 0
+            for page in self._iter_pages(collection, include=["metadatas"], page_size=page_size):
+                stale = [
+                    (record_id, record_metadata)
+                    for record_id, record_metadata in zip(page["ids"], page["metadatas"])
+                    if "timestamp_epoch" not in record_metadata
+                ]
+                if stale:
+                    collection.update(
+                        ids=[record_id for record_id, _ in stale],
+                        metadatas=[self._upgrade_metadata(m) for _, m in stale],
+                    )
+                    migrated += len(stale)
+            if migrated:
+                LOG.info(f"Added numeric timestamps to {migrated} records of {collection.name}.")
+            # The distance function cannot be modified, only carry over the other keys
+            collection.modify(
+                metadata={
+                    **{k: v for k, v in metadata.items() if not k.startswith("hnsw:")},
+                    "metadata_version": METADATA_VERSION,
+                }
+            )
+
+    def _get_metadatas(self, ids: list[str]) -> dict[str, dict]:
+        """
+        Fetches the current metadata of the given notes.
+
+        Args:
+            ids (list[str]): The note IDs to look up.
+
+        Returns:
+            dict[str, dict]: The metadata of the notes that exist, keyed by ID.
+        """
+        existing = self.collection.get(ids=ids, include=["metadatas"])
+        return dict(zip(existing["ids"], existing["metadatas"]))
+
+    def _record_change(self, previous: dict[str, dict], written: Iterable[Note] = ()):
+        """
+        Keeps the derived indexes in sync after notes were written or removed.
+
+        Args:
+            previous (dict[str, dict]): The metadata, before the change, of every
+                note that was overwritten or removed, keyed by ID.
+            written (Iterable[Note]): The notes that were written.
+        Returns:
+            None
+        """
+        written = list(written)
+        self.project_catalog.apply(
+            removed=list(previous),
+            added=[
+                (note.id, note.project or "", note.timestamp.isoformat()) for note in written
+            ],
+        )
+
+        self._mark_index_dirty("keyword_index.json")
+        self._mark_index_dirty("bm25_index.json")
+        for note_id in previous.keys() - {note.id for note in written}:
+            self.keyword_index.remove(note_id)
+            self.bm25_index.remove(note_id)
+        self.keyword_index.upsert_many(
+            [note.id for note in written],
+            [note.project or "" for note in written],
+            [note.timestamp.timestamp() for note in written],
+            [note.content for note in written],
+        )
+        self.bm25_index.upsert_many(
+            [note.id for note in written], [note.content for note in written]
+        )
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """
+        Returns the pooled HTTP client, creating it on first use.
+
+        An `httpx.AsyncClient` is bound to the event loop it was first used in,
+        so a new client is created if the running loop has changed.
+
+        Returns:
+            httpx.AsyncClient: The long-lived client used for rerank requests.
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self._http_client is None
+            or self._http_client.is_closed
+            or self._http_client_loop is not loop
+        ):
+            self._http_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("NOTIA_HTTP_MAX_CONNECTIONS", "10")),
+                    max_keepalive_connections=int(
+                        os.getenv("NOTIA_HTTP_MAX_KEEPALIVE", "5")
+                    ),
+                    keepalive_expiry=60.0,
+                ),
+                timeout=httpx.Timeout(
+                    self.rerank_timeout,
+                    connect=float(os.getenv("NOTIA_HTTP_CONNECT_TIMEOUT", "5")),
+                ),
+                headers={
+                    "Authorization": f"Bearer {self.openai_api_key}",
+                    "Content-Type": "application/json",
+                },
+            )
+            self._http_client_loop = loop
+        return self._http_client
+
+    async def aclose(self):
+        """
+        Closes the pooled HTTP client and its open connections.
+
+        Returns:
+            None
+        """
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        self._http_client = None
+        self._http_client_loop = None
+
     async def rerank_documents(
         self,
         query: str,
@@ -53,6 +496,9 @@ class VectorStore:
         """
         Reranks documents based on a query using OpenAI's reranking model.
 
+        Transient failures (network errors and 429/5xx responses) are retried
+        up to `rerank_retries` times with exponential backoff and full jitter.
+
         Args:
             query (str): The search query for reranking.
             documents (list[str]): List of documents to be reranked.
@@ -62,31 +508,122 @@ class VectorStore:
         """
 
         rerank_url = f"{self.openai_api_base.rstrip('/')}/rerank"
-        headers = {
-            "Authorization": f"Bearer {self.openai_api_key}",
-            "Content-Type": "application/json",
-        }
         payload = {
             "model": self.openai_rerank_model,
             "query": query,
             "documents": documents,
         }
+        client = self._get_http_client()
 
-        async with httpx.AsyncClient() as client:
+        for attempt in range(self.rerank_retries + 1):
+            retrying = attempt < self.rerank_retries
             try:
-                response = await client.post(
-                    rerank_url, headers=headers, json=payload, timeout=30.0
-                )
+                response = await client.post(rerank_url, json=payload)
                 response.raise_for_status()
                 return response.json().get("results", [])
             except httpx.RequestError as e:
-                LOG.error(f"Request error during reranking: {e}")
-                return []
+                if not retrying:
+                    LOG.error(f"Request error during reranking: {e}")
+                    return []
+                LOG.warning(f"Request error during reranking, retrying: {e}")
             except httpx.HTTPStatusError as e:
-                LOG.error(
-                    f"Error response {e.response.status_code} while requesting reranking: {e.response.text}"
+                if not retrying or e.response.status_code not in RETRYABLE_STATUS_CODES:
+                    LOG.error(
+                        f"Error response {e.response.status_code} while requesting reranking: {e.response.text}"
+                    )
+                    return []
+                LOG.warning(
+                    f"Error response {e.response.status_code} while requesting reranking, retrying."
                 )
-                return []
+            await asyncio.sleep(random.uniform(0, 0.2 * 2**attempt))
+        return []
+
+    def _embed_notes(self, notes: list[Note]) -> tuple[list, dict]:
+        """
+        Computes the embeddings of notes, splitting long notes into chunks.
+
+        Long notes are embedded chunk by chunk, and their note-level embedding is
+        the normalized mean of their chunk embeddings. Chunks whose content did not
+        change keep their stored embedding, so only edited chunks are embedded again.
+        This only reads from the store, so batches can be prepared concurrently.
+
+        Args:
+            notes (list[Note]): The notes to embed.
+
+        Returns:
+            tuple[list, dict]: The embedding of each note, and the chunk changes to
+                apply with `_apply_chunk_changes`.
+        """
+        existing = self.chunk_collection.get(
+            where={"note_id": {"$in": [note.id for note in notes]}},
+            include=["embeddings"],
+        )
+        existing_embeddings = dict(
+            zip(existing["ids"], existing["embeddings"] if existing["ids"] else [])
+        )
+
+        texts = []
+        note_texts = {}
+        note_chunks = {}
+        for note in notes:
+            if len(note.content) <= self.chunk_size:
+                note_texts[note.id] = len(texts)
+                texts.append(note.content)
+                continue
+            chunks = split_into_chunks(note.content, self.chunk_size, self.chunk_overlap)
+            ids = chunk_ids(note.id, chunks)
+            note_chunks[note.id] = (ids, chunks)
+            for chunk_id, chunk in zip(ids, chunks):
+                if chunk_id not in existing_embeddings:
+                    # Position of the chunk among the texts to embed
+                    existing_embeddings[chunk_id] = len(texts)
+                    texts.append(chunk)
+
+        vectors = self.embedding_function(texts) if texts else []
+
+        def resolve(value):
+            return vectors[value] if isinstance(value, int) else value
+
+        changes = {"ids": [], "documents": [], "metadatas": [], "embeddings": []}
+        embeddings = []
+        for note in notes:
+            if note.id in note_texts:
+                embeddings.append(vectors[note_texts[note.id]])
+                continue
+            ids, chunks = note_chunks[note.id]
+            chunk_embeddings = [resolve(existing_embeddings[chunk_id]) for chunk_id in ids]
+            mean = np.mean(np.asarray(chunk_embeddings, dtype=np.float32), axis=0)
+            embeddings.append(mean / (np.linalg.norm(mean) or 1.0))
+            for index, (chunk_id, chunk) in enumerate(zip(ids, chunks)):
+                changes["ids"].append(chunk_id)
+                changes["documents"].append(chunk)
+                changes["metadatas"].append(
+                    {**self._note_metadata(note), "note_id": note.id, "chunk_index": index}
+                )
+                changes["embeddings"].append(resolve(existing_embeddings[chunk_id]))
+
+        kept = set(changes["ids"])
+        changes["delete_ids"] = [chunk_id for chunk_id in existing["ids"] if chunk_id not in kept]
+        return embeddings, changes
+
+    def _apply_chunk_changes(self, changes: dict):
+        """
+        Writes the chunk changes computed by `_embed_notes`.
+
+        Args:
+            changes (dict): The chunks to upsert and the chunk IDs to delete.
+        Returns:
+            None
+        """
+        if changes["delete_ids"]:
+            self.chunk_collection.delete(ids=changes["delete_ids"])
+        if changes["ids"]:
+            self.chunk_collection.upsert(
+                ids=changes["ids"],
+                documents=changes["documents"],
+                metadatas=changes["metadatas"],
+                embeddings=changes["embeddings"],
+            )
 
     def add_note(self, note: Note):
         """
@@ -98,13 +635,126 @@ class VectorStore:
             None
         """
         LOG.info(f"Adding note with ID {note.id} to vector store.")
+        if self._get_metadatas([note.id]):
+            LOG.warning(f"Note with ID {note.id} already exists, not adding it.")
+            return
+        embeddings, chunk_changes = self._embed_notes([note])
+        self.project_catalog.begin()
+        self._apply_chunk_changes(chunk_changes)
         self.collection.add(
             ids=[note.id],
             documents=[note.content],
-            metadatas=[
-                {"timestamp": note.timestamp.isoformat(), "project": note.project or ""}
-            ],
+            metadatas=[self._note_metadata(note)],
+            embeddings=embeddings,
         )
+        self._record_change({}, [note])
+
+    def enqueue_note(self, note: Note) -> str:
+        """
+        Queues a note to be embedded and stored in the background.
+
+        The note is durable and readable by ID once this returns, and found by
+        `hybrid_search` through its terms until it is stored.
+
+        Args:
+            note (Note): The note object to be added.
+        Returns:
+            str: The ID of the note.
+        """
+        return self.ingest_queue.enqueue(note)
+
+    def add_notes(
+        self,
+        notes: Iterable[Note],
+        batch_size: int = 100,
+        max_concurrency: int = 4,
+        checkpoint_path: Optional[str] = None,
+        progress: Optional[Callable[[int], None]] = None,
+        source: Optional[str] = None,
+    ) -> int:
+        """
+        Adds many notes to the vector store in batches.
+
+        The notes are consumed lazily and grouped into batches of `batch_size`.
+        Up to `max_concurrency` batches are embedded at the same time, and each
+        batch is upserted with a single collection call, in input order.
+
+        When `checkpoint_path` is given, the number of notes stored so far is
+        written to it after every batch, along with the `source` of the notes.
+        A later call with the same checkpoint and source skips those notes, so
+        an interrupted import resumes where it stopped; a checkpoint of another
+        source is ignored. The checkpoint file is removed once all notes have
+        been stored. Notes must keep their IDs from one call to the next, so
+        that the batch stored before a crash but not yet checkpointed is
+        overwritten rather than duplicated.
+
+        Args:
+            notes (Iterable[Note]): The notes to add.
+            batch_size (int): The number of notes embedded and stored per call.
+            max_concurrency (int): The maximum number of embedding requests in flight.
+            checkpoint_path (str, optional): File used to record and resume progress.
+            progress (Callable[[int], None], optional): Called with the number of
+                notes stored after each batch.
+            source (str, optional): The identity of the notes, such as a hash of
+                the imported file.
+        Returns:
+            int: The total number of notes stored, including resumed ones.
+        """
+        done = 0
+        if checkpoint_path:
+            os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+        if checkpoint_path and os.path.isfile(checkpoint_path):
+            with open(checkpoint_path, encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            if checkpoint.get("source") == source:
+                done = checkpoint.get("done", 0)
+                LOG.info(f"Resuming bulk import after {done} notes from {checkpoint_path}.")
+            else:
+                LOG.warning(f"Ignoring {checkpoint_path}, it was written for another input.")
+
+        iterator = itertools.islice(iter(notes), done, None)
+        batches = iter(lambda: list(itertools.islice(iterator, batch_size)), [])
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            pending = deque()
+
+            def submit_next() -> bool:
+                batch = next(batches, None)
+                if batch is None:
+                    return False
+                pending.append((batch, executor.submit(self._embed_notes, batch)))
+                return True
+
+            while len(pending) < max_concurrency and submit_next():
+                pass
+
+            while pending:
+                batch, future = pending.popleft()
+                embeddings, chunk_changes = future.result()
+                previous = self._get_metadatas([note.id for note in batch])
+                self.project_catalog.begin()
+                self._apply_chunk_changes(chunk_changes)
+                self.collection.upsert(
+                    ids=[note.id for note in batch],
+                    documents=[note.content for note in batch],
+                    metadatas=[self._note_metadata(note) for note in batch],
+                    embeddings=embeddings,
+                )
+                self._record_change(previous, batch)
+                done += len(batch)
+                LOG.info(f"Stored {done} notes in vector store.")
+                if checkpoint_path:
+                    # Replaced atomically, so a crash never leaves a truncated checkpoint
+                    with open(f"{checkpoint_path}.tmp", "w", encoding="utf-8") as f:
+                        json.dump({"source": source, "done": done}, f)
+                    os.replace(f"{checkpoint_path}.tmp", checkpoint_path)
+                if progress:
+                    progress(done)
+                submit_next()
+
+        if checkpoint_path and os.path.isfile(checkpoint_path):
+            os.remove(checkpoint_path)
+        return done
 
     def get_note(self, id: str) -> chromadb.GetResult:
         """
@@ -117,7 +767,30 @@ class VectorStore:
             chromadb.GetResult: The note data retrieved from the vector store.
         """
         LOG.info(f"Retrieving note with ID {id} from vector store.")
-        return self.collection.get(ids=[id])
+        return self.get_notes([id])
+
+    def get_notes(self, ids: list[str]) -> chromadb.GetResult:
+        """
+        Retrieves several notes by their IDs.
+
+        Args:
+            ids (list[str]): The unique identifiers of the notes.
+
+        Returns:
+            chromadb.GetResult: The data of the notes that exist.
+        """
+        LOG.info(f"Retrieving {len(ids)} notes from vector store.")
+        pending = self.ingest_queue.get(ids)
+        if not pending:
+            return self.collection.get(ids=ids)
+        pending_ids = {note.id for note in pending}
+        stored = self.collection.get(ids=[i for i in ids if i not in pending_ids])
+        return {
+            **stored,
+            "ids": stored["ids"] + [note.id for note in pending],
+            "documents": stored["documents"] + [note.content for note in pending],
+            "metadatas": stored["metadatas"] + [self._note_metadata(note) for note in pending],
+        }
 
     def update_note(self, note: Note):
         """
@@ -125,6 +798,7 @@ class VectorStore:
 
         If a note with the same ID already exists, its content, project, and timestamp
         will be completely replaced with the new data provided in the `note` object.
+        For long notes, only the chunks whose content changed are embedded again.
 
         Args:
             note (Note): The note object containing the new data.
@@ -132,13 +806,23 @@ class VectorStore:
             None
         """
         LOG.info(f"Updating note with ID {note.id} in vector store.")
+        if self.ingest_queue.discard([note.id]):
+            self.ingest_queue.enqueue(note)
+            return
+        previous = self._get_metadatas([note.id])
+        if not previous:
+            LOG.warning(f"Note with ID {note.id} does not exist, not updating it.")
+            return
+        embeddings, chunk_changes = self._embed_notes([note])
+        self.project_catalog.begin()
+        self._apply_chunk_changes(chunk_changes)
         self.collection.update(
             ids=[note.id],
             documents=[note.content],
-            metadatas=[
-                {"timestamp": note.timestamp.isoformat(), "project": note.project or ""}
-            ],
+            metadatas=[self._note_metadata(note)],
+            embeddings=embeddings,
         )
+        self._record_change(previous, [note])
 
     def delete_note(self, id: str):
         """
@@ -151,38 +835,463 @@ class VectorStore:
             None
         """
         LOG.info(f"Deleting note with ID {id} from vector store.")
+        self.ingest_queue.discard([id])
+        previous = self._get_metadatas([id])
+        self.project_catalog.begin()
         self.collection.delete(ids=[id])
+        self.chunk_collection.delete(where={"note_id": id})
+        self._record_change(previous)
 
-    def search_notes(self, query: str, n_results: int = 5) -> chromadb.QueryResult:
+    def search_notes(
+        self,
+        query: str,
+        n_results: int = 5,
+        query_embedding: Optional[list[float]] = None,
+        where: Optional[dict] = None,
+    ) -> dict:
         """
         Searches for notes based on a query.
 
+        Both whole notes and chunks of long notes are searched. Chunk hits are
+        aggregated to their parent note, which takes the distance of its best chunk.
+        Chunks carry the project and timestamps of their note, so the filter is
+        applied by ChromaDB to both collections.
+
         Args:
             query (str): The search query.
             n_results (int): The number of results to return.
+            query_embedding (list[float], optional): The embedding of the query, if it
+                was already computed, e.g. in a batch with other queries.
+            where (dict, optional): A metadata filter, e.g. built by `note_filter`.
 
         Returns:
-            chromadb.QueryResult: The search results containing note IDs, documents, and metadata.
+            dict: The search results containing note IDs, documents, metadata and
+                distances, shaped like `chromadb.QueryResult`.
         """
         LOG.info(f"Searching notes with query: '{query}'")
-        return self.collection.query(query_texts=[query], n_results=n_results)
+        if query_embedding is None:
+            query_embeddings = self.embedding_function([query])
+        else:
+            query_embeddings = [query_embedding]
+        note_hits = self._query_notes(query_embeddings, n_results, where)
+
+        found = {}
+        for i, note_id in enumerate(note_hits["ids"][0]):
+            found[note_id] = {
+                "distance": note_hits["distances"][0][i],
+                "document": note_hits["documents"][0][i],
+                "metadata": note_hits["metadatas"][0][i],
+            }
+
+        if self.chunk_collection.count():
+            chunk_distances = self._query_chunks(query_embeddings, n_results, where, found)
+            for note_id, distance in chunk_distances.items():
+                hit = found.setdefault(note_id, {"distance": distance})
+                hit["distance"] = min(hit["distance"], distance)
+
+        ranked = sorted(found.items(), key=lambda item: item[1]["distance"])[:n_results]
+
+        missing = [note_id for note_id, hit in ranked if "document" not in hit]
+        if missing:
+            parents = self.collection.get(ids=missing)
+            for i, note_id in enumerate(parents["ids"]):
+                found[note_id]["document"] = parents["documents"][i]
+                found[note_id]["metadata"] = parents["metadatas"][i]
+        # Drop chunks whose parent note no longer exists
+        ranked = [(note_id, hit) for note_id, hit in ranked if "document" in hit]
+
+        return {
+            "ids": [[note_id for note_id, _ in ranked]],
+            "documents": [[hit["document"] for _, hit in ranked]],
+            "metadatas": [[hit["metadata"] for _, hit in ranked]],
+            "distances": [[hit["distance"] for _, hit in ranked]],
+        }
+
+    def _query_notes(
+        self, query_embeddings: list, n_results: int, where: Optional[dict]
+    ) -> chromadb.QueryResult:
+        """
+        Queries the note collection for the nearest notes matching a filter.
+
+        A selective filter leaves the HNSW search few eligible neighbours, so it can
+        return fewer notes than requested even though more match. The candidate
+        count then grows until `n_results` notes are found, all matching notes are
+        returned, or MAX_CANDIDATES is reached.
+
+        Args:
+            query_embeddings (list): The embedding of the query.
+            n_results (int): The number of notes wanted.
+            where (dict, optional): The metadata filter.
+
+        Returns:
+            chromadb.QueryResult: The nearest notes, closest first.
+        """
+        requested = n_results
+        available = None
+        while True:
+            with metrics.span("chroma.query"):
+                hits = self.collection.query(
+                    query_embeddings=query_embeddings, n_results=requested, where=where
+                )
+            returned = len(hits["ids"][0])
+            if where is None or returned >= n_results or requested >= MAX_CANDIDATES:
+                return hits
+            if available is None:
+                available = self._count_matching(where)
+            if returned >= available:
+                return hits
+            requested = min(requested * CANDIDATE_GROWTH, MAX_CANDIDATES)
+            metrics.increment("search.widened")
+
+    def _query_chunks(
+        self, query_embeddings: list, n_results: int, where: Optional[dict], found: dict
+    ) -> dict[str, float]:
+        """
+        Queries the chunk collection and returns the best chunk distance of each note.
 
-    def get_all_notes(self) -> chromadb.QueryResult:
+        Neighbouring chunks often belong to the same long note, so a fixed number of
+        chunks can hold fewer notes than needed. The candidate count grows until the
+        farthest chunk returned is no closer than the `n_results`-th best note so far,
+        so no chunk left out could enter the results, or until the chunks run out.
+
+        Args:
+            query_embeddings (list): The embedding of the query.
+            n_results (int): The number of notes wanted.
+            where (dict, optional): The metadata filter.
+            found (dict): The hits of the note collection, by note ID.
+
+        Returns:
+            dict[str, float]: The distance of the closest chunk of each note found.
+        """
+        requested = n_results * 2
+        while True:
+            with metrics.span("chroma.query"):
+                hits = self.chunk_collection.query(
+                    query_embeddings=query_embeddings,
+                    n_results=requested,
+                    where=where,
+                    include=["metadatas", "distances"],
+                )
+            best = {}
+            for metadata, distance in zip(hits["metadatas"][0], hits["distances"][0]):
+                note_id = metadata["note_id"]
+                best[note_id] = min(best.get(note_id, distance), distance)
+
+            distances = hits["distances"][0]
+            if len(distances) < requested or requested >= MAX_CANDIDATES:
+                return best
+            merged = {note_id: hit["distance"] for note_id, hit in found.items()}
+            for note_id, distance in best.items():
+                merged[note_id] = min(merged.get(note_id, distance), distance)
+            top = sorted(merged.values())[:n_results]
+            if len(top) == n_results and top[-1] <= distances[-1]:
+                return best
+            requested = min(requested * CANDIDATE_GROWTH, MAX_CANDIDATES)
+            metrics.increment("search.widened")
+
+    def _count_matching(self, where: dict) -> int:
+        """
+        Counts the notes matching a filter, from the project catalog when it only
+        selects a project.
+
+        Args:
+            where (dict): The metadata filter.
+
+        Returns:
+            int: The number of matching notes.
+        """
+        if set(where) == {"project"} and isinstance(where["project"], str):
+            return self.count_notes(where["project"])
+        return self.count_notes(where=where)
+
+    def lexical_search(self, query: str, n_results: int = 5) -> list[tuple[str, float]]:
+        """
+        Searches for notes containing the query terms with the BM25 index.
+
+        Args:
+            query (str): The search query.
+            n_results (int): The number of results to return.
+
+        Returns:
+            list[tuple[str, float]]: (note ID, BM25 score) tuples, by descending score.
+        """
+        LOG.info(f"Lexical search of notes with query: '{query}'")
+        return self.bm25_index.search(query, n_results)
+
+    def hybrid_search(
+        self,
+        query: str,
+        n_results: int = 5,
+        query_embedding: Optional[list[float]] = None,
+        where: Optional[dict] = None,
+    ) -> dict:
+        """
+        Searches for notes with both the vector and BM25 indexes.
+
+        The two rankings are merged with reciprocal rank fusion, so notes that only
+        match exact terms (identifiers, ticket numbers, error strings) are found
+        along with semantically similar ones.
+
+        Args:
+            query (str): The search query.
+            n_results (int): The number of results to retrieve from each index and to return.
+            query_embedding (list[float], optional): The embedding of the query, if it
+                was already computed.
+            where (dict, optional): A metadata filter, e.g. built by `note_filter`.
+
+        Returns:
+            dict: The fused results, shaped like `chromadb.QueryResult`. The distance of
+                notes only found by the lexical search is None.
+        """
+        vector_results = self.search_notes(
+            query, n_results=n_results, query_embedding=query_embedding, where=where
+        )
+        if where:
+            # The BM25 index has no metadata, get more hits and keep the matching ones
+            lexical_results = self.lexical_search(query, n_results=n_results * 4)
+            lexical_results = self._filter_hits(lexical_results, where)[:n_results]
+        else:
+            lexical_results = self.lexical_search(query, n_results=n_results)
+
+        candidates = {}
+        if vector_results and vector_results.get("ids") and vector_results["ids"][0]:
+            for rank, note_id in enumerate(vector_results["ids"][0]):
+                candidates[note_id] = {
+                    "score": 1 / (RRF_K + rank + 1),
+                    "document": vector_results["documents"][0][rank],
+                    "metadata": vector_results["metadatas"][0][rank],
+                    "distance": vector_results["distances"][0][rank],
+                }
+        for rank, (note_id, _) in enumerate(lexical_results):
+            candidate = candidates.setdefault(note_id, {"score": 0.0, "distance": None})
+            candidate["score"] += 1 / (RRF_K + rank + 1)
+        # Notes queued but not stored yet are only found by their terms
+        pending = [
+            note
+            for note, _ in self.ingest_queue.search(query, n_results)
+            if matches_filter(self._note_metadata(note), where)
+        ]
+        for rank, note in enumerate(pending):
+            candidates[note.id] = {
+                "score": 1 / (RRF_K + rank + 1),
+                "document": note.content,
+                "metadata": self._note_metadata(note),
+                "distance": None,
+            }
+
+        fused = sorted(candidates.items(), key=lambda item: item[1]["score"], reverse=True)
+        fused = fused[:n_results]
+
+        missing = [note_id for note_id, candidate in fused if "document" not in candidate]
+        if missing:
+            lexical_only = self.collection.get(ids=missing)
+            for i, note_id in enumerate(lexical_only["ids"]):
+                candidates[note_id]["document"] = lexical_only["documents"][i]
+                candidates[note_id]["metadata"] = lexical_only["metadatas"][i]
+        # Drop notes deleted since they were indexed
+        fused = [(note_id, c) for note_id, c in fused if "document" in c]
+
+        return {
+            "ids": [[note_id for note_id, _ in fused]],
+            "documents": [[c["document"] for _, c in fused]],
+            "metadatas": [[c["metadata"] for _, c in fused]],
+            "distances": [[c["distance"] for _, c in fused]],
+        }
+
+    def _filter_hits(self, hits: list[tuple[str, float]], where: dict) -> list[tuple[str, float]]:
+        """
+        Keeps the hits whose note matches a metadata filter, with one ChromaDB `get`
+        restricted to their IDs.
+
+        Args:
+            hits (list[tuple[str, float]]): (note ID, score) tuples.
+            where (dict): The metadata filter.
+
+        Returns:
+            list[tuple[str, float]]: The matching hits, in the same order.
+        """
+        if not hits:
+            return hits
+        ids = [note_id for note_id, _ in hits]
+        matching = set(self.collection.get(ids=ids, where=where, include=[])["ids"])
+        return [(note_id, score) for note_id, score in hits if note_id in matching]
+
+    def find_near_duplicate(
+        self,
+        content: str,
+        threshold: float = 0.9,
+        n_candidates: int = 5,
+        semantic: bool = False,
+    ) -> Optional[tuple[str, float]]:
+        """
+        Finds a stored or queued note that is nearly identical to the given content.
+
+        The candidates are the notes sharing the most terms with the content in the
+        BM25 index or, if `semantic`, the closest notes by vector distance, which
+        costs an embedding request, along with the queued notes sharing the most
+        terms. They are compared with the content using MinHash signatures of
+        their word shingles.
+
+        Args:
+            content (str): The content to check.
+            threshold (float): The minimum estimated Jaccard similarity of a duplicate.
+            n_candidates (int): The number of candidate notes to compare with.
+            semantic (bool): Whether to find the candidates by vector search.
+
+        Returns:
+            tuple[str, float]: The ID and similarity of the most similar duplicate,
+                or None if there is none.
+        """
+        if semantic:
+            candidates = self.search_notes(content, n_results=n_candidates)
+            ids, documents = candidates["ids"][0], candidates["documents"][0]
+        else:
+            hits = [note_id for note_id, _ in self.bm25_index.search(content, n_candidates)]
+            candidates = (
+                self.collection.get(ids=hits, include=["documents"])
+                if hits
+                else {"ids": [], "documents": []}
+            )
+            ids, documents = candidates["ids"], candidates["documents"]
+        pending = self.ingest_queue.search(content, n_candidates)
+        ids = list(ids) + [note.id for note, _ in pending]
+        documents = list(documents) + [note.content for note, _ in pending]
+        if not ids:
+            return None
+        signatures = minhash_signatures([content] + documents, num_perm=MINHASH_PERMUTATIONS)
+        best = max(
+            (
+                (note_id, signature_similarity(signatures[0], signature))
+                for note_id, signature in zip(ids, signatures[1:])
+            ),
+            key=lambda candidate: candidate[1],
+        )
+        return best if best[1] >= threshold else None
+
+    def find_duplicates(self, threshold: float = 0.8) -> list[tuple[str, str, float]]:
+        """
+        Finds all pairs of near-duplicate notes in the vector store.
+
+        MinHash signatures are computed page by page in the Rust module, then
+        compared with locality-sensitive hashing, so the whole collection is
+        processed in sub-quadratic time without keeping the note content in memory.
+
+        Args:
+            threshold (float): The minimum estimated Jaccard similarity of a duplicate.
+
+        Returns:
+            list[tuple[str, str, float]]: (note ID, note ID, similarity) tuples, by
+                descending similarity.
+        """
+        LOG.info(f"Finding duplicate notes with threshold {threshold}.")
+        ids = []
+        signatures = []
+        for page in self.iter_notes(include=["documents"]):
+            ids.extend(page["ids"])
+            signatures.extend(
+                minhash_signatures(page["documents"], num_perm=MINHASH_PERMUTATIONS)
+            )
+        return find_duplicate_pairs(ids, signatures, threshold)
+
+    def iter_notes(
+        self,
+        where: Optional[dict] = None,
+        include: Sequence[str] = ("documents", "metadatas"),
+        page_size: int = 500,
+        offset: int = 0,
+    ) -> Iterator[chromadb.GetResult]:
+        """
+        Iterates over the notes of the vector store one page at a time.
+
+        Only one page is held in memory at a time, so this scales to collections
+        of any size.
+
+        Args:
+            where (dict, optional): A ChromaDB metadata filter.
+            include (Sequence[str]): The fields to fetch for each note.
+            page_size (int): The number of notes per page.
+            offset (int): The number of matching notes to skip.
+
+        Yields:
+            chromadb.GetResult: A page of notes.
+        """
+        return self._iter_pages(self.collection, where, include, page_size, offset)
+
+    @staticmethod
+    def _iter_pages(
+        collection: chromadb.Collection,
+        where: Optional[dict] = None,
+        include: Sequence[str] = ("documents", "metadatas"),
+        page_size: int = 500,
+        offset: int = 0,
+    ) -> Iterator[chromadb.GetResult]:
+        """
+        Iterates over the records of a collection one page at a time.
+
+        Args:
+            collection (chromadb.Collection): The collection to read.
+            where (dict, optional): A ChromaDB metadata filter.
+            include (Sequence[str]): The fields to fetch for each record.
+            page_size (int): The number of records per page.
+            offset (int): The number of matching records to skip.
+
+        Yields:
+            chromadb.GetResult: A page of records.
+        """
+        while True:
+            with metrics.span("chroma.get"):
+                page = collection.get(
+                    where=where, include=list(include), limit=page_size, offset=offset
+                )
+            if not page["ids"]:
+                return
+            yield page
+            if len(page["ids"]) < page_size:
+                return
+            offset += len(page["ids"])
+
+    @staticmethod
+    def _merge_pages(pages: Iterable[chromadb.GetResult]) -> dict:
+        """
+        Concatenates pages returned by `iter_notes` into a single result.
+
+        Args:
+            pages (Iterable[chromadb.GetResult]): The pages to merge.
+
+        Returns:
+            dict: A result with the same keys as a single page.
+        """
+        merged = {"ids": [], "documents": [], "metadatas": []}
+        for page in pages:
+            for key in merged:
+                merged[key].extend(page.get(key) or [])
+        return merged
+
+    def get_all_notes(self) -> dict:
         """
         Retrieves all notes from the vector store.
 
+        This loads the whole collection in memory; prefer `iter_notes` for full scans.
+
         Returns:
-            chromadb.QueryResult: All notes in the database.
+            dict: All notes in the database.
         """
         LOG.info("Retrieving all notes from vector store.")
-        return self.collection.get(limit=1000)
+        return self._merge_pages(self.iter_notes())
 
-    def get_notes_by_project(self, project: str) -> dict:
+    def get_notes_by_project(
+        self,
+        project: str,
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None,
+    ) -> dict:
         """
         Retrieves notes that belong to the specified project using ChromaDB metadata query.
 
         Args:
             project (str): The project name to search for.
+            since (datetime.datetime, optional): Only retrieve notes written at or after this time.
+            until (datetime.datetime, optional): Only retrieve notes written at or before this time.
 
         Returns:
             dict: The search results containing note IDs, documents, and metadata.
@@ -190,9 +1299,299 @@ class VectorStore:
         LOG.info(f"Retrieving notes with project: {project}")
 
         # Use ChromaDB's where clause to filter by metadata
-        results = self.collection.get(where={"project": project}, limit=1000)
+        return self._merge_pages(self.iter_notes(where=note_filter(project, since, until)))
 
-        return results
+    def get_top_keywords(
+        self,
+        top_n: int = 10,
+        project: Optional[str] = None,
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None,
+    ) -> list[tuple[str, int, int]]:
+        """
+        Returns the most frequent keywords from the keyword index.
+
+        Args:
+            top_n (int): The number of keywords to return.
+            project (str, optional): Only count notes of this project.
+            since (datetime.datetime, optional): Only count notes written at or after this time.
+            until (datetime.datetime, optional): Only count notes written at or before this time.
+
+        Returns:
+            list[tuple[str, int, int]]: (keyword, count, number of notes) tuples,
+                by descending count.
+        """
+        LOG.info(f"Retrieving top {top_n} keywords from keyword index.")
+        return self.keyword_index.top_keywords(
+            top_n,
+            project=project,
+            since=since.timestamp() if since else None,
+            until=until.timestamp() if until else None,
+        )
+
+    def rebuild_keyword_index(self):
+        """
+        Rebuilds the keyword index from the content of every note.
+
+        Returns:
+            None
+        """
+        self._mark_index_dirty("keyword_index.json")
+        self._fill_keyword_index(self.keyword_index)
+
+    def _fill_keyword_index(self, index: KeywordIndex):
+        """
+        Replaces the content of a keyword index with the keywords of every note.
+
+        Args:
+            index (KeywordIndex): The index to fill.
+        Returns:
+            None
+        """
+        LOG.info("Rebuilding keyword index.")
+        index.clear()
+        for page in self.iter_notes():
+            index.upsert_many(
+                page["ids"],
+                [metadata.get("project", "") for metadata in page["metadatas"]],
+                [to_epoch(metadata.get("timestamp", "")) for metadata in page["metadatas"]],
+                page["documents"],
+            )
+
+    def rebuild_bm25_index(self):
+        """
+        Rebuilds the BM25 index from the content of every note.
+
+        Returns:
+            None
+        """
+        self._mark_index_dirty("bm25_index.json")
+        self._fill_bm25_index(self.bm25_index)
+
+    def _fill_bm25_index(self, index: Bm25Index):
+        """
+        Replaces the content of a BM25 index with the content of every note.
+
+        Args:
+            index (Bm25Index): The index to fill.
+        Returns:
+            None
+        """
+        LOG.info("Rebuilding BM25 index.")
+        index.clear()
+        for page in self.iter_notes(include=["documents"]):
+            index.upsert_many(page["ids"], page["documents"])
+
+    def count_notes(self, project: Optional[str] = None, where: Optional[dict] = None) -> int:
+        """
+        Counts the notes of the vector store, of a single project, or matching a filter.
+
+        Args:
+            project (str, optional): The project whose notes are counted.
+            where (dict, optional): A metadata filter, e.g. built by `note_filter`. Matching
+                notes are counted by reading their IDs, the other counts are kept up to date.
+
+        Returns:
+            int: The number of notes.
+        """
+        if where is not None:
+            return sum(len(page["ids"]) for page in self.iter_notes(where=where, include=[]))
+        if project is None:
+            return self.collection.count()
+        return self.project_catalog.count(project)
+
+    def snapshot(self, path: str, page_size: int = 1000, progress=None) -> dict[str, int]:
+        """
+        Saves the notes and chunks, with their stored embeddings, to a snapshot file.
+
+        Args:
+            path (str): The snapshot file to write.
+            page_size (int): The number of records read and written at a time.
+            progress (Callable[[int], None], optional): Called with the number of
+                records saved after each page.
+
+        Returns:
+            dict[str, int]: The number of notes and chunks saved.
+        """
+        LOG.info(f"Saving snapshot of the vector store to {path}.")
+        include = ["documents", "metadatas", "embeddings"]
+        writer = SnapshotWriter(
+            path,
+            self.openai_embedding_model,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+        )
+        try:
+            for kind, collection in ((NOTES, self.collection), (CHUNKS, self.chunk_collection)):
+                for page in self._iter_pages(collection, include=include, page_size=page_size):
+                    writer.write(
+                        kind, page["ids"], page["documents"], page["metadatas"], page["embeddings"]
+                    )
+                    if progress:
+                        progress(writer.counts[NOTES] + writer.counts[CHUNKS])
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+        return {"notes": writer.counts[NOTES], "chunks": writer.counts[CHUNKS]}
+
+    def restore(self, path: str, force: bool = False, progress=None) -> dict[str, int]:
+        """
+        Loads the notes and chunks of a snapshot file, with their embeddings.
+
+        Nothing is embedded again: the stored vectors are written as they are, and
+        also seed the embedding cache. Notes with the same ID are overwritten.
+
+        Args:
+            path (str): The snapshot file to read.
+            force (bool): Whether to restore a snapshot made with another embedding
+                model, whose vectors are not comparable with the store's queries.
+            progress (Callable[[int], None], optional): Called with the number of
+                records restored after each block.
+
+        Returns:
+            dict[str, int]: The number of notes and chunks restored.
+
+        Raises:
+            ValueError: If the snapshot was made with another embedding model and
+                `force` is False, or if the file is invalid.
+        """
+        reader = SnapshotReader(path)
+        try:
+            model = reader.embedding_model
+            if model != self.openai_embedding_model:
+                message = (
+                    f"Snapshot {path} was embedded with '{model}', "
+                    f"but the store uses '{self.openai_embedding_model}'."
+                )
+                if not force:
+                    raise ValueError(message + " Restore it with force to load it anyway.")
+                LOG.warning(message + " Restoring it anyway.")
+
+            LOG.info(f"Restoring snapshot {path} into the vector store.")
+            restored = {NOTES: 0, CHUNKS: 0}
+            for block in reader.blocks():
+                if block.kind == NOTES:
+                    self._restore_notes(block)
+                else:
+                    self.chunk_collection.upsert(
+                        ids=block.ids,
+                        documents=block.documents,
+                        metadatas=[self._upgrade_metadata(m) for m in block.metadatas],
+                        embeddings=block.embeddings,
+                    )
+                if model == self.openai_embedding_model:
+                    self._seed_embedding_cache(block)
+                restored[block.kind] += len(block.ids)
+                if progress:
+                    progress(restored[NOTES] + restored[CHUNKS])
+        finally:
+            reader.close()
+        return {"notes": restored[NOTES], "chunks": restored[CHUNKS]}
+
+    def _restore_notes(self, block: SnapshotBlock):
+        """
+        Writes a block of restored notes and keeps the derived indexes in sync.
+
+        Args:
+            block (SnapshotBlock): The notes to write.
+        Returns:
+            None
+        """
+        previous = self._get_metadatas(block.ids)
+        self.project_catalog.begin()
+        if previous:
+            # The chunks of the overwritten notes are replaced by those of the snapshot
+            self.chunk_collection.delete(where={"note_id": {"$in": list(previous)}})
+        self.collection.upsert(
+            ids=block.ids,
+            documents=block.documents,
+            metadatas=[self._upgrade_metadata(m) for m in block.metadatas],
+            embeddings=block.embeddings,
+        )
+        notes = [
+            Note(
+                content=document,
+                project=metadata.get("project", ""),
+                timestamp=datetime.datetime.fromisoformat(metadata["timestamp"]),
+                id=note_id,
+            )
+            for note_id, document, metadata in zip(block.ids, block.documents, block.metadatas)
+        ]
+        self._record_change(previous, notes)
+
+    def _seed_embedding_cache(self, block: SnapshotBlock):
+        """
+        Stores the embeddings of a restored block in the embedding cache.
+
+        Only the embeddings of texts embedded as a whole are cached: chunks and
+        short notes, as the embedding of a long note is the mean of its chunks.
+
+        Args:
+            block (SnapshotBlock): The restored records.
+        Returns:
+            None
+        """
+        vectors = {
+            self.embedding_cache.content_hash(document): embedding
+            for document, embedding in zip(block.documents, block.embeddings)
+            if block.kind == CHUNKS or len(document) <= self.chunk_size
+        }
+        self.embedding_cache.put_many(self.openai_embedding_model, vectors)
+
+    def shard(self, mode: str, shard_count: int = 16, progress=None) -> dict[str, int]:
+        """
+        Moves the notes and chunks of an unsharded store into per-project shards.
+
+        Embeddings are copied as they are, and the derived indexes keep working as
+        note IDs do not change. Queued notes are stored first. An interrupted
+        migration is finished by calling this again with the same mode.
+
+        Args:
+            mode (str): "project" for one shard per project, or "hash" to hash
+                projects into `shard_count` shards.
+            shard_count (int): The number of shards in "hash" mode.
+            progress (Callable[[int], None], optional): Called with the number of
+                records moved after each page.
+
+        Returns:
+            dict[str, int]: The number of note and chunk shards.
+
+        Raises:
+            ValueError: If the mode is unknown, or the store is already sharded
+                or was partly sharded with another mode.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown sharding mode '{mode}', expected one of {MODES}.")
+        names = collection_names(self.client)
+        collections = {"notia": self.collection, "notia_chunks": self.chunk_collection}
+        if not any(name in names for name in collections):
+            raise ValueError("The store is already sharded.")
+        for collection in collections.values():
+            if isinstance(collection, ShardedCollection) and collection.mode != mode:
+                raise ValueError(f"The store was partly sharded by {collection.mode}.")
+
+        self.ingest_queue.drain()
+        moved = 0
+        for name, collection in collections.items():
+            if isinstance(collection, ShardedCollection):
+                collection.close()
+            collections[name] = migrate_collection(
+                self.client,
+                name,
+                self.embedding_function,
+                mode=mode,
+                shard_count=shard_count,
+                max_workers=self.shard_workers,
+                progress=lambda copied: progress and progress(moved + copied),
+            )
+            moved += collections[name].count()
+        self.collection = collections["notia"]
+        self.chunk_collection = collections["notia_chunks"]
+        return {
+            "notes": len(self.collection.shards),
+            "chunks": len(self.chunk_collection.shards),
+        }
 
     def get_all_projects(self) -> list[str]:
         """
@@ -202,20 +1601,33 @@ class VectorStore:
             list[str]: List of unique project names.
         """
         LOG.info("Retrieving all unique projects from vector store.")
-        all_notes = self.get_all_notes()
+        return self.project_catalog.projects()
+
+    def get_project_stats(self) -> list[dict]:
+        """
+        Retrieves the number of notes and the last update time of every project.
 
-        if not all_notes or not all_notes.get("metadatas"):
-            return []
+        Returns:
+            list[dict]: One dict per project with `project`, `note_count` and `last_updated`.
+        """
+        return self.project_catalog.stats()
 
-        # Extract unique projects from metadata
-        projects = set()
-        for metadata in all_notes["metadatas"]:
-            project = metadata.get("project", "")
-            if project:  # Only add non-empty projects
-                projects.add(project)
+    def rebuild_project_catalog(self):
+        """
+        Rebuilds the project catalog from the metadata of every note.
 
-        return sorted(list(projects))
+        This runs automatically when the catalog does not match the collection,
+        for example after a crash between a write and the catalog update.
+
+        Returns:
+            None
+        """
+        self.project_catalog.rebuild(
+            note
+            for page in self.iter_notes(include=["metadatas"])
+            for note in zip(page["ids"], page["metadatas"])
+        )
 
 
-# Initialize the vector store once
-vs = VectorStore()
+# Time every public method of the store
+metrics.instrument_methods(VectorStore, "vector_store")
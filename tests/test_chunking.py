@@ -0,0 +1,43 @@
+from chunking import chunk_ids, split_into_chunks
+
+
+def test_short_text_is_a_single_chunk():
+    assert split_into_chunks("short note", chunk_size=100) == ["short note"]
+
+
+def test_chunks_are_bounded_and_overlap():
+    text = " ".join(f"word{i}" for i in range(400))
+
+    chunks = split_into_chunks(text, chunk_size=200, overlap=50)
+
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    assert chunks[0].startswith("word0 ")
+    assert chunks[-1].endswith("word399")
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous[-20:] in chunk
+
+
+def test_chunks_end_on_word_boundaries():
+    text = " ".join(f"word{i}" for i in range(400))
+
+    chunks = split_into_chunks(text, chunk_size=200, overlap=0)
+
+    assert all(chunk.endswith(" ") for chunk in chunks[:-1])
+    assert "".join(chunks) == text
+
+
+def test_chunks_prefer_paragraph_boundaries():
+    text = "a" * 120 + "\n\n" + "b" * 150
+
+    chunks = split_into_chunks(text, chunk_size=200, overlap=0)
+
+    assert chunks == ["a" * 120 + "\n\n", "b" * 150]
+
+
+def test_chunk_ids_depend_on_content_only():
+    ids = chunk_ids("note", ["first", "second", "first"])
+    shifted = chunk_ids("note", ["inserted", "first", "second", "first"])
+
+    assert len(set(ids)) == 3
+    assert shifted[1:] == ids
+    assert all(chunk_id.startswith("note:") for chunk_id in ids)
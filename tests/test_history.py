@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("agents")
+
+from history import SUMMARY_PREFIX, CompactingSession, is_summary
+
+
+class MemorySession:
+    """In-memory session storing items in a list."""
+
+    def __init__(self, items=None):
+        self.session_id = "test"
+        self.items = list(items or [])
+
+    async def get_items(self, limit=None):
+        return list(self.items if limit is None else self.items[-limit:])
+
+    async def add_items(self, items):
+        self.items.extend(items)
+
+    async def pop_item(self):
+        return self.items.pop() if self.items else None
+
+    async def clear_session(self):
+        self.items.clear()
+
+
+def turn(text, answer="ok"):
+    return [{"role": "user", "content": text}, {"role": "assistant", "content": answer}]
+
+
+def summary(text):
+    return {"role": "system", "content": SUMMARY_PREFIX + text}
+
+
+async def fixed_summary(previous, turns):
+    return "the summary"
+
+
+async def failing_summary(previous, turns):
+    raise RuntimeError("model unavailable")
+
+
+def test_limit_keeps_the_summary_in_front():
+    stored = [summary("earlier context"), *turn("first"), *turn("second")]
+    session = CompactingSession(MemorySession(stored), fixed_summary, max_tokens=10_000)
+
+    items = asyncio.run(session.get_items(limit=2))
+
+    assert items == [summary("earlier context"), *turn("second")]
+
+
+def test_zero_limit_returns_only_the_summary():
+    stored = [summary("earlier context"), *turn("first")]
+    session = CompactingSession(MemorySession(stored), fixed_summary, max_tokens=10_000)
+
+    assert asyncio.run(session.get_items(limit=0)) == [summary("earlier context")]
+
+
+def test_limit_without_summary_returns_the_recent_items():
+    stored = [*turn("first"), *turn("second")]
+    session = CompactingSession(MemorySession(stored), fixed_summary, max_tokens=10_000)
+
+    assert asyncio.run(session.get_items(limit=3)) == stored[-3:]
+
+
+def test_long_history_is_folded_into_the_summary():
+    stored = [item for i in range(20) for item in turn(f"question {i} " + "x" * 200)]
+    wrapped = MemorySession(stored)
+    session = CompactingSession(wrapped, fixed_summary, max_tokens=500)
+
+    items = asyncio.run(session.get_items())
+
+    assert is_summary(items[0])
+    assert items[0]["content"] == SUMMARY_PREFIX + "the summary"
+    assert items[-2:] == stored[-2:]
+    assert len(items) < len(stored)
+    # The stored session is rewritten, so the summary is not recomputed next time
+    assert wrapped.items == items
+
+
+def test_failed_summary_keeps_the_stored_history():
+    stored = [summary("earlier context")] + [
+        item for i in range(20) for item in turn(f"question {i} " + "x" * 200)
+    ]
+    wrapped = MemorySession(stored)
+    session = CompactingSession(wrapped, failing_summary, max_tokens=500)
+
+    items = asyncio.run(session.get_items())
+
+    assert items[0] == summary("earlier context")
+    assert items[-2:] == stored[-2:]
+    assert wrapped.items == stored
+
+
+def test_only_the_last_turn_keeps_its_tool_outputs_in_full():
+    output = {"type": "function_call_output", "call_id": "1", "output": "y" * 500}
+    stored = [
+        {"role": "user", "content": "first"},
+        output,
+        {"role": "user", "content": "second"},
+        output,
+    ]
+    session = CompactingSession(
+        MemorySession(stored), fixed_summary, max_tokens=10_000, tool_output_chars=50
+    )
+
+    items = asyncio.run(session.get_items())
+
+    assert items[1]["output"].startswith("y" * 50 + "\n[truncated")
+    assert items[3] == output
+
+
+class FailingSession(MemorySession):
+    """Fails to write the next batch of items after writing its first one."""
+
+    def __init__(self, items=None):
+        super().__init__(items)
+        self.fail_next = True
+
+    async def add_items(self, items):
+        if self.fail_next:
+            self.fail_next = False
+            self.items.extend(items[:1])
+            raise RuntimeError("database is locked")
+        await super().add_items(items)
+
+
+class SlowSession(MemorySession):
+    """Waits for `release` before writing items."""
+
+    def __init__(self, items=None):
+        super().__init__(items)
+        self.release = asyncio.Event()
+
+    async def add_items(self, items):
+        await self.release.wait()
+        await super().add_items(items)
+
+
+def long_history():
+    return [item for i in range(20) for item in turn(f"question {i} " + "x" * 200)]
+
+
+def test_failed_rewrite_puts_the_stored_history_back():
+    stored = long_history()
+    wrapped = FailingSession(stored)
+    session = CompactingSession(wrapped, fixed_summary, max_tokens=500)
+
+    items = asyncio.run(session.get_items())
+
+    assert is_summary(items[0])
+    assert wrapped.items == stored
+
+
+def test_cancelled_query_does_not_interrupt_the_rewrite():
+    stored = long_history()
+    wrapped = SlowSession(stored)
+    session = CompactingSession(wrapped, fixed_summary, max_tokens=500)
+
+    async def cancel_during_rewrite():
+        query = asyncio.create_task(session.get_items())
+        while wrapped.items:
+            await asyncio.sleep(0)
+        query.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await query
+        wrapped.release.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+    asyncio.run(cancel_during_rewrite())
+
+    assert is_summary(wrapped.items[0])
+    assert wrapped.items[-2:] == stored[-2:]
@@ -0,0 +1,176 @@
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("notia_analyzer")
+
+import ingest_queue
+import store
+from ingest_queue import IngestQueue
+from models import Note
+
+
+class FakeStore:
+    """Records the notes stored, optionally failing the next writes."""
+
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+        self.stored = threading.Event()
+
+    def add_notes(self, notes, batch_size=None, max_concurrency=None):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("embedding service unavailable")
+        self.batches.append([note.id for note in notes])
+        self.stored.set()
+
+
+class SerialStore(FakeStore):
+    """Fails if two writes overlap. Updates discard the pending note, as the vector store does."""
+
+    def __init__(self):
+        super().__init__()
+        self.queue = None
+        self.updated = []
+        self.overlaps = 0
+        self._writing = threading.Lock()
+
+    def _write(self, record):
+        if not self._writing.acquire(blocking=False):
+            self.overlaps += 1
+            return
+        try:
+            time.sleep(0.001)
+            record()
+        finally:
+            self._writing.release()
+
+    def add_notes(self, notes, batch_size=None, max_concurrency=None):
+        self._write(lambda: super(SerialStore, self).add_notes(notes))
+
+    def update_note(self, note):
+        self.queue.discard([note.id])
+        self._write(lambda: self.updated.append(note.id))
+
+
+def make_note(note_id, content="pending note about sqlite journals"):
+    return Note(
+        content=content,
+        project="alpha",
+        timestamp=datetime.datetime(2024, 5, 1, 12, 0),
+        id=note_id,
+    )
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return str(tmp_path / "ingest.sqlite3")
+
+
+def test_queued_notes_are_stored_in_batches(journal):
+    store = FakeStore()
+    queue = IngestQueue(store, journal, batch_size=2, flush_interval=60)
+    for i in range(3):
+        queue.enqueue(make_note(f"n{i}"))
+
+    queue.drain()
+
+    assert store.batches == [["n0", "n1"], ["n2"]]
+    assert len(queue) == 0
+    queue.close()
+
+
+def test_worker_stores_queued_notes(journal):
+    store = FakeStore()
+    queue = IngestQueue(store, journal, flush_interval=0.01)
+
+    queue.enqueue(make_note("n1"))
+
+    assert store.stored.wait(5)
+    queue.close()
+    assert store.batches == [["n1"]]
+
+
+def test_notes_left_in_the_journal_are_replayed(journal, monkeypatch):
+    monkeypatch.setattr(ingest_queue, "RETRY_DELAY", 60)
+    queue = IngestQueue(FakeStore(failures=100), journal, flush_interval=60)
+    queue.enqueue(make_note("n1"))
+    queue.enqueue(make_note("n2"))
+    queue.close(timeout=0)
+
+    store = FakeStore()
+    reopened = IngestQueue(store, journal, flush_interval=0.01)
+
+    assert store.stored.wait(5)
+    reopened.close()
+    assert store.batches == [["n1", "n2"]]
+    assert len(reopened) == 0
+
+
+def test_a_failed_write_keeps_the_notes_pending(journal):
+    store = FakeStore(failures=1)
+    queue = IngestQueue(store, journal, flush_interval=60)
+    queue.enqueue(make_note("n1"))
+
+    with pytest.raises(ConnectionError):
+        queue.flush_batch()
+    assert len(queue) == 1
+
+    assert queue.flush_batch() == 1
+    assert len(queue) == 0
+    queue.close()
+
+
+def test_pending_notes_can_be_read_searched_and_discarded(journal, monkeypatch):
+    monkeypatch.setattr(ingest_queue, "RETRY_DELAY", 60)
+    queue = IngestQueue(FakeStore(failures=100), journal, flush_interval=60)
+    queue.enqueue(make_note("n1", "grocery list with apples"))
+    queue.enqueue(make_note("n2", "notes on sqlite journals"))
+
+    assert [note.id for note in queue.get(["n2", "unknown", "n1"])] == ["n2", "n1"]
+    assert [note.id for note, _ in queue.search("sqlite")] == ["n2"]
+
+    assert queue.discard(["n1", "unknown"]) == ["n1"]
+    assert queue.get(["n1"]) == []
+    assert queue.search("apples") == []
+    assert len(queue) == 1
+    queue.close(timeout=0)
+
+
+@pytest.mark.parametrize("single_writer", [False, True])
+def test_flushes_do_not_overlap_other_writes(journal, single_writer):
+    serial_store = SerialStore()
+    queue = IngestQueue(
+        serial_store, journal, batch_size=4, flush_interval=0.001, write=store.write
+    )
+    serial_store.queue = queue
+    executor = ThreadPoolExecutor(max_workers=1)
+    if single_writer:
+        store.set_writer(
+            lambda method, *args, **kwargs: executor.submit(method, *args, **kwargs).result()
+        )
+
+    def update():
+        for i in range(50):
+            store.write(serial_store.update_note, make_note(f"n{i}"))
+
+    try:
+        updater = threading.Thread(target=update)
+        updater.start()
+        for i in range(50):
+            queue.enqueue(make_note(f"n{i}"))
+        updater.join(10)
+        queue.drain()
+    finally:
+        store.set_writer(None)
+        executor.shutdown()
+        queue.close()
+
+    assert not updater.is_alive()
+    assert serial_store.overlaps == 0
+    assert len(serial_store.updated) == 50
+    assert len(queue) == 0
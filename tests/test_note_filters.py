@@ -0,0 +1,42 @@
+import datetime
+
+from note_filters import matches_filter, note_filter
+
+SINCE = datetime.datetime(2024, 1, 1)
+UNTIL = datetime.datetime(2024, 6, 30)
+
+
+def test_no_condition_gives_no_filter():
+    assert note_filter() is None
+    assert matches_filter({"project": "alpha"}, None)
+
+
+def test_single_condition_is_not_wrapped():
+    assert note_filter(project="alpha") == {"project": "alpha"}
+
+
+def test_conditions_are_combined():
+    assert note_filter(project="alpha", since=SINCE, until=UNTIL) == {
+        "$and": [
+            {"project": "alpha"},
+            {"timestamp_epoch": {"$gte": SINCE.timestamp()}},
+            {"timestamp_epoch": {"$lte": UNTIL.timestamp()}},
+        ]
+    }
+
+
+def test_matching_follows_the_filter():
+    where = note_filter(project="alpha", since=SINCE, until=UNTIL)
+    inside = datetime.datetime(2024, 3, 1).timestamp()
+    after = datetime.datetime(2024, 8, 1).timestamp()
+
+    assert matches_filter({"project": "alpha", "timestamp_epoch": inside}, where)
+    assert not matches_filter({"project": "beta", "timestamp_epoch": inside}, where)
+    assert not matches_filter({"project": "alpha", "timestamp_epoch": after}, where)
+    assert not matches_filter({"project": "alpha"}, where)
+
+
+def test_matching_with_operators():
+    assert matches_filter({"project": "alpha"}, {"project": {"$in": ["alpha", "beta"]}})
+    assert not matches_filter({"project": "gamma"}, {"project": {"$in": ["alpha", "beta"]}})
+    assert matches_filter({"project": "alpha"}, {"project": {"$eq": "alpha"}})
@@ -0,0 +1,96 @@
+import pytest
+
+from project_catalog import ProjectCatalog
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = ProjectCatalog(str(tmp_path / "catalog.sqlite3"))
+    yield catalog
+    catalog.close()
+
+
+def write(catalog, removed=(), added=()):
+    catalog.begin()
+    catalog.apply(removed=removed, added=added)
+
+
+def test_added_notes_are_counted_per_project(catalog):
+    write(
+        catalog,
+        added=[
+            ("n1", "alpha", "2024-01-01T00:00:00"),
+            ("n2", "alpha", "2024-03-01T00:00:00"),
+            ("n3", "", "2024-02-01T00:00:00"),
+        ],
+    )
+
+    assert catalog.total() == 3
+    assert catalog.projects() == ["alpha"]
+    assert catalog.stats() == [
+        {"project": "alpha", "note_count": 2, "last_updated": "2024-03-01T00:00:00"}
+    ]
+    assert not catalog.is_stale()
+
+
+def test_removing_the_latest_note_recomputes_the_last_update(catalog):
+    write(
+        catalog,
+        added=[("n1", "alpha", "2024-01-01T00:00:00"), ("n2", "alpha", "2024-03-01T00:00:00")],
+    )
+
+    write(catalog, removed=["n2"])
+
+    assert catalog.stats() == [
+        {"project": "alpha", "note_count": 1, "last_updated": "2024-01-01T00:00:00"}
+    ]
+
+
+def test_moving_a_note_updates_both_projects(catalog):
+    write(catalog, added=[("n1", "alpha", "2024-01-01T00:00:00")])
+
+    write(catalog, removed=["n1"], added=[("n1", "beta", "2024-02-01T00:00:00")])
+
+    assert catalog.projects() == ["beta"]
+    assert catalog.count("alpha") == 0
+    assert catalog.count("beta") == 1
+    assert catalog.total() == 1
+
+
+def test_rewriting_a_note_is_not_counted_twice(catalog):
+    write(catalog, added=[("n1", "alpha", "2024-01-01T00:00:00")])
+
+    write(catalog, added=[("n1", "alpha", "2024-01-02T00:00:00")])
+
+    assert catalog.count("alpha") == 1
+    assert catalog.stats()[0]["last_updated"] == "2024-01-02T00:00:00"
+
+
+def test_a_write_never_applied_makes_the_catalog_stale(tmp_path):
+    path = str(tmp_path / "catalog.sqlite3")
+    catalog = ProjectCatalog(path)
+    write(catalog, added=[("n1", "alpha", "2024-01-01T00:00:00")])
+    catalog.begin()
+    catalog.close()
+
+    reopened = ProjectCatalog(path)
+    assert reopened.is_stale()
+
+    reopened.rebuild([("n1", {"project": "alpha", "timestamp": "2024-01-01T00:00:00"})])
+    assert not reopened.is_stale()
+    reopened.close()
+
+
+def test_rebuild_replaces_the_content(catalog):
+    write(catalog, added=[("n1", "alpha", "2024-01-01T00:00:00")])
+
+    catalog.rebuild(
+        [
+            ("n2", {"project": "beta", "timestamp": "2024-02-01T00:00:00"}),
+            ("n3", {"project": "beta", "timestamp": "2024-04-01T00:00:00"}),
+        ]
+    )
+
+    assert catalog.stats() == [
+        {"project": "beta", "note_count": 2, "last_updated": "2024-04-01T00:00:00"}
+    ]
@@ -0,0 +1,46 @@
+from rerank_policy import FULL, SHRUNK, SKIPPED_FEW_CANDIDATES, SKIPPED_SEPARATED, RerankPolicy
+
+
+def make_policy():
+    return RerankPolicy(separation_ratio=0.5, window_ratio=0.6, budget_ms=1000)
+
+
+def test_skips_when_there_are_no_more_candidates_than_results():
+    assert make_policy().plan([0.1, 0.2, 0.3], 3) == (SKIPPED_FEW_CANDIDATES, [])
+
+
+def test_skips_when_the_best_match_is_clearly_separated():
+    assert make_policy().plan([0.1, 0.9, 0.95, 1.0], 2) == (SKIPPED_SEPARATED, [])
+
+
+def test_reranks_everything_with_lexical_only_candidates():
+    assert make_policy().plan([0.1, None, 0.8], 1) == (FULL, [0, 1, 2])
+
+
+def test_reranks_everything_when_distances_are_equal():
+    assert make_policy().plan([0.5, 0.5, 0.5], 1) == (FULL, [0, 1, 2])
+
+
+def test_picks_the_candidates_within_the_window_wherever_they_are_ranked():
+    # As after rank fusion, the closest candidates are not at the front
+    distances = [0.9, 0.1, 0.8, 0.15, 0.2, 1.0]
+
+    decision, positions = make_policy().plan(distances, 2)
+
+    assert decision == SHRUNK
+    assert positions == [1, 3, 4]
+
+
+def test_pads_the_window_with_the_next_closest_candidates():
+    distances = [0.9, 0.1, 0.8, 0.15, 0.2, 1.0]
+
+    decision, positions = make_policy().plan(distances, 4)
+
+    assert decision == SHRUNK
+    assert positions == [1, 2, 3, 4]
+
+
+def test_reranks_everything_when_all_candidates_are_within_the_window():
+    policy = RerankPolicy(separation_ratio=0.5, window_ratio=1.0, budget_ms=1000)
+
+    assert policy.plan([0.3, 0.1, 0.15, 0.2], 2) == (FULL, [0, 1, 2, 3])
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+notia_analyzer = pytest.importorskip("notia_analyzer")
+
+
+def test_bm25_ranks_matching_documents():
+    index = notia_analyzer.Bm25Index()
+    index.upsert_many(
+        ["n1", "n2", "n3"],
+        ["sqlite journal recovery", "grocery list", "sqlite sqlite indexes"],
+    )
+
+    hits = index.search("sqlite", 5)
+
+    assert [doc_id for doc_id, _ in hits] == ["n3", "n1"]
+    assert index.remove("n3")
+    assert [doc_id for doc_id, _ in index.search("sqlite", 5)] == ["n1"]
+    assert len(index) == 2
+
+
+def test_keyword_index_counts_by_project():
+    index = notia_analyzer.KeywordIndex()
+    index.upsert("n1", "alpha", 0.0, "database database migration")
+    index.upsert("n2", "beta", 0.0, "database backups")
+
+    assert index.top_keywords(1)[0][0] == "database"
+    assert {keyword for keyword, *_ in index.top_keywords(5, project="beta")} == {
+        "backups",
+        "database",
+    }
+    assert index.top_keywords(5, project="alpha", since=1.0) == []
+    assert index.remove("n1")
+    assert len(index) == 1
+
+
+def test_near_duplicates_are_paired():
+    signatures = notia_analyzer.minhash_signatures(
+        [
+            "the quick brown fox jumps over the lazy dog",
+            "the quick brown fox jumps over the lazy dog",
+            "an unrelated note about sqlite journals",
+        ]
+    )
+
+    assert len(signatures[0]) == 64
+    assert notia_analyzer.signature_similarity(signatures[0], signatures[1]) == 1.0
+    pairs = notia_analyzer.find_duplicate_pairs(["n1", "n2", "n3"], signatures)
+    assert [({first, second}, similarity) for first, second, similarity in pairs] == [
+        ({"n1", "n2"}, 1.0)
+    ]
+
+
+def test_content_without_words_has_an_empty_signature():
+    empty, note, same = notia_analyzer.minhash_signatures(
+        ["", "the quick brown fox jumps", "the quick brown fox jumps"]
+    )
+
+    assert empty == []
+    assert len(note) == 64
+    pairs = notia_analyzer.find_duplicate_pairs(["e1", "e2", "n1", "n2"], [empty, [], note, same])
+    assert [({first, second}, similarity) for first, second, similarity in pairs] == [
+        ({"n1", "n2"}, 1.0)
+    ]
+
+
+def test_signatures_do_not_depend_on_the_build():
+    # Signatures are compared with those of other processes, so their values are pinned
+    assert notia_analyzer.minhash_signatures(["Alpha beta, gamma delta"], num_perm=4) == [
+        [107128297784020842, 126338202923146876, 260782788124969785, 208292178293009293]
+    ]
+
+
+def test_search_while_writing_from_another_thread():
+    index = notia_analyzer.Bm25Index()
+    index.upsert_many([f"n{i}" for i in range(100)], [f"note {i} about sqlite" for i in range(100)])
+    errors = []
+
+    def write():
+        try:
+            for i in range(200):
+                index.upsert_many([f"w{i}"], [f"written note {i} about sqlite"])
+        except Exception as e:
+            errors.append(e)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    for _ in range(200):
+        assert index.search("sqlite", 10)
+    writer.join()
+
+    assert errors == []
+    assert len(index) == 300
@@ -0,0 +1,43 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+import server as server_module
+from server import HttpError, NotiaServer, Request
+
+
+def post(payload):
+    return Request("POST", "/search", {}, {}, json.dumps(payload).encode("utf-8"))
+
+
+@pytest.mark.parametrize("n_results", ["many", None, [3], 0, -2])
+def test_search_rejects_invalid_result_counts(n_results):
+    server = NotiaServer()
+
+    with pytest.raises(HttpError) as error:
+        asyncio.run(server.search(post({"query": "notes", "n_results": n_results})))
+
+    assert error.value.status == HTTPStatus.BAD_REQUEST
+
+
+def test_least_recently_used_idle_sessions_are_dropped(monkeypatch):
+    monkeypatch.setattr(server_module, "MAX_SESSIONS", 3)
+    monkeypatch.setattr(server_module, "setup_session", lambda session_id: session_id)
+    server = NotiaServer()
+
+    async def use_sessions():
+        _, busy = server._session("a")
+        await busy.acquire()
+        _, lock = server._session("b")
+        server._session("c")
+        server._session("b")
+        server._session("d")
+        return lock
+
+    lock = asyncio.run(use_sessions())
+
+    # "a" is answering a query, and "b" was used after "c"
+    assert list(server._sessions) == ["a", "b", "d"]
+    assert server._session("b")[1] is lock
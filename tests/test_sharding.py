@@ -0,0 +1,248 @@
+import chromadb
+import pytest
+
+from sharding import HASH, PROJECT, ShardedCollection, _projects_in, migrate_collection, shard_layout
+
+
+@pytest.fixture
+def client(tmp_path):
+    return chromadb.PersistentClient(path=str(tmp_path))
+
+
+@pytest.fixture
+def sharded(client):
+    collection = ShardedCollection(client, "notes", mode=PROJECT, max_workers=2)
+    yield collection
+    collection.close()
+
+
+def record(note_id, project, x):
+    return note_id, f"note {note_id}", {"project": project}, [x, 0.0, 0.0]
+
+
+def add(collection, *records):
+    ids, documents, metadatas, embeddings = map(list, zip(*records))
+    collection.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+
+def shard_ids(collection, project):
+    return set(collection._shard(project).get(include=[])["ids"])
+
+
+def test_records_are_routed_to_the_shard_of_their_project(sharded):
+    add(sharded, record("a1", "alpha", 0.1), record("b1", "beta", 0.2), record("a2", "alpha", 0.3))
+
+    assert len(sharded.shards) == 2
+    assert sharded.count() == 3
+    assert shard_ids(sharded, "alpha") == {"a1", "a2"}
+    assert shard_ids(sharded, "beta") == {"b1"}
+
+
+def test_filters_on_a_project_only_read_its_shard(sharded):
+    add(sharded, record("a1", "alpha", 0.1), record("b1", "beta", 0.2))
+
+    assert [shard.name for shard in sharded._shards_for({"project": "alpha"})] == [
+        sharded._shard_name("alpha")
+    ]
+    assert len(sharded._shards_for({"project": {"$in": ["alpha", "beta"]}})) == 2
+    assert len(sharded._shards_for({"timestamp_epoch": {"$gte": 0}})) == 2
+    assert sharded.get(where={"project": "beta"})["ids"] == ["b1"]
+
+
+def test_projects_of_a_filter():
+    assert _projects_in(None) is None
+    assert _projects_in({"project": "alpha"}) == {"alpha"}
+    assert _projects_in({"project": {"$eq": "alpha"}}) == {"alpha"}
+    assert _projects_in({"project": {"$in": ["alpha", "beta"]}}) == {"alpha", "beta"}
+    assert _projects_in(
+        {"$and": [{"timestamp_epoch": {"$gte": 0}}, {"project": "alpha"}]}
+    ) == {"alpha"}
+    assert _projects_in({"timestamp_epoch": {"$gte": 0}}) is None
+
+
+def test_query_merges_the_nearest_records_of_all_shards(sharded):
+    add(
+        sharded,
+        record("a1", "alpha", 0.1),
+        record("a2", "alpha", 0.9),
+        record("b1", "beta", 0.2),
+        record("b2", "beta", 0.5),
+        record("c1", "gamma", 0.3),
+    )
+
+    results = sharded.query(query_embeddings=[[0.0, 0.0, 0.0], [1.0, 0.0, 0.0]], n_results=3)
+
+    assert results["ids"] == [["a1", "b1", "c1"], ["a2", "b2", "c1"]]
+    assert results["distances"][0] == sorted(results["distances"][0])
+    assert results["documents"][0] == ["note a1", "note b1", "note c1"]
+    assert [metadata["project"] for metadata in results["metadatas"][1]] == [
+        "alpha",
+        "beta",
+        "gamma",
+    ]
+
+
+def test_query_with_a_project_filter_stays_in_its_shard(sharded):
+    add(sharded, record("a1", "alpha", 0.1), record("b1", "beta", 0.0))
+
+    results = sharded.query(
+        query_embeddings=[[0.0, 0.0, 0.0]], n_results=5, where={"project": "alpha"}
+    )
+
+    assert results["ids"] == [["a1"]]
+
+
+def test_upsert_moves_a_record_whose_project_changed(sharded):
+    add(sharded, record("n1", "alpha", 0.1))
+
+    sharded.upsert(
+        ids=["n1"], documents=["moved"], metadatas=[{"project": "beta"}], embeddings=[[0.1, 0, 0]]
+    )
+
+    assert shard_ids(sharded, "alpha") == set()
+    assert shard_ids(sharded, "beta") == {"n1"}
+    assert sharded.count() == 1
+
+
+def test_update_moves_a_record_and_keeps_the_fields_not_given(sharded):
+    add(sharded, record("n1", "alpha", 0.4))
+
+    sharded.update(ids=["n1"], metadatas=[{"project": "beta"}])
+
+    moved = sharded.get(ids=["n1"], include=["documents", "metadatas", "embeddings"])
+    assert moved["documents"] == ["note n1"]
+    assert moved["metadatas"] == [{"project": "beta"}]
+    assert moved["embeddings"][0][0] == pytest.approx(0.4)
+    assert shard_ids(sharded, "alpha") == set()
+
+
+def test_pages_cover_every_record_once(sharded):
+    add(sharded, *[record(f"n{i}", f"p{i % 3}", i / 10) for i in range(10)])
+
+    pages = [sharded.get(include=[], limit=4, offset=offset)["ids"] for offset in (0, 4, 8)]
+
+    assert [len(page) for page in pages] == [4, 4, 2]
+    assert sorted(note_id for page in pages for note_id in page) == sorted(
+        f"n{i}" for i in range(10)
+    )
+
+
+def test_filtered_pages_skip_shards_without_matches(sharded):
+    add(sharded, *[record(f"n{i}", f"p{i % 3}", i / 10) for i in range(9)])
+    where = {"project": {"$in": ["p0", "p2"]}}
+
+    pages = [sharded.get(where=where, include=[], limit=2, offset=offset)["ids"] for offset in (0, 2, 4)]
+
+    assert sorted(note_id for page in pages for note_id in page) == [
+        "n0", "n2", "n3", "n5", "n6", "n8"
+    ]
+
+
+def test_delete_by_id_and_by_filter(sharded):
+    add(sharded, record("a1", "alpha", 0.1), record("a2", "alpha", 0.2), record("b1", "beta", 0.3))
+
+    sharded.delete(ids=["a1", "unknown"])
+    assert sharded.count() == 2
+
+    sharded.delete(where={"project": "beta"})
+    assert sharded.get(include=[])["ids"] == ["a2"]
+
+
+def test_hash_mode_uses_a_fixed_number_of_shards(client):
+    collection = ShardedCollection(client, "notes", mode=HASH, shard_count=4, max_workers=2)
+    add(collection, *[record(f"n{i}", f"project-{i}", i / 100) for i in range(40)])
+
+    assert len(collection.shards) <= 4
+    assert collection.count() == 40
+    assert shard_layout(client, "notes") == (HASH, 4)
+    collection.close()
+
+
+def test_metadata_is_shared_by_the_shards(sharded):
+    add(sharded, record("a1", "alpha", 0.1), record("b1", "beta", 0.2))
+
+    sharded.modify({"metadata_version": 2})
+
+    assert sharded.metadata == {"metadata_version": 2}
+    for shard in sharded.shards.values():
+        assert shard.metadata["metadata_version"] == 2
+        assert shard.metadata["sharding"] == PROJECT
+
+
+def test_migration_moves_every_record_into_shards(client):
+    single = client.create_collection("notes", metadata={"metadata_version": 2})
+    single.add(
+        ids=[f"n{i}" for i in range(7)],
+        documents=[f"note {i}" for i in range(7)],
+        metadatas=[{"project": f"p{i % 2}"} for i in range(7)],
+        embeddings=[[i / 10, 0.0, 0.0] for i in range(7)],
+    )
+
+    sharded = migrate_collection(client, "notes", mode=PROJECT, page_size=3, max_workers=2)
+
+    assert "notes" not in [collection.name for collection in client.list_collections()]
+    assert sharded.count() == 7
+    assert len(sharded.shards) == 2
+    assert sharded.metadata == {"metadata_version": 2}
+    assert sharded.get(ids=["n3"], include=["embeddings"])["embeddings"][0][0] == pytest.approx(0.3)
+    sharded.close()
+
+
+def test_interrupted_migration_is_resumed(client):
+    single = client.create_collection("notes")
+    single.add(
+        ids=[f"n{i}" for i in range(6)],
+        documents=[f"note {i}" for i in range(6)],
+        metadatas=[{"project": f"p{i % 2}"} for i in range(6)],
+        embeddings=[[i / 10, 0.0, 0.0] for i in range(6)],
+    )
+    partial = ShardedCollection(client, "notes", mode=PROJECT, max_workers=2)
+    page = single.get(include=["documents", "metadatas", "embeddings"], limit=2)
+    partial.upsert(
+        ids=page["ids"],
+        documents=page["documents"],
+        metadatas=page["metadatas"],
+        embeddings=page["embeddings"],
+    )
+    partial.close()
+
+    sharded = migrate_collection(client, "notes", mode=PROJECT, max_workers=2)
+
+    assert sharded.count() == 6
+    sharded.close()
+
+
+def racing(collection, write):
+    """Runs `write` right after the next lookup has scanned the shards."""
+    scan = collection._map
+
+    def scan_then_write(function, items):
+        result = scan(function, items)
+        collection._map = scan
+        write()
+        return result
+
+    collection._map = scan_then_write
+
+
+def test_lookup_racing_an_addition_does_not_hide_the_record(sharded):
+    add(sharded, record("a1", "alpha", 0.1))
+    racing(sharded, lambda: add(sharded, record("b1", "beta", 0.2)))
+
+    assert sharded._locate(["b1"]) == {}
+
+    assert sharded.get(ids=["b1"], include=[])["ids"] == ["b1"]
+    sharded.delete(ids=["b1"])
+    assert sharded.count() == 1
+
+
+def test_lookup_racing_a_move_does_not_remember_the_old_shard(client, sharded):
+    add(sharded, record("n1", "alpha", 0.1))
+    # A second view of the collection, which has not seen the record yet
+    reader = ShardedCollection(client, "notes", mode=PROJECT, max_workers=2)
+    racing(reader, lambda: reader.update(ids=["n1"], metadatas=[{"project": "beta"}]))
+
+    assert reader._locate(["n1"]) == {"n1": reader._shard_name("alpha")}
+
+    assert reader.get(ids=["n1"])["metadatas"] == [{"project": "beta"}]
+    reader.close()
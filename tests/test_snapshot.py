@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pytest
+
+from snapshot import CHUNKS, NOTES, SnapshotReader, SnapshotWriter
+
+
+def write_snapshot(path):
+    writer = SnapshotWriter(path, "text-embedding-3-small", metadata_version=2)
+    writer.write(
+        NOTES,
+        ["n1", "n2"],
+        ["première note", "second note"],
+        [{"project": "alpha"}, {"project": "beta"}],
+        [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]],
+    )
+    writer.write(NOTES, [], [], [], [])
+    writer.write(CHUNKS, ["n1#0"], ["première"], [{"note_id": "n1"}], [[0.7, 0.8, 0.9]])
+    writer.close()
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "notes.snapshot")
+    write_snapshot(path)
+
+    reader = SnapshotReader(path)
+    blocks = list(reader.blocks())
+    reader.close()
+
+    assert reader.embedding_model == "text-embedding-3-small"
+    assert reader.header["metadata_version"] == 2
+    assert reader.counts == {NOTES: 2, CHUNKS: 1}
+    assert [block.kind for block in blocks] == [NOTES, CHUNKS]
+    assert blocks[0].ids == ["n1", "n2"]
+    assert blocks[0].documents == ["première note", "second note"]
+    assert blocks[0].metadatas == [{"project": "alpha"}, {"project": "beta"}]
+    assert blocks[0].embeddings.dtype == np.float32
+    np.testing.assert_allclose(blocks[0].embeddings, [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]])
+    assert blocks[1].ids == ["n1#0"]
+    assert not os.path.exists(f"{path}.tmp")
+
+
+def test_truncated_file_is_rejected(tmp_path):
+    path = str(tmp_path / "notes.snapshot")
+    write_snapshot(path)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 5)
+
+    reader = SnapshotReader(path)
+    with pytest.raises(ValueError, match="truncated"):
+        list(reader.blocks())
+    reader.close()
+
+
+def test_missing_block_is_rejected(tmp_path):
+    path = str(tmp_path / "notes.snapshot")
+    writer = SnapshotWriter(path, "text-embedding-3-small")
+    writer.write(NOTES, ["n1"], ["note"], [{}], [[0.1, 0.2]])
+    writer.close()
+    # Counts claim more records than the blocks hold
+    with open(path, "r+b") as f:
+        data = bytearray(f.read())
+        data[10:18] = (2).to_bytes(8, "little")
+        f.seek(0)
+        f.write(data)
+
+    reader = SnapshotReader(path)
+    with pytest.raises(ValueError, match="incomplete"):
+        list(reader.blocks())
+    reader.close()
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "notes.csv"
+    path.write_text("content,project\n")
+
+    with pytest.raises(ValueError, match="not a Notia snapshot"):
+        SnapshotReader(str(path))
+
+
+def test_abort_leaves_no_file(tmp_path):
+    path = str(tmp_path / "notes.snapshot")
+    writer = SnapshotWriter(path, "text-embedding-3-small")
+    writer.write(NOTES, ["n1"], ["note"], [{}], [[0.1, 0.2]])
+
+    writer.abort()
+
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,42 @@
+from tool_output import preview, shape_content, shape_notes
+
+
+def notes_data(count, length=100):
+    return {
+        "ids": [f"n{i}" for i in range(count)],
+        "documents": ["x" * length for _ in range(count)],
+        "metadatas": [{"project": "alpha", "timestamp": "2024-01-01T00:00:00"}] * count,
+    }
+
+
+def test_preview_flattens_and_cuts_the_content():
+    assert preview("first line\n\n  second   line") == "first line second line"
+    assert preview("x" * 20, length=10) == "x" * 9 + "…"
+
+
+def test_page_stops_at_the_budget():
+    page = shape_notes(notes_data(10), cursor=20, total=30, budget=500)
+
+    assert 0 < len(page["notes"]) < 10
+    assert page["next_cursor"] == 20 + len(page["notes"])
+    assert page["notes"][0]["length"] == 100
+
+
+def test_page_returns_at_least_one_note():
+    page = shape_notes(notes_data(2, length=1000), budget=10)
+
+    assert [note["id"] for note in page["notes"]] == ["n0"]
+    assert page["next_cursor"] == 1
+
+
+def test_last_page_has_no_next_cursor():
+    assert shape_notes(notes_data(3), cursor=7, total=10)["next_cursor"] is None
+    assert shape_notes(notes_data(3))["next_cursor"] is None
+
+
+def test_content_is_read_in_windows():
+    first = shape_content("abcdefghij", budget=4)
+    last = shape_content("abcdefghij", offset=8, budget=4)
+
+    assert first == {"content": "abcd", "length": 10, "next_offset": 4}
+    assert last == {"content": "ij", "length": 10, "next_offset": None}
@@ -0,0 +1,72 @@
+import asyncio
+
+import httpx
+import pytest
+
+pytest.importorskip("agents")
+
+import tools
+from rerank_policy import FAILED, SHRUNK, TIMED_OUT
+
+DOCUMENTS = ["first", "second", "third", "fourth"]
+
+
+class FakeStore:
+    """Answers rerank requests with the given results, or raises them."""
+
+    def __init__(self, results=(), delay=0.0):
+        self.results = results
+        self.delay = delay
+
+    async def rerank_documents(self, query, documents):
+        await asyncio.sleep(self.delay)
+        if isinstance(self.results, Exception):
+            raise self.results
+        return list(self.results)
+
+
+def rerank(monkeypatch, store, positions=(1, 3)):
+    monkeypatch.setattr(tools, "vs", store)
+    return asyncio.run(tools._rerank_candidates("query", DOCUMENTS, SHRUNK, list(positions)))
+
+
+def test_scores_are_mapped_back_to_the_candidates(monkeypatch):
+    store = FakeStore(
+        [{"index": 1, "relevance_score": 0.9}, {"index": 0, "relevance_score": 0.2}]
+    )
+
+    assert rerank(monkeypatch, store) == (SHRUNK, {3: 0.9, 1: 0.2})
+
+
+def test_indices_of_documents_not_sent_are_ignored(monkeypatch):
+    store = FakeStore(
+        [
+            {"index": 5, "relevance_score": 0.9},
+            {"index": -1, "relevance_score": 0.8},
+            {"index": 0, "relevance_score": 0.2},
+        ]
+    )
+
+    assert rerank(monkeypatch, store) == (SHRUNK, {1: 0.2})
+
+
+def test_no_valid_score_keeps_the_vector_order(monkeypatch):
+    store = FakeStore([{"index": 7, "relevance_score": 0.9}])
+
+    assert rerank(monkeypatch, store) == (FAILED, {})
+
+
+def test_errors_keep_the_vector_order(monkeypatch):
+    error = httpx.HTTPStatusError(
+        "bad gateway",
+        request=httpx.Request("POST", "http://reranker"),
+        response=httpx.Response(502),
+    )
+
+    assert rerank(monkeypatch, FakeStore(error)) == (FAILED, {})
+
+
+def test_slow_reranking_keeps_the_vector_order(monkeypatch):
+    monkeypatch.setattr(tools.rerank_policy, "budget_ms", 10)
+
+    assert rerank(monkeypatch, FakeStore(delay=1.0)) == (TIMED_OUT, {})